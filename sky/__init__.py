@@ -0,0 +1,10 @@
+import importlib
+
+# Service modules are imported on first access, since they import boto.
+_lazy_modules = ['aio', 'api', 'compute', 'database', 'networking', 'security', 'storage']
+
+def __getattr__(name):
+    if name not in _lazy_modules:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+    return importlib.import_module('.' + name, __name__)
@@ -0,0 +1,189 @@
+"""aio.py: Awaitable counterparts of the sky.api functions, for async def Infrastructure objects.
+
+AWS API calls are blocking, so they run on the event loop's default executor.
+Waits for resources to become available are made by the shared pollers (see
+:mod:`sky.poller`) and awaited with :func:`asyncio.wrap_future`, so that many
+in-flight waits share one describe request per tick instead of each occupying
+a thread.
+"""
+
+import asyncio
+import functools
+import contextvars
+import importlib
+import logging
+from .planner import plannable
+
+logger = logging.getLogger(__name__)
+
+async def run(function, *args, **kwargs):
+    """
+    Run a blocking function on the event loop's default executor, in a copy of
+    the current context.
+
+    :rtype: object
+    :return: The function's return value.
+    """
+
+    loop = asyncio.get_event_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(context.run, function, *args, **kwargs))
+
+
+def awaitable(module_name, function_name, resource_type=None, many=False, action=None):
+    # Import the service module on first use, since the service modules import boto.
+    async def function(*args, **kwargs):
+        module = importlib.import_module(module_name, __package__)
+        return await run(getattr(module, function_name), *args, **kwargs)
+
+    function.__name__ = function_name
+    function.__doc__ = 'Awaitable counterpart of :func:`sky%s.%s`.' % (module_name, function_name)
+    return plannable(resource_type, many=many, action=action)(function)
+
+
+create_network = awaitable('.networking', 'create_network', 'vpc')
+create_subnets = awaitable('.networking', 'create_subnets', 'subnet', many=True)
+get_instances = awaitable('.compute', 'get_instances', many=True)
+create_instances = awaitable('.compute', 'create_instances', 'instance', many=True)
+terminate_instances = awaitable('.compute', 'terminate_instances', action='terminate')
+create_security_group = awaitable('.compute', 'create_security_group', 'security_group')
+create_load_balancer = awaitable('.compute', 'create_load_balancer', 'load_balancer')
+register_instances = awaitable('.compute', 'register_instances', action='register')
+upload_ssl_certificate = awaitable('.security', 'upload_ssl_certificate', 'server_certificate')
+
+
+@plannable()
+async def wait_for_instances(instances, state='running', interval=1):
+    """
+    Awaitable counterpart of :func:`sky.compute.wait_for_instances`.
+    """
+
+    from .compute import TRANSITIONAL_INSTANCE_STATES
+    from .poller import watch_instances
+
+    pending_instances = [instance for instance in instances if instance.state in TRANSITIONAL_INSTANCE_STATES]
+    if pending_instances:
+        logger.debug('Waiting for EC2 Instance(s) to be %s (%s)...' % (state, ', '.join([instance.id for instance in pending_instances])))
+
+        # Update each EC2 Instance in place, once it has settled.
+        updated_instances = await asyncio.gather(*[asyncio.wrap_future(future) for future in watch_instances(pending_instances)])
+        for instance, updated_instance in zip(pending_instances, updated_instances):
+            instance._update(updated_instance)
+
+    unexpected_instances = [instance for instance in instances if instance.state != state]
+    if unexpected_instances:
+        raise RuntimeError('EC2 Instance(s) did not become %s (%s).' % (state, ', '.join(['%s: %s' % (instance.id, instance.state) \
+                                                                                          for instance in unexpected_instances])))
+
+
+@plannable('instance')
+async def create_nat_instance(public_subnet, private_subnet, name=None, security_groups=None, image_id=None, region=None):
+    """
+    Awaitable counterpart of :func:`sky.compute.create_nat_instance`.
+    """
+
+    from .compute import launch_nat_instance, route_nat_instance
+
+    nat_instance, route_table = await run(launch_nat_instance, public_subnet, private_subnet,
+                                          name=name, security_groups=security_groups, image_id=image_id, region=region)
+    if not route_table:
+        return nat_instance
+
+    await wait_for_instances([nat_instance])
+    await run(route_nat_instance, nat_instance, route_table, private_subnet, region=region)
+
+    return nat_instance
+
+
+@plannable('instance', many=True)
+async def create_nat_instances(public_subnets, private_subnets, security_groups=None, image_id=None, region=None):
+    """
+    Awaitable counterpart of :func:`sky.compute.create_nat_instances`.
+    """
+
+    from .compute import launch_nat_instance, route_nat_instances
+
+    # Ensure that there is a one-to-one match between Public Subnets and Private Subnets.
+    if not len(public_subnets) == len(private_subnets):
+        raise RuntimeError('The number of Public/Private Subnets must match (Public: %d Private: %d).' % (len(public_subnets), len(private_subnets)))
+
+    # Pair Public and Private Subnets together by availability zone.
+    subnet_pairs = list(zip(sorted(public_subnets, key=lambda x: x.availability_zone), sorted(private_subnets, key=lambda x: x.availability_zone)))
+
+    # Launch NAT Instances in every availability zone concurrently.
+    launched_nat_instances = await asyncio.gather(*[run(launch_nat_instance, public_subnet, private_subnet, security_groups=security_groups,
+                                                        image_id=image_id, region=region) for (public_subnet, private_subnet) in subnet_pairs])
+    nat_instances = [nat_instance for nat_instance, route_table in launched_nat_instances]
+
+    # Wait for the new NAT Instances to run, together, then route traffic through them in a single pass over the VPC's Route Tables.
+    nat_routes = [(nat_instance, route_table, private_subnet) for (nat_instance, route_table), (public_subnet, private_subnet) \
+                  in zip(launched_nat_instances, subnet_pairs) if route_table]
+    if nat_routes:
+        await wait_for_instances([nat_instance for nat_instance, route_table, private_subnet in nat_routes])
+        await run(route_nat_instances, nat_routes, region=region)
+
+    return nat_instances
+
+
+@plannable()
+async def wait_for_database(name, interval=1):
+    """
+    Awaitable counterpart of :func:`sky.database.wait_for_database`.
+    """
+
+    from .poller import watch_database
+
+    logger.info('Getting endpoint for database (%s).' % name)
+    endpoint = (await asyncio.wrap_future(watch_database(name)))['Endpoint']
+    logger.info('Got database endpoint (%s).' % endpoint)
+
+    return endpoint
+
+
+@plannable('db_instance')
+async def create_database(*args, **kwargs):
+    """
+    Awaitable counterpart of :func:`sky.database.create_database`.
+    """
+
+    from . import database
+
+    kwargs['wait'] = False
+    db_instance = await run(database.create_database, *args, **kwargs)
+
+    # Existing Database Instances are returned with their endpoint.
+    if 'endpoint' not in db_instance:
+        name = db_instance['CreateDBInstanceResponse']\
+                          ['CreateDBInstanceResult']\
+                          ['DBInstance']\
+                          ['DBInstanceIdentifier']
+        db_instance['endpoint'] = await wait_for_database(name)
+
+    return db_instance
+
+
+@plannable(action='rotate')
+async def rotate_instances(load_balancer, instances, terminate_outgoing_instances=True, interval=5):
+    """
+    Awaitable counterpart of :func:`sky.compute.rotate_instances`.
+    """
+
+    from .compute import get_outgoing_instances, register_instances, rotate_in_service_instance
+    from .poller import watch_instance_health
+
+    # Retrieve outgoing EC2 instances.
+    old_instances = await run(get_outgoing_instances, load_balancer)
+
+    # Register incoming EC2 instances with the Load Balancer.
+    await run(register_instances, load_balancer, instances)
+
+    # Rotate EC2 instances as incoming EC2 instances come into service.
+    if old_instances:
+        async def settled(instance, future):
+            return instance, await asyncio.wrap_future(future)
+
+        futures = watch_instance_health(load_balancer, instances)
+        for next_settled in asyncio.as_completed([settled(instance, future) for instance, future in zip(instances, futures)]):
+            instance, instance_state = await next_settled
+            if instance_state.state == 'InService':
+                await run(rotate_in_service_instance, load_balancer, instance, old_instances, terminate_outgoing_instances)
@@ -1,7 +1,45 @@
+import importlib
 from .state import ready
+from .planner import plannable
 from .decorators import permanent, ephemeral, infrastructure
-from .networking import create_network, create_subnets
-from .compute import (get_instances, create_instances, terminate_instances,
-                      create_nat_instances, create_security_group, create_load_balancer, register_instances)
-from .database import create_database
-from .security import upload_ssl_certificate
\ No newline at end of file
+
+# Functions are imported from their service modules on first call, since the service modules import boto. Each is
+# listed in the format: (module, created resource type, returns many resources, planned action).
+_lazy_attributes = {
+    'create_network':         ('.networking', 'vpc',                False, None),
+    'create_subnets':         ('.networking', 'subnet',             True,  None),
+    'get_instances':          ('.compute',    None,                 True,  None),
+    'create_instances':       ('.compute',    'instance',           True,  None),
+    'terminate_instances':    ('.compute',    None,                 False, 'terminate'),
+    'create_nat_instances':   ('.compute',    'instance',           True,  None),
+    'create_security_group':  ('.compute',    'security_group',     False, None),
+    'create_load_balancer':   ('.compute',    'load_balancer',      False, None),
+    'register_instances':     ('.compute',    None,                 False, 'register'),
+    'create_database':        ('.database',   'db_instance',        False, None),
+    'upload_ssl_certificate': ('.security',   'server_certificate', False, None),
+}
+
+__all__ = ['ready', 'permanent', 'ephemeral', 'infrastructure'] + list(_lazy_attributes)
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+    module_name, resource_type, many, action = _lazy_attributes[name]
+
+    def function(*args, **kwargs):
+        return getattr(importlib.import_module(module_name, __package__), name)(*args, **kwargs)
+
+    function.__name__ = function.__qualname__ = name
+    function.__doc__ = 'Call :func:`sky%s.%s`.' % (module_name, name)
+
+    # Answer from the current plan, if a deployment is being planned, without importing the service module.
+    value = plannable(resource_type, many=many, action=action)(function)
+
+    # Cache the attribute, so that subsequent lookups bypass __getattr__.
+    globals()[name] = value
+
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes))
@@ -0,0 +1,164 @@
+import os
+import json
+import types
+import hashlib
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+def get_file_hash(path):
+    """
+    Hash the contents of a file.
+
+    :type path: str
+    :param path: The path to the file.
+
+    :rtype: str
+    :return: The SHA-1 hex digest of the file's contents.
+    """
+
+    with open(path, 'rb') as source_file:
+        return hashlib.sha1(source_file.read()).hexdigest()
+
+
+def get_local_modules(module, directory, modules=(), nodes=()):
+    """
+    Find the source files of a module and of the modules that it imports, transitively, from a directory.
+
+    Modules that are only reached through ``from module import name`` are
+    not referenced by the importing module, so they are found through
+    ``modules`` (e.g., the modules that were imported while the skyfile was
+    loaded) and through the modules that define ``nodes``.
+
+    :type module: module
+    :param module: The module to search, e.g., the skyfile module.
+
+    :type directory: str
+    :param directory: Only modules located within this directory are returned.
+        Installed packages (``site-packages``) are skipped.
+
+    :type modules: list
+    :param modules: *Optional* additional modules to search.
+
+    :type nodes: list
+    :param nodes: *Optional* Infrastructure objects, whose source files are
+        included.
+
+    :rtype: list
+    :return: A sorted list of absolute source file paths.
+    """
+
+    directory = os.path.abspath(directory) + os.sep
+
+    def is_local(path):
+        return path.startswith(directory) and 'site-packages' not in path and path.endswith('.py')
+
+    paths = set()
+    visited = set()
+    pending = [module] + list(modules)
+    while pending:
+        module = pending.pop()
+        if id(module) in visited:
+            continue
+        visited.add(id(module))
+
+        path = getattr(module, '__file__', None)
+        if not path:
+            continue
+        path = os.path.abspath(path)
+        if not is_local(path):
+            continue
+
+        paths.add(path)
+        pending.extend(obj for obj in vars(module).values() if isinstance(obj, types.ModuleType))
+
+    # Add the source file of each Infrastructure object, wherever it was imported from.
+    for node in nodes:
+        try:
+            path = inspect.getsourcefile(inspect.unwrap(node._wrapped))
+        except TypeError:
+            continue
+        if path and is_local(os.path.abspath(path)):
+            paths.add(os.path.abspath(path))
+
+    return sorted(paths)
+
+
+def save_graph(path, files, dependency_graph):
+    """
+    Save a compiled dependency graph.
+
+    :type path: str
+    :param path: The path of the cache file.
+
+    :type files: list
+    :param files: The source files that the dependency graph was compiled
+        from. The cache is invalidated when any of them change.
+
+        * See also: :func:`sky.cache.get_local_modules`.
+
+    :type dependency_graph: list
+    :param dependency_graph: A list of levels of Infrastructure objects.
+
+        * See also: :func:`sky.main.build_dependency_graph`.
+    """
+
+    compiled_graph = {
+        'version': CACHE_VERSION,
+        'files': {source_path: get_file_hash(source_path) for source_path in files},
+        'nodes': {node.__name__: sorted(node.dependencies or ()) for level in dependency_graph for node in level},
+        'levels': [[node.__name__ for node in level] for level in dependency_graph],
+    }
+
+    # Write the cache file atomically, so that a concurrent reader never sees a partial file.
+    temporary_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary_path, 'w') as cache_file:
+        json.dump(compiled_graph, cache_file, indent=2, sort_keys=True)
+    os.replace(temporary_path, path)
+    logger.debug('Saved compiled dependency graph (%s).' % path)
+
+
+def load_graph(path, skyfile):
+    """
+    Load a compiled dependency graph, if it is still valid.
+
+    :type path: str
+    :param path: The path of the cache file.
+
+    :type skyfile: str
+    :param skyfile: The path of the skyfile that the graph must have been
+        compiled from.
+
+    :rtype: dict
+    :return: A dictionary with ``nodes`` (a mapping of each node name to the
+        names of the nodes that it requires) and ``levels`` (a list of lists of
+        node names), or ``None`` if there is no valid cache.
+    """
+
+    try:
+        with open(path) as cache_file:
+            compiled_graph = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if compiled_graph.get('version') != CACHE_VERSION:
+        return None
+
+    files = compiled_graph.get('files', {})
+    if os.path.abspath(skyfile) not in files:
+        return None
+
+    # Invalidate the cache if the skyfile, or any local module that it imports, has changed.
+    for source_path, file_hash in files.items():
+        try:
+            if get_file_hash(source_path) != file_hash:
+                logger.debug('Compiled dependency graph is stale (%s changed).' % source_path)
+                return None
+        except OSError:
+            return None
+
+    logger.debug('Loaded compiled dependency graph (%s).' % path)
+    return compiled_graph
@@ -1,14 +1,43 @@
 import re
-import time
 import random
 import logging
 from operator import itemgetter
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import boto
 from .networking import connect_vpc, create_route_table
 from .state import config, mode
+from .connections import get_connection, get_region_name, regional
+from .store import record_resource, find_resources
+from .waiter import Waiter
+from .tagging import tag, batched_tags
+from .poller import watch_instances, watch_instance_health
 
 logger = logging.getLogger(__name__)
 
+TRANSITIONAL_INSTANCE_STATES = ['pending', 'stopping', 'shutting-down']
+
+# The maximum number of Subnets that EC2 Instances are launched in concurrently.
+MAX_WORKERS = 16
+
+# Quick-start Amazon Machine Images (AMIs), by region and OS. AMIs of other regions are looked up, then added.
+QUICK_START_IMAGES = {
+    'us-east-1': {
+        'amazon-linux': 'ami-146e2a7c',
+        'redhat':       'ami-12663b7a',
+        'suse':         'ami-aeb532c6',
+        'ubuntu':       'ami-9a562df2',
+    },
+}
+
+# Image filters that select the quick-start AMI of each OS in any region.
+QUICK_START_IMAGE_FILTERS = {
+    'amazon-linux': {'owner-alias': 'amazon',       'name': 'amzn-ami-hvm-*-x86_64-gp2'},
+    'redhat':       {'owner-id':    '309956199498', 'name': 'RHEL-7.*_HVM_GA-*-x86_64-*'},
+    'suse':         {'owner-alias': 'amazon',       'name': 'suse-sles-12-*-hvm-ssd-x86_64'},
+    'ubuntu':       {'owner-id':    '099720109477', 'name': 'ubuntu/images/hvm-ssd/ubuntu-trusty-14.04-amd64-server-*'},
+}
+
 def connect_ec2():
     """
     Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
@@ -17,14 +46,20 @@ def connect_ec2():
     :return: An :class:`~boto.ec2.connection.EC2Connection` object.
     """
 
-    logger.debug('Connecting to the Amazon Elastic Compute Cloud (Amazon EC2) service.')
-    ec2 = boto.connect_ec2(aws_access_key_id=config['AWS_ACCESS_KEY_ID'],
-                           aws_secret_access_key=config['AWS_SECRET_ACCESS_KEY'])
-    logger.debug('Connected to Amazon EC2.')
+    return get_connection('ec2')
 
-    return ec2
+def connect_elb():
+    """
+    Connect to the Amazon EC2 Load Balancing (Amazon ELB) service.
+
+    :rtype: :class:`boto.ec2.elb.ELBConnection`
+    :return: An :class:`~boto.ec2.elb.ELBConnection` object.
+    """
+
+    return get_connection('elb')
 
-def create_security_group(vpc, name=None, database_backend=None, allowed_inbound_traffic=[], allowed_outbound_traffic=[]):
+@regional
+def create_security_group(vpc, name=None, database_backend=None, allowed_inbound_traffic=[], allowed_outbound_traffic=[], region=None):
     """
     Create an Amazon EC2-VPC Security Group.
 
@@ -75,6 +110,10 @@ def create_security_group(vpc, name=None, database_backend=None, allowed_inbound
 
             * A :class:`~boto.ec2.securitygroup.SecurityGroup` that the outbound traffic is destined to.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.ec2.securitygroup.SecurityGroup`
     :return: An Amazon EC2-VPC Security Group.
     """
@@ -92,9 +131,11 @@ def create_security_group(vpc, name=None, database_backend=None, allowed_inbound
     # Check for existing Security Group.
     if config['CREATION_MODE'] == mode.PERMANENT:
         try:
-            existing_security_group = ec2_connection.get_all_security_groups(filters={'group-name': name,})
+            existing_security_group = find_resources('security_group', name=name) or \
+                                      ec2_connection.get_all_security_groups(filters={'group-name': name,})
             if len(existing_security_group):
                 logger.info('Found existing Security Group (%s).' % name)
+                record_resource('security_group', existing_security_group[-1].id, name=name, parent=vpc.id, adopted=True)
                 return existing_security_group[-1]
         except boto.exception.EC2ResponseError as error:
             if error.code == 'InvalidGroup.NotFound': # The requested Security Group doesn't exist.
@@ -107,6 +148,7 @@ def create_security_group(vpc, name=None, database_backend=None, allowed_inbound
     logger.info('Creating Security Group (%s).' % name)
     security_group = ec2_connection.create_security_group(name, 'Security Group Description', vpc_id=vpc.id)
     logger.info('Created Security Group (%s).' % name)
+    record_resource('security_group', security_group.id, name=name, parent=vpc.id)
 
     # Set up inbound/outbound rules.
     ec2_connection.revoke_security_group_egress(security_group.id, -1, from_port=0, to_port=65535, cidr_ip='0.0.0.0/0')
@@ -159,22 +201,16 @@ def create_security_group(vpc, name=None, database_backend=None, allowed_inbound
             logger.info('Security Group (%s) allowed outbound %s traffic to %s.' % (name, protocol + (' Port %s' % port if port else ''), target))
 
     # Tag Security Group.
-    tagged = False
-    while not tagged:
-        try:
-            tagged = ec2_connection.create_tags(security_group.id, {'Name': name,
-                                                                    'Project': config['PROJECT_NAME'],
-                                                                    'Environment': config['ENVIRONMENT'],})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidID': # Security Group hasn't registered with EC2 service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
+    tags = {'Name': name,
+            'Project': config['PROJECT_NAME'],
+            'Environment': config['ENVIRONMENT'],}
+    tag([security_group.id], tags)
 
     return security_group
 
 
-def create_load_balancer(subnets, name=None, security_groups=None, ssl_certificate=None):
+@regional
+def create_load_balancer(subnets, name=None, security_groups=None, ssl_certificate=None, region=None):
     """
     Create an Elastic Load Balancer (ELB).
 
@@ -202,14 +238,16 @@ def create_load_balancer(subnets, name=None, security_groups=None, ssl_certifica
 
         * See also: :func:`sky.security.upload_ssl_certificate`.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.ec2.elb.loadbalancer.LoadBalancer`
     :return: An Elastic Load Balancer (ELB).
     """
 
     # Connect to the Amazon EC2 Load Balancing (Amazon ELB) service.
-    logger.debug('Connecting to the Amazon EC2 Load Balancing (Amazon ELB) service.')
-    elb_connection = boto.connect_elb()
-    logger.debug('Connected to the Amazon EC2 Load Balancing (Amazon ELB) service.')
+    elb_connection = connect_elb()
 
     # Generate Elastic Load Balancer (ELB) name.
     if not name:
@@ -218,10 +256,12 @@ def create_load_balancer(subnets, name=None, security_groups=None, ssl_certifica
     # Check for existing Load Balancer.
     if config['CREATION_MODE'] == mode.PERMANENT:
         try:
-            existing_load_balancer = elb_connection.get_all_load_balancers(load_balancer_names=[name])
+            existing_load_balancer = find_resources('load_balancer', name=name) or \
+                                     elb_connection.get_all_load_balancers(load_balancer_names=[name])
             if len(existing_load_balancer):
                 existing_load_balancer = existing_load_balancer[-1]
                 logger.info('Found existing Load Balancer (%s) at (%s).' % (existing_load_balancer.name, existing_load_balancer.dns_name))
+                record_resource('load_balancer', existing_load_balancer.name, name=name, adopted=True)
                 return existing_load_balancer
         except boto.exception.BotoServerError as error:
             if error.code == 'LoadBalancerNotFound': # The requested Load Balancer doesn't exist.
@@ -273,11 +313,13 @@ def create_load_balancer(subnets, name=None, security_groups=None, ssl_certifica
                                                         scheme='internet-facing', # Valid only for load balancers in EC2-VPC.
                                                         complex_listeners=complex_listeners)
     logger.info('Created Elastic Load Balancer (%s).' % name)
+    record_resource('load_balancer', name, name=name, parent=subnets[-1].vpc_id)
 
     return load_balancer
 
 
-def create_nat_instances(public_subnets, private_subnets, security_groups=None, image_id=None):
+@regional
+def create_nat_instances(public_subnets, private_subnets, security_groups=None, image_id=None, region=None):
     '''
     Create NAT (Network Address Translation) Instances.
 
@@ -305,6 +347,10 @@ def create_nat_instances(public_subnets, private_subnets, security_groups=None,
         the OS and Virtualization Type that the NAT Instances will use. By
         default, this is the AMI ID returned by :func:`sky.compute.get_nat_image`.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: list
     :return: A list of NAT :class:`~boto.ec2.instance.Instance` objects.
     '''
@@ -315,17 +361,31 @@ def create_nat_instances(public_subnets, private_subnets, security_groups=None,
 
     # Pair Public and Private Subnets together by availability zone.
     subnet_pairs = list(zip(sorted(public_subnets, key=lambda x: x.availability_zone), sorted(private_subnets, key=lambda x: x.availability_zone)))
-
-    # Create NAT instances.
-    nat_instances = list()
-    for (public_subnet, private_subnet) in subnet_pairs:
-        nat_instance = create_nat_instance(public_subnet, private_subnet, name=None, security_groups=None, image_id=None)
-        nat_instances.append(nat_instance)
+    if not subnet_pairs:
+        return []
+
+    # Launch NAT instances in every availability zone concurrently.
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(subnet_pairs))) as pool:
+        # Run each launch in a copy of the current context, so that it inherits the deployment Context.
+        futures = [pool.submit(contextvars.copy_context().run, launch_nat_instance, public_subnet, private_subnet,
+                               security_groups=security_groups, image_id=image_id) for (public_subnet, private_subnet) in subnet_pairs]
+        launched_nat_instances = [future.result() for future in futures]
+    nat_instances = [nat_instance for nat_instance, route_table in launched_nat_instances]
+
+    # Wait for the new NAT instances to run, together.
+    nat_routes = [(nat_instance, route_table, private_subnet) for (nat_instance, route_table), (public_subnet, private_subnet) \
+                  in zip(launched_nat_instances, subnet_pairs) if route_table]
+    if nat_routes:
+        wait_for_instances([nat_instance for nat_instance, route_table, private_subnet in nat_routes])
+
+        # Route traffic from the Private Subnets through the NAT Instances, in a single pass over the VPC's Route Tables.
+        route_nat_instances(nat_routes)
 
     return nat_instances
 
 
-def create_nat_instance(public_subnet, private_subnet, name=None, security_groups=None, image_id=None):
+@regional
+def create_nat_instance(public_subnet, private_subnet, name=None, security_groups=None, image_id=None, region=None):
     '''
     Create a NAT (Network Address Translation) Instance.
 
@@ -358,10 +418,48 @@ def create_nat_instance(public_subnet, private_subnet, name=None, security_group
         default, this is the AMI ID returned by
         :func:`sky.compute.get_nat_image`.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.ec2.instance.Instance`
     :return: A NAT Instance.
     '''
 
+    # Create NAT Instance and its Route Table.
+    nat_instance, route_table = launch_nat_instance(public_subnet, private_subnet, name=name, security_groups=security_groups, image_id=image_id)
+    if not route_table:
+        return nat_instance
+
+    # Wait for NAT instance to run.
+    wait_for_instances([nat_instance])
+
+    # Route traffic from the Private Subnet through the NAT Instance.
+    route_nat_instance(nat_instance, route_table, private_subnet)
+
+    return nat_instance
+
+
+@regional
+def launch_nat_instance(public_subnet, private_subnet, name=None, security_groups=None, image_id=None, region=None):
+    '''
+    Launch a NAT (Network Address Translation) Instance, without waiting for it to run.
+
+    This is the first stage of :func:`sky.compute.create_nat_instance`. Once
+    the NAT Instance is running, :func:`sky.compute.route_nat_instance` (or
+    :func:`sky.compute.route_nat_instances`, for several NAT Instances)
+    completes its setup. The parameters are the same as those of
+    :func:`sky.compute.create_nat_instance`.
+
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
+    :rtype: tuple
+    :return: A tuple in the format: (``nat_instance``, ``route_table``). If an
+        existing NAT Instance was found, ``route_table`` is ``None``.
+    '''
+
     # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
     ec2_connection = connect_ec2()
 
@@ -374,10 +472,12 @@ def create_nat_instance(public_subnet, private_subnet, name=None, security_group
 
     # Check for existing NAT Server.
     if config['CREATION_MODE'] == mode.PERMANENT:
-         nat_instances = get_instances(name=name, role='nat')
+         nat_instances = [instance for instance in find_resources('instance', name=name) if instance.state == 'running'] or \
+                         get_instances(name=name, role='nat')
          if len(nat_instances):
              logger.info('Found existing NAT Server (%s).' % name)
-             return nat_instances
+             record_resource('instance', nat_instances[-1].id, name=name, parent=nat_instances[-1].vpc_id, adopted=True)
+             return nat_instances[-1], None
 
     # Get VPC from Subnets.
     vpc_id = set([subnet.vpc_id for subnet in [public_subnet, private_subnet]])
@@ -417,59 +517,159 @@ def create_nat_instance(public_subnet, private_subnet, name=None, security_group
     route_table_name = '-'.join(['rtb', config['PROJECT_NAME'], config['ENVIRONMENT'], public_subnet.availability_zone, 'private'])
     route_table = create_route_table(vpc, name=route_table_name, internet_access=False)
 
-    # Wait for NAT instance to run.
-    while (nat_instance.state == 'pending'):
-        logger.debug('Waiting for NAT instance to run (%s)...' % nat_instance.id)
-        time.sleep(1)
-        nat_instance.update()
-
-    # Add route to NAT Instance to Route Table.
-    vpc_connection.create_route(route_table.id,    # route_table_id
-                                '0.0.0.0/0',       # destination_cidr_block
-                                gateway_id=None,
-                                instance_id=nat_instance.id,
-                                interface_id=None,
-                                vpc_peering_connection_id=None,
-                                dry_run=False)
-
-    # Check for existing Route Table association.
-    route_tables = vpc_connection.get_all_route_tables(filters={'vpc-id': vpc.id,})
-    existing_association = [association.id for route_table in route_tables for association in route_table.associations if association.subnet_id == private_subnet.id]
-    existing_association = existing_association[0] if existing_association else None
-
-    # Associate Private Subnet to Route Table.
-    if existing_association:
-        association = vpc_connection.replace_route_table_association_with_assoc(existing_association, # association_id
-                                                                                route_table.id,       # route_table_id
-                                                                                dry_run=False)
-    else:
-        association = vpc_connection.associate_route_table(route_table.id,    # route_table_id
-                                                           private_subnet.id, # subnet_id
-                                                           dry_run=False)
-    if len(association):
-        logger.debug('Subnet (%s) associated to (%s).' % (private_subnet.id, route_table.tags['Name']))
+    return nat_instance, route_table
+
+
+@regional
+def route_nat_instance(nat_instance, route_table, private_subnet, region=None):
+    '''
+    Route a Private Subnet's Internet traffic through a running NAT Instance.
+
+    This is the second stage of :func:`sky.compute.create_nat_instance`.
+
+    :type nat_instance: :class:`boto.ec2.instance.Instance`
+    :param nat_instance: A running NAT Instance.
+
+        * See also: :func:`sky.compute.launch_nat_instance`.
+
+    :type route_table: :class:`boto.vpc.routetable.RouteTable`
+    :param route_table: The Route Table that will route traffic to the NAT
+        Instance.
+
+    :type private_subnet: :class:`boto.vpc.subnet.Subnet`
+    :param private_subnet: The subnet that the NAT Instance will route traffic
+        from.
+
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+    '''
+
+    route_nat_instances([(nat_instance, route_table, private_subnet)])
+
+
+@regional
+def route_nat_instances(nat_routes, region=None):
+    '''
+    Route Private Subnets' Internet traffic through running NAT Instances.
+
+    The Route Tables of the Private Subnets' VPC are listed once, for both
+    the Subnets' existing associations and the clean-up of orphaned Route
+    Tables, however many NAT Instances there are.
+
+    :type nat_routes: list
+    :param nat_routes: A list of routes, in the format: (``nat_instance``,
+        ``route_table``, ``private_subnet``).
+
+        * See also: :func:`sky.compute.route_nat_instance`.
+
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+    '''
+
+    # Connect to the Amazon Virtual Private Cloud (Amazon VPC) service.
+    vpc_connection = connect_vpc()
+
+    # Get VPC from Subnets.
+    vpc_id = set([private_subnet.vpc_id for nat_instance, route_table, private_subnet in nat_routes])
+    if not len(vpc_id) == 1:
+        raise RuntimeError('The specified subnets (%s) must be parts of the same network.' % ', '.join([private_subnet.id for nat_instance, route_table, private_subnet in nat_routes]))
     else:
-        logger.error('Subnet (%s) not associated to (%s).' % (private_subnet.id, route_table.tags['Name']))
+        vpc_id = next(iter(vpc_id))
+
+    # Add route to NAT Instance to each Route Table.
+    for nat_instance, route_table, private_subnet in nat_routes:
+        vpc_connection.create_route(route_table.id,    # route_table_id
+                                    '0.0.0.0/0',       # destination_cidr_block
+                                    gateway_id=None,
+                                    instance_id=nat_instance.id,
+                                    interface_id=None,
+                                    vpc_peering_connection_id=None,
+                                    dry_run=False)
+
+    # Get existing Route Table associations, by Route Table.
+    route_tables = vpc_connection.get_all_route_tables(filters={'vpc-id': vpc_id,})
+    associations = {route_table.id: set(association.id for association in route_table.associations) for route_table in route_tables}
+    subnet_associations = {association.subnet_id: (route_table.id, association.id) for route_table in route_tables \
+                           for association in route_table.associations if association.subnet_id}
+
+    for nat_instance, route_table, private_subnet in nat_routes:
+        # Associate Private Subnet to Route Table.
+        existing_association = subnet_associations.get(private_subnet.id)
+        if existing_association:
+            association = vpc_connection.replace_route_table_association_with_assoc(existing_association[1], # association_id
+                                                                                    route_table.id,          # route_table_id
+                                                                                    dry_run=False)
+            associations[existing_association[0]].discard(existing_association[1])
+        else:
+            association = vpc_connection.associate_route_table(route_table.id,    # route_table_id
+                                                               private_subnet.id, # subnet_id
+                                                               dry_run=False)
+        if len(association):
+            logger.debug('Subnet (%s) associated to (%s).' % (private_subnet.id, route_table.tags['Name']))
+            associations.setdefault(route_table.id, set()).add(association)
+        else:
+            logger.error('Subnet (%s) not associated to (%s).' % (private_subnet.id, route_table.tags['Name']))
 
     # Clean up unused/orphaned Route Tables.
-    route_tables = vpc_connection.get_all_route_tables(filters={'vpc-id': vpc.id,})
-    main_route_table = vpc_connection.get_all_route_tables(filters={'vpc-id': vpc.id,
-                                                                    'association.main': 'true'})[0] # Affected by boto Issue #1742 : https://github.com/boto/boto/issues/1742
-    empty_route_tables = [route_table for route_table in route_tables if not len(route_table.associations) and not route_table.id == main_route_table.id]
-    for route_table in empty_route_tables:
+    main_route_table_ids = [route_table.id for route_table in route_tables for association in route_table.associations if association.main]
+    empty_route_table_ids = [route_table_id for route_table_id, route_table_associations in associations.items() \
+                             if not route_table_associations and route_table_id not in main_route_table_ids]
+    for route_table_id in empty_route_table_ids:
         try:
-            vpc_connection.delete_route_table(route_table.id, dry_run=False)
+            vpc_connection.delete_route_table(route_table_id, dry_run=False)
         except boto.exception.EC2ResponseError as error:
             if error.code == 'DependencyViolation': # Route Table was not actually empty.
                 pass
 
-    return nat_instance
+
+def wait_for_instances(instances, state='running', interval=1):
+    '''
+    Wait for EC2 Instances to leave a transitional state, e.g., ``pending``.
+
+    :type instances: list
+    :param instances: A list of EC2 :class:`~boto.ec2.instance.Instance`
+        objects. They are updated in place.
+
+    :type state: str
+    :param state: The state that the EC2 Instances are expected to reach.
+        By default, this is ``running``.
+
+    :type interval: int
+    :param interval: Ignored. EC2 Instances are polled by a shared poller,
+        along with every other pending EC2 Instance.
+
+        * See also: :func:`sky.poller.watch_instances`.
+
+    :raises: :class:`RuntimeError`, if an EC2 Instance settles in a state other
+        than ``state``.
+    '''
+
+    pending_instances = [instance for instance in instances if instance.state in TRANSITIONAL_INSTANCE_STATES]
+    if pending_instances:
+        logger.debug('Waiting for EC2 Instance(s) to be %s (%s)...' % (state, ', '.join([instance.id for instance in pending_instances])))
+
+        # Update each EC2 Instance in place, once it has settled.
+        for instance, future in zip(pending_instances, watch_instances(pending_instances)):
+            instance._update(future.result())
+
+    unexpected_instances = [instance for instance in instances if instance.state != state]
+    if unexpected_instances:
+        raise RuntimeError('EC2 Instance(s) did not become %s (%s).' % (state, ', '.join(['%s: %s' % (instance.id, instance.state) \
+                                                                                          for instance in unexpected_instances])))
 
 
-def create_instances(subnets, role=None, security_groups=None, script=None, instance_profile=None, os='ubuntu', image_id=None, key_name=None, internet_addressable=False):
+@regional
+def create_instances(subnets, role=None, security_groups=None, script=None, instance_profile=None, os='ubuntu', image_id=None, key_name=None, internet_addressable=False, count=1, region=None):
     '''
     Create EC2 Instances across subnets.
 
+    The EC2 Instances in each Subnet are run with a single request, and the
+    Subnets are launched concurrently. The fleet's Elastic Network Interfaces
+    (ENIs) are then looked up with a single request, and its tags are created
+    concurrently.
+
     :type subnets: list
     :param subnets: A list of :class:`~boto.vpc.subnet.Subnet` objects
         that the EC2 Instances will be created in.
@@ -519,10 +719,22 @@ def create_instances(subnets, role=None, security_groups=None, script=None, inst
         will be associated to the EC2 Instances. By default, the EC2 Instances
         are *not* Internet-addressable.
 
+    :type count: int
+    :param count: The number of EC2 Instances to create in each Subnet. By
+        default, one EC2 Instance is created in each Subnet.
+
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: list
     :return: A list of EC2 :class:`~boto.ec2.instance.Instance` objects.
     '''
 
+    # There is nothing to create without Subnets, or without EC2 Instances to create in them.
+    if not subnets or count < 1:
+        return []
+
     # Create a security group, if a security group was not specified.
     if not security_groups:
         # Connect to the Amazon Virtual Private Cloud (Amazon VPC) service.
@@ -543,15 +755,25 @@ def create_instances(subnets, role=None, security_groups=None, script=None, inst
                                                                                ,('HTTPS', '0.0.0.0/0')
                                                                                ,('DNS',   '0.0.0.0/0')])]
 
-    # Create EC2 instances.
-    instances = list()
-    for subnet in subnets:
-        instance = create_instance(subnet, role=role, security_groups=security_groups, script=script, instance_profile=instance_profile, os=os, image_id=image_id, key_name=key_name, internet_addressable=internet_addressable)
-        instances = instances.append(instance)
-    return instances
+    # Determine whether to use a start-up AMI or a specific AMI.
+    image_id = get_image_id(os=os, image_id=image_id)
+
+    # Launch EC2 Instances in every Subnet concurrently, then tag the whole fleet together.
+    with batched_tags():
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(subnets))) as pool:
+            # Run each launch in a copy of the current context, so that it inherits the deployment Context and the tag batch.
+            futures = [pool.submit(contextvars.copy_context().run, launch_instances, subnet, count=count, role=role, security_groups=security_groups,
+                                   script=script, instance_profile=instance_profile, image_id=image_id, key_name=key_name,
+                                   internet_addressable=internet_addressable) for subnet in subnets]
+            launched_instances = [launched_instance for future in futures for launched_instance in future.result()]
 
+        tag_network_interfaces(launched_instances)
 
-def create_instance(subnet, name=None, role=None, security_groups=None, script=None, instance_profile=None, os='ubuntu', image_id=None, key_name=None, internet_addressable=False):
+    return refresh_instances([instance for name, instance in launched_instances])
+
+
+@regional
+def create_instance(subnet, name=None, role=None, security_groups=None, script=None, instance_profile=None, os='ubuntu', image_id=None, key_name=None, internet_addressable=False, region=None):
     '''
     Create an EC2 Instance.
 
@@ -607,36 +829,58 @@ def create_instance(subnet, name=None, role=None, security_groups=None, script=N
         will be associated to the EC2 Instance. By default, an EC2 Instance is
         *not* Internet-addressable.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.ec2.instance.Instance`
     :return: An EC2 Instance.
     '''
 
-    # Set up dictionary of OSes and their associated quick-start Amazon Machine Images (AMIs).
-    ami = {
-        'amazon-linux': 'ami-146e2a7c',
-        'redhat':       'ami-12663b7a',
-        'suse':         'ami-aeb532c6',
-        'ubuntu':       'ami-9a562df2',
-    }
+    # Determine whether to use a start-up AMI or a specific AMI.
+    image_id = get_image_id(os=os, image_id=image_id)
 
-    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
-    ec2_connection = connect_ec2()
+    # Launch the EC2 Instance, then tag it and its Elastic Network Interface (ENI) together.
+    with batched_tags():
+        launched_instances = launch_instances(subnet, name=name, role=role, security_groups=security_groups, script=script,
+                                              instance_profile=instance_profile, image_id=image_id, key_name=key_name,
+                                              internet_addressable=internet_addressable)
+        tag_network_interfaces(launched_instances)
 
-    # Determine whether to use a start-up AMI or a specific AMI.
-    if image_id:
-        image = ec2_connection.get_image(image_id)
-        if not image:
-            raise RuntimeError('The specified Amazon Machine Image (AMI) could not be found (%s).' % image_id)
-    else:
-        image_id = ami[os]
+    return refresh_instances([instance for name, instance in launched_instances])[-1]
 
-    # Generate EC2 Instance name, if one was not specified.
-    if not name:
-        random_id = '{:08x}'.format(random.randrange(2**32))
-        name = '-'.join(['ec2', config['PROJECT_NAME'], config['ENVIRONMENT'], random_id])
 
-    # Generate Elastic Network Interface (ENI) name.
-    eni_name = '-'.join(['eni', name.replace('ec2-', '')])
+def launch_instances(subnet, count=1, name=None, role=None, security_groups=None, script=None, instance_profile=None, image_id=None, key_name=None, internet_addressable=False):
+    '''
+    Run EC2 Instances in a Subnet with a single request, and tag them.
+
+    Tags are created as part of the current tag batch, if there is one.
+
+    * See also: :func:`sky.compute.create_instance` for the parameters, and
+      :func:`sky.tagging.batched_tags`.
+
+    :type count: int
+    :param count: The number of EC2 Instances to run.
+
+    :type name: str
+    :param name: An *optional* name for a single EC2 Instance. A name will be
+        generated for each EC2 Instance from the current project name, if one
+        is not specified.
+
+    :type image_id: str
+    :param image_id: The Amazon Machine Image (AMI) ID that the EC2 Instances
+        will run.
+
+        * See also: :func:`sky.compute.get_image_id`.
+
+    :rtype: list
+    :return: A list of the EC2 Instances' names and
+        :class:`~boto.ec2.instance.Instance` objects, in the format:
+        ``(name, instance)``.
+    '''
+
+    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
+    ec2_connection = connect_ec2()
 
     # Create Elastic Network Interface (ENI) specification.
     interface = boto.ec2.networkinterface.NetworkInterfaceSpecification(subnet_id=subnet.id,
@@ -645,66 +889,153 @@ def create_instance(subnet, name=None, role=None, security_groups=None, script=N
     interfaces = boto.ec2.networkinterface.NetworkInterfaceCollection(interface)
 
     # Create EC2 Reservation.
-    logger.info('Creating EC2 Instance (%s) in %s.' % (name, subnet.availability_zone))
+    logger.info('Creating %d EC2 Instance(s) in %s.' % (count, subnet.availability_zone))
     reservation = ec2_connection.run_instances(image_id,                 # image_id
+                                               min_count=count,
+                                               max_count=count,
                                                key_name=key_name,
                                                instance_type='t2.micro',
                                                instance_profile_name=instance_profile['role_name'] if instance_profile else None,
                                                network_interfaces=interfaces,
                                                user_data=script)
-    logger.info('Created EC2 Instance (%s).' % name)
 
-    # Get EC2 Instances.
-    instances = [instances for instances in reservation.instances]
+    # Name and record EC2 Instances.
+    launched_instances = []
+    for instance in reservation.instances:
+        # Generate EC2 Instance name, if one was not specified.
+        instance_name = name if name and count == 1 else \
+                        '-'.join(['ec2', config['PROJECT_NAME'], config['ENVIRONMENT'], '{:08x}'.format(random.randrange(2**32))])
+        record_resource('instance', instance.id, name=instance_name, parent=subnet.vpc_id)
+        launched_instances.append((instance_name, instance))
+    logger.info('Created EC2 Instance(s) (%s).' % ', '.join([instance_name for instance_name, instance in launched_instances]))
+
+    # Tag EC2 Instances, once they have registered with the EC2 service.
+    for instance_name, instance in launched_instances:
+        tags = {'Name': instance_name,
+                'Project': config['PROJECT_NAME'],
+                'Environment': config['ENVIRONMENT'],}
+        if role:
+            tags['Role'] = role
+        tag([instance.id], tags)
+
+    return launched_instances
+
+
+def tag_network_interfaces(launched_instances):
+    '''
+    Tag the Elastic Network Interfaces (ENIs) of EC2 Instances, after looking
+    them up with a single request.
 
-    # Tag EC2 Instances.
-    tagged = False
-    while not tagged:
-        try:
-            # Set up tags.
-            tags = {'Name': name,
-                    'Project': config['PROJECT_NAME'],
-                    'Environment': config['ENVIRONMENT'],}
-            if role:
-                tags['Role'] = role
-
-            # Tag EC2 Instance.
-            tagged = ec2_connection.create_tags([instance.id for instance in instances], tags)
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidInstanceID.NotFound': # Instance hasn't registered with EC2 service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
+    Tags are created as part of the current tag batch, if there is one.
 
-    # Get Elastic Network Interface (ENI) attached to instances.
-    interfaces = None
-    while not interfaces:
-        try:
-            interfaces = ec2_connection.get_all_network_interfaces(filters={'attachment.instance-id': [instance.id for instance in instances]})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidInstanceID.NotFound': # Instance hasn't registered with EC2 service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
+    :type launched_instances: list
+    :param launched_instances: A list of EC2 Instances' names and
+        :class:`~boto.ec2.instance.Instance` objects.
 
-    # Tag Elastic Network Interface (ENI).
-    tagged = False
-    while not tagged:
-        try:
-            tagged = ec2_connection.create_tags([interface.id for interface in interfaces], {'Name': eni_name,
-                                                                                             'Project': config['PROJECT_NAME'],
-                                                                                             'Environment': config['ENVIRONMENT']})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidNetworkInterfaceID.NotFound': # ENI hasn't registered with EC2 service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
+        * See also: :func:`sky.compute.launch_instances`.
+    '''
+
+    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
+    ec2_connection = connect_ec2()
+
+    names = {instance.id: instance_name for instance_name, instance in launched_instances}
+
+    # Get Elastic Network Interfaces (ENIs) attached to instances, once every EC2 Instance has one.
+    def get_network_interfaces():
+        interfaces = ec2_connection.get_all_network_interfaces(filters={'attachment.instance-id': list(names)})
+        attached_ids = set(interface.attachment.instance_id for interface in interfaces if interface.attachment)
+        return interfaces if attached_ids >= set(names) else []
+
+    interfaces = Waiter('network interfaces of (%s)' % ', '.join(names), retry=['InvalidInstanceID.NotFound']).until(get_network_interfaces)
+
+    # Tag Elastic Network Interfaces (ENIs).
+    for interface in interfaces:
+        tags = {'Name': '-'.join(['eni', names[interface.attachment.instance_id].replace('ec2-', '')]),
+                'Project': config['PROJECT_NAME'],
+                'Environment': config['ENVIRONMENT']}
+        tag([interface.id], tags)
+
+
+def refresh_instances(instances):
+    '''
+    Refresh EC2 Instance objects with a single request.
+
+    :rtype: list
+    :return: A list of EC2 :class:`~boto.ec2.instance.Instance` objects, in the
+        same order.
+    '''
+
+    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
+    ec2_connection = connect_ec2()
+
+    refreshed_instances = {instance.id: instance for instance in ec2_connection.get_only_instances(instance_ids=[instance.id for instance in instances])}
+    return [refreshed_instances.get(instance.id, instance) for instance in instances]
+
+
+def get_image_id(os='ubuntu', image_id=None):
+    '''
+    Get the Amazon Machine Image (AMI) ID that EC2 Instances will run.
+
+    :type os: str
+    :param os: The OS that will run on the EC2 Instance.
+
+        * See also: :func:`sky.compute.get_quick_start_image`.
+
+    :type image_id: str
+    :param image_id: An *optional* AMI ID, which takes precedence over ``os``.
+
+    :rtype: str
+    :return: An AMI ID.
+
+    :raises: :class:`RuntimeError`, if the specified AMI could not be found.
+    '''
+
+    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
+    ec2_connection = connect_ec2()
+
+    if image_id:
+        image = ec2_connection.get_image(image_id)
+        if not image:
+            raise RuntimeError('The specified Amazon Machine Image (AMI) could not be found (%s).' % image_id)
+        return image_id
+
+    return get_quick_start_image(os)
+
+
+def get_quick_start_image(os='ubuntu'):
+    '''
+    Get the quick-start Amazon Machine Image (AMI) of an OS, in the current region.
+
+    AMI IDs differ between regions. Known AMIs are used where they are
+    listed. Otherwise, the most-recent AMI that matches the OS's image filters
+    is looked up.
+
+    :type os: str
+    :param os: ``amazon-linux``, ``redhat``, ``suse``, or ``ubuntu``.
+
+    :rtype: str
+    :return: An AMI ID.
+    '''
+
+    if os not in QUICK_START_IMAGE_FILTERS:
+        raise RuntimeError('Unsupported OS (%s).' % os)
+
+    region = get_region_name()
+    if os in QUICK_START_IMAGES.get(region, {}):
+        return QUICK_START_IMAGES[region][os]
+
+    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
+    ec2_connection = connect_ec2()
 
-    # Refresh EC2 instance objects.
-    reservations = ec2_connection.get_all_instances(instance_ids=[instance.id for instance in instances])
-    instance = next(instance for reservation in reservations for instance in reservation.instances)
+    # Look up the most recent matching AMI, once per region.
+    images = ec2_connection.get_all_images(filters=QUICK_START_IMAGE_FILTERS[os])
+    if not images:
+        raise RuntimeError('No Amazon Machine Image (AMI) was found for (%s) in (%s).' % (os, region))
+    image = sorted(images, key=lambda image: image.creationDate)[-1]
+    logger.info('Using Amazon Machine Image (AMI) (%s) for (%s) in (%s).' % (image.id, os, region))
+    QUICK_START_IMAGES.setdefault(region, {})[os] = image.id
 
-    return instance
+    return image.id
 
 
 def get_nat_image(paravirtual=False):
@@ -753,9 +1084,7 @@ def register_instances(load_balancer, instances):
     '''
 
     # Connect to the Amazon EC2 Load Balancing (Amazon ELB) service.
-    logger.debug('Connecting to the Amazon EC2 Load Balancing (Amazon ELB) service.')
-    elb_connection = boto.connect_elb()
-    logger.debug('Connected to the Amazon EC2 Load Balancing (Amazon ELB) service.')
+    elb_connection = connect_elb()
 
     logger.info('Registering (%s) with Load Balancer (%s).' % (', '.join([instance.tags['Name'] for instance in instances]) if len(instances) > 1 \
                                                                else instances[-1].tags['Name'], \
@@ -786,9 +1115,7 @@ def deregister_instances(load_balancer, instances):
     '''
 
     # Connect to the Amazon EC2 Load Balancing (Amazon ELB) service.
-    logger.debug('Connecting to the Amazon EC2 Load Balancing (Amazon ELB) service.')
-    elb_connection = boto.connect_elb()
-    logger.debug('Connected to the Amazon EC2 Load Balancing (Amazon ELB) service.')
+    elb_connection = connect_elb()
 
     logger.info('Deregistering (%s) from Load Balancer (%s).' % (', '.join([instance.tags['Name'] for instance in instances]) if len(instances) > 1 \
                                                                  else instances[-1].tags['Name'], \
@@ -897,12 +1224,8 @@ def rotate_instances(load_balancer, instances, terminate_outgoing_instances=True
         * See also: :func:`sky.compute.terminate_instances`.
     '''
 
-    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
-    ec2_connection = connect_ec2()
-
     # Retrieve outgoing EC2 instances.
-    old_reservations = ec2_connection.get_all_instances(instance_ids=[old_instance.id for old_instance in load_balancer.instances]) if load_balancer.instances else None
-    old_instances = [instance for reservation in old_reservations for instance in reservation.instances] if load_balancer.instances else None
+    old_instances = get_outgoing_instances(load_balancer)
 
     # Register incoming EC2 instances with the Load Balancer.
     register_instances(load_balancer, instances)
@@ -916,36 +1239,119 @@ def rotate_instances(load_balancer, instances, terminate_outgoing_instances=True
         logger.info('Rotating incoming EC2 Instances (%s) and outgoing EC2 instances (%s) under Load Balancer (%s).' % (new_instance_names,
                                                                                                                         old_instance_names,
                                                                                                                         load_balancer.name))
-        # Determine incoming EC2 instance states with respect to the Load Balancer.
-        instance_states = load_balancer.get_instance_health(instances=[instance.id for instance in instances])
+        # Rotate EC2 instances as incoming EC2 instances come into service.
+        futures = dict(zip(watch_instance_health(load_balancer, instances), instances))
+        for future in as_completed(futures):
+            if future.result().state == 'InService':
+                rotate_in_service_instance(load_balancer, futures[future], old_instances, terminate_outgoing_instances)
+
+        logger.info('Rotated incoming EC2 Instances (%s) and outgoing EC2 instances (%s) under Load Balancer (%s).' % (new_instance_names,
+                                                                                                                       old_instance_names,
+                                                                                                                       load_balancer.name))
 
-        # Rotate EC2 instances with a new EC2. instance has come into service.
-        while 'OutOfService' in [instance_state.state for instance_state in instance_states]:
-            # Refresh incoming EC2 instance states with respect to the Load Balancer.
-            instance_states = load_balancer.get_instance_health(instances=[instance.id for instance in instances])
 
-            # Terminate outgoing EC2 instance when an incoming EC2 instance has come into service.
-            for instance_id in [instance_state.instance_id for instance_state in instance_states if instance_state.state == 'InService']:
-                # Get incoming instance.
-                instance = next(instance for instance in instances if instance.id == instance_id)
-                logger.info('EC2 Instance (%s) has come into service.' % instance.tags['Name'])
+def get_outgoing_instances(load_balancer):
+    '''
+    Get the EC2 Instances that are currently registered with an Elastic Load Balancer (ELB).
 
-                # Get outgoing EC2 instance.
-                old_instance = next(old_instance for old_instance in old_instances if old_instance.subnet_id == instance.subnet_id)
+    :type load_balancer: :class:`boto.ec2.elb.loadbalancer.LoadBalancer`
+    :param load_balancer: The :class:`~boto.ec2.elb.loadbalancer.LoadBalancer`
+        that the EC2 Instances are registered to.
 
-                # Deregister outgoing EC2 instance from Load Balancer.
-                deregister_instances(load_balancer, [old_instance])
+    :rtype: list
+    :return: A list of EC2 :class:`~boto.ec2.instance.Instance` objects, or
+        ``None`` if no EC2 Instances are registered.
+    '''
 
-                if terminate_outgoing_instances:
-                    # Terminate outgoing EC2 instance.
-                    terminate_instances([old_instance])
+    if not load_balancer.instances:
+        return None
 
-                # Remove incoming EC2 instance from list.
-                instances.remove(instance)
+    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
+    ec2_connection = connect_ec2()
 
-            # Throttle EC2 instance rotation.
-            time.sleep(5)
+    old_reservations = ec2_connection.get_all_instances(instance_ids=[old_instance.id for old_instance in load_balancer.instances])
+    old_instances = [instance for reservation in old_reservations for instance in reservation.instances]
 
-        logger.info('Rotated incoming EC2 Instances (%s) and outgoing EC2 instances (%s) under Load Balancer (%s).' % (new_instance_names,
-                                                                                                                       old_instance_names,
-                                                                                                                       load_balancer.name))
+    return old_instances
+
+
+def rotate_in_service_instances(load_balancer, incoming_instances, outgoing_instances, terminate_outgoing_instances=True):
+    '''
+    Replace outgoing EC2 Instances with the incoming EC2 Instances that have come into service.
+
+    This is a single step of :func:`sky.compute.rotate_instances`. Incoming EC2
+    Instances that have come into service are removed from
+    ``incoming_instances``, and the outgoing EC2 Instances in their Subnets are
+    deregistered from the Load Balancer.
+
+    :type load_balancer: :class:`boto.ec2.elb.loadbalancer.LoadBalancer`
+    :param load_balancer: The :class:`~boto.ec2.elb.loadbalancer.LoadBalancer`
+        that the EC2 Instances are registered to.
+
+    :type incoming_instances: list
+    :param incoming_instances: A list of incoming EC2
+        :class:`~boto.ec2.instance.Instance` objects that have not yet come into
+        service.
+
+    :type outgoing_instances: list
+    :param outgoing_instances: A list of outgoing EC2
+        :class:`~boto.ec2.instance.Instance` objects.
+
+    :type terminate_outgoing_instances: bool
+    :param terminate_outgoing_instances: Specifies whether outgoing EC2
+        Instances will be terminated.
+
+    :rtype: bool
+    :return: ``True`` if any incoming EC2 Instances are still out of service.
+    '''
+
+    if not incoming_instances:
+        return False
+
+    # Refresh incoming EC2 instance states with respect to the Load Balancer.
+    instance_states = load_balancer.get_instance_health(instances=[instance.id for instance in incoming_instances])
+
+    # Terminate outgoing EC2 instance when an incoming EC2 instance has come into service.
+    for instance_id in [instance_state.instance_id for instance_state in instance_states if instance_state.state == 'InService']:
+        # Get incoming instance.
+        instance = next(instance for instance in incoming_instances if instance.id == instance_id)
+        rotate_in_service_instance(load_balancer, instance, outgoing_instances, terminate_outgoing_instances)
+
+        # Remove incoming EC2 instance from list.
+        incoming_instances.remove(instance)
+
+    return 'OutOfService' in [instance_state.state for instance_state in instance_states]
+
+
+def rotate_in_service_instance(load_balancer, instance, outgoing_instances, terminate_outgoing_instances=True):
+    '''
+    Replace the outgoing EC2 Instance in an incoming EC2 Instance's Subnet, once the incoming EC2 Instance has come into service.
+
+    :type load_balancer: :class:`boto.ec2.elb.loadbalancer.LoadBalancer`
+    :param load_balancer: The :class:`~boto.ec2.elb.loadbalancer.LoadBalancer`
+        that the EC2 Instances are registered to.
+
+    :type instance: :class:`boto.ec2.instance.Instance`
+    :param instance: The incoming EC2 Instance, which has come into service.
+
+    :type outgoing_instances: list
+    :param outgoing_instances: A list of outgoing EC2
+        :class:`~boto.ec2.instance.Instance` objects.
+
+    :type terminate_outgoing_instances: bool
+    :param terminate_outgoing_instances: Specifies whether the outgoing EC2
+        Instance will be terminated.
+    '''
+
+    logger.info('EC2 Instance (%s) has come into service.' % instance.tags['Name'])
+
+    # Get outgoing EC2 instance.
+    old_instance = next((old_instance for old_instance in outgoing_instances if old_instance.subnet_id == instance.subnet_id), None)
+
+    if old_instance:
+        # Deregister outgoing EC2 instance from Load Balancer.
+        deregister_instances(load_balancer, [old_instance])
+
+        if terminate_outgoing_instances:
+            # Terminate outgoing EC2 instance.
+            terminate_instances([old_instance])
@@ -0,0 +1,180 @@
+"""connections.py: A registry of reusable AWS service connections, shared by every module."""
+
+import hashlib
+import inspect
+import logging
+import functools
+import threading
+from .state import config, get_region, set_region, reset_region
+from .throttle import throttle
+
+logger = logging.getLogger(__name__)
+
+# AWS services, by name, in the format: (service description, boto module, boto connect function).
+SERVICES = {
+    'ec2': ('Amazon Elastic Compute Cloud (Amazon EC2)',          'boto.ec2',     'connect_ec2'),
+    'vpc': ('Amazon Virtual Private Cloud (Amazon VPC)',          'boto.vpc',     'connect_vpc'),
+    'elb': ('Amazon EC2 Load Balancing (Amazon ELB)',             'boto.ec2.elb', 'connect_elb'),
+    'rds': ('Amazon Relational Database Service (Amazon RDS)',    'boto.rds2',    'connect_rds2'),
+    'iam': ('Amazon Identity and Access Management (Amazon IAM)', 'boto.iam',     'connect_iam'),
+    's3':  ('Amazon Simple Storage Service (Amazon S3)',          'boto.s3',      'connect_s3'),
+}
+
+# IAM is a global service, so its connections are never regional.
+GLOBAL_SERVICES = ['iam']
+
+# boto's default region, which is used when a deployment does not specify one.
+DEFAULT_REGION = 'us-east-1'
+
+class ConnectionRegistry(object):
+    """
+    A cache of boto connections, keyed by service, region, timeout and
+    credentials.
+
+    boto connection objects keep per-request state, so each thread holds its
+    own connection object to each service. Their HTTP connections, however,
+    are kept in one process-wide, lock-protected pool per key, which every
+    thread's connection object checks HTTP connections out of and back into.
+    A short-lived worker thread (e.g., of a thread pool, a poller or a daemon
+    request) therefore reuses the HTTP connections that other threads left
+    alive, without repeating the TLS handshake. Every connection to a service
+    in a region shares one rate limit (see :mod:`sky.throttle`).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.pools = {}
+        self.created = 0
+
+    def get(self, service, region=None, timeout=None):
+        """
+        Get a connection to an AWS service, creating one if this thread does not have one yet.
+
+        :type service: str
+        :param service: A service name, e.g., ``ec2``.
+
+            * See also: :data:`sky.connections.SERVICES`.
+
+        :type region: str
+        :param region: An *optional* region name, e.g., ``us-west-2``. The
+            region of the current execution context is used, if one is not
+            specified.
+
+            * See also: :func:`sky.state.get_region`.
+
+        :type timeout: int
+        :param timeout: An *optional* socket timeout, in seconds. The
+            ``CONNECTION_TIMEOUT`` setting is used, if one is not specified.
+
+        :rtype: :class:`boto.connection.AWSAuthConnection`
+        :return: A boto connection.
+        """
+
+        if service not in SERVICES:
+            raise RuntimeError('Unsupported AWS service (%s).' % service)
+
+        region = None if service in GLOBAL_SERVICES else region or get_region()
+        timeout = timeout or config['CONNECTION_TIMEOUT']
+        key = (service, region, timeout, config['AWS_ACCESS_KEY_ID'],
+               hashlib.sha1((config['AWS_SECRET_ACCESS_KEY'] or '').encode('utf-8')).hexdigest())
+
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        if key not in connections:
+            connection = self.connect(service, region, timeout)
+
+            # Share the process-wide HTTP connection pool of the key, which boto locks around every check-out and check-in.
+            with self._lock:
+                connection._pool = self.pools.setdefault(key, connection._pool)
+                self.created += 1
+            connections[key] = connection
+
+        return connections[key]
+
+    def connect(self, service, region=None, timeout=None):
+        import importlib
+        import boto
+
+        description, module_name, function_name = SERVICES[service]
+        logger.debug('Connecting to the %s service%s.' % (description, ' in (%s)' % region if region else ''))
+
+        credentials = {'aws_access_key_id':     config['AWS_ACCESS_KEY_ID'],
+                       'aws_secret_access_key': config['AWS_SECRET_ACCESS_KEY']}
+        if region:
+            connection = importlib.import_module(module_name).connect_to_region(region, **credentials)
+            if connection is None:
+                raise RuntimeError('Unknown region (%s) for the %s service.' % (region, description))
+        else:
+            connection = getattr(boto, function_name)(**credentials)
+
+        if timeout:
+            connection.http_connection_kwargs['timeout'] = timeout
+        logger.debug('Connected to the %s service.' % description)
+
+        # Share the rate limit of the service in the region with every other connection to it.
+        return throttle(connection, service, region or DEFAULT_REGION)
+
+    def clear(self):
+        """
+        Forget this thread's connections, and close the HTTP connections of
+        every thread.
+        """
+
+        self._local.connections = {}
+        with self._lock:
+            pools, self.pools = self.pools, {}
+        for pool in pools.values():
+            for host_pool in pool.host_to_pool.values():
+                for http_connection, returned in host_pool.queue:
+                    http_connection.close()
+
+
+registry = ConnectionRegistry()
+
+def get_connection(service, region=None, timeout=None):
+    """
+    Get a pooled connection to an AWS service, for the current thread and credentials.
+
+    * See also: :meth:`sky.connections.ConnectionRegistry.get`.
+    """
+
+    return registry.get(service, region=region, timeout=timeout)
+
+
+def get_region_name():
+    """
+    Get the name of the current AWS region, e.g., for building ARNs.
+
+    :rtype: str
+    :return: The region of the current execution context, or boto's default
+        region if none was specified.
+    """
+
+    return get_region() or DEFAULT_REGION
+
+
+def regional(function):
+    """
+    Decorate a function that takes an optional ``region`` argument, so that
+    every AWS connection made during the call, including those made by the
+    functions that it calls, is made to that region.
+    """
+
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        region = signature.bind(*args, **kwargs).arguments.get('region')
+        if not region:
+            return function(*args, **kwargs)
+
+        token = set_region(region)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            reset_region(token)
+
+    return wrapper
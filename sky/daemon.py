@@ -0,0 +1,292 @@
+"""daemon.py: A long-running Sky process that serves deploy, plan and status commands over a Unix socket.
+
+The daemon keeps the skyfile's dependency graph, the resource store and the
+imported AWS service modules warm between commands. Commands are sent as a
+single line of JSON, in the format: ``{"command": ..., "config": {...}}``,
+and answered with a single line of JSON, in the format: ``{"output": ...}``
+or ``{"error": ...}``. Each command is run in its own deployment Context,
+built from the configuration that the client sent.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import threading
+import socketserver
+from . import cache
+from .state import deployment
+from .store import get_scope
+from .utils import get_state_path
+
+logger = logging.getLogger(__name__)
+
+SOCKET_NAME = 'sky.sock'
+
+def get_socket_path():
+    return get_state_path(SOCKET_NAME)
+
+
+def connect(socket_path, timeout=None):
+    """
+    Connect to a running daemon.
+
+    :rtype: :class:`socket.socket`
+    :return: A connected socket, or ``None`` if no daemon is listening.
+    """
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(timeout)
+    try:
+        connection.connect(socket_path)
+    except OSError as error:
+        logger.debug('Could not connect to daemon (%s): %s' % (socket_path, error))
+        connection.close()
+        return None
+
+    return connection
+
+
+class Daemon(object):
+    """
+    Serve commands against a skyfile that is loaded once, and reloaded only
+    when it, or a local module that it imports, changes.
+
+    :type path: str
+    :param path: The path of the skyfile.
+
+    :type watch: bool
+    :param watch: Specifies whether to re-plan, and log the plan, whenever the
+        skyfile changes.
+
+    :type interval: int
+    :param interval: The number of seconds between checks for changes.
+    """
+
+    def __init__(self, path='./skyfile.py', watch=False, interval=1):
+        self.path = path
+        self.watch = watch
+        self.interval = interval
+        self.loaded = None
+        self.dependencies = None
+        self.levels = None
+        self.dependency_graph = None
+        self._files = {}
+        self._lock = threading.Lock()
+        self._deploy_lock = threading.Lock()
+
+    def is_stale(self):
+        if self.dependency_graph is None:
+            return True
+
+        for path, modified in self._files.items():
+            try:
+                if os.path.getmtime(path) != modified:
+                    return True
+            except OSError:
+                return True
+
+        return False
+
+    def load(self):
+        """
+        Load the skyfile's dependency graph, if it has changed since it was last loaded.
+
+        :rtype: bool
+        :return: ``True`` if the skyfile was (re)loaded.
+        """
+
+        from .main import load_dependency_graph
+
+        with self._lock:
+            if not self.is_stale():
+                return False
+
+            # Forget local modules, so that the skyfile's imports are reloaded along with it.
+            for name, module in list(sys.modules.items()):
+                if os.path.abspath(getattr(module, '__file__', None) or '') in self._files:
+                    del sys.modules[name]
+
+            loaded_modules = set(sys.modules)
+            self.dependencies, self.levels, self.dependency_graph = load_dependency_graph(self.path, compiled=False)
+
+            # Track the files that the compiled dependency graph was built from, along with every local module that the skyfile imported.
+            compiled_graph = cache.load_graph(get_state_path('graph.json'), self.path) or {}
+            files = set(compiled_graph.get('files', [os.path.abspath(self.path)]))
+            files.update(cache.get_local_modules(sys.modules.get('skyfile'), os.path.dirname(os.path.abspath(self.path)),
+                                                 modules=[sys.modules[name] for name in set(sys.modules) - loaded_modules]))
+            self._files = {path: os.path.getmtime(path) for path in files}
+            self.loaded = time.time()
+            logger.info('Loaded skyfile (%s).' % self.path)
+
+            return True
+
+    def handle(self, command, settings):
+        """
+        Run a command.
+
+        :type command: str
+        :param command: One of ``deploy``, ``plan`` or ``status``.
+
+        :type settings: dict
+        :param settings: The client's configuration.
+
+        :rtype: str
+        :return: The command's output.
+        """
+
+        from .main import select_targets, build_target, deploy_regions, plan_target, format_plan, format_status
+
+        self.load()
+        dependencies, levels, dependency_graph = self.dependencies, self.levels, self.dependency_graph
+
+        with deployment(**settings) as context:
+            config = context.config
+            select_targets(dependencies, config['TARGETS'])
+
+            if command == 'status':
+                return 'Skyfile (%s) loaded at %s.\n%s' % (self.path,
+                                                           time.strftime('%H:%M:%S', time.localtime(self.loaded)),
+                                                           format_status(levels, environment=get_scope()))
+
+            if command == 'plan' or config['DRY_RUN']:
+                return format_plan(plan_target(dependency_graph, targets=config['TARGETS'], force=config['FORCE']))
+
+            if command == 'deploy':
+                # Deploy one command at a time, since concurrent deployments would contend for the same resources.
+                with self._deploy_lock:
+                    options = dict(targets=config['TARGETS'], jobs=config['JOBS'], engine=config['ENGINE'],
+                                   force=config['FORCE'], resume=config['RESUME'])
+                    if config['REGIONS']:
+                        deploy_regions(build_target, config['REGIONS'], dependency_graph, **options)
+                    else:
+                        build_target(dependency_graph, **options)
+                return 'Built target (%s).' % ', '.join(config['TARGETS'])
+
+        raise RuntimeError('Invalid command (%s).' % command)
+
+    def watch_skyfile(self, settings):
+        from .main import plan_target, format_plan
+
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self.load():
+                    with deployment(**settings) as context:
+                        plan = plan_target(self.dependency_graph, targets=context.config['TARGETS'])
+                    logger.info('Skyfile changed. Re-planned:\n%s' % format_plan(plan))
+            except Exception as error:
+                logger.error('Could not re-plan (%s): %s' % (self.path, error))
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                logger.info('Received (%s) command.' % request.get('command'))
+                response = {'output': self.server.daemon.handle(request.get('command'), request.get('config') or {})}
+            except Exception as error:
+                logger.error('Command failed: %s' % error)
+                response = {'error': str(error) or error.__class__.__name__}
+
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(self, path, daemon):
+        self.daemon = daemon
+        super(DaemonServer, self).__init__(path, RequestHandler)
+
+
+def serve(path='./skyfile.py', watch=False):
+    """
+    Run the daemon until it is interrupted.
+
+    :type path: str
+    :param path: The path of the skyfile.
+
+    :type watch: bool
+    :param watch: Specifies whether to re-plan whenever the skyfile changes.
+    """
+
+    from .state import config
+
+    socket_path = get_socket_path()
+
+    # Remove a socket left behind by a daemon that did not shut down cleanly.
+    if os.path.exists(socket_path):
+        connection = connect(socket_path)
+        if connection:
+            connection.close()
+            raise RuntimeError('A daemon is already running (%s).' % socket_path)
+        os.remove(socket_path)
+
+    daemon = Daemon(path, watch=watch)
+    daemon.load()
+
+    # Warm the AWS service modules, so that the first forwarded deployment does not import them.
+    from . import networking, compute, database, security
+
+    if watch:
+        threading.Thread(target=daemon.watch_skyfile, args=(dict(config),), daemon=True).start()
+
+    server = DaemonServer(socket_path, daemon)
+    print('Serving (%s) on (%s).' % (path, socket_path))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def forward(command, settings, timeout=None):
+    """
+    Send a command to a running daemon.
+
+    :type command: str
+    :param command: One of ``deploy``, ``plan`` or ``status``.
+
+    :type settings: dict
+    :param settings: The configuration to run the command with.
+
+    :rtype: str
+    :return: The command's output, or ``None`` if no daemon is running.
+
+    :raises: :class:`RuntimeError`, if the command failed.
+    """
+
+    socket_path = get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    # The creation mode is set by each Infrastructure object, and is not part of a command's configuration.
+    settings = {key: value for key, value in settings.items() if key != 'CREATION_MODE'}
+
+    connection = connect(socket_path, timeout=timeout)
+    if not connection:
+        return None
+
+    with connection, connection.makefile('rwb') as stream:
+        stream.write((json.dumps({'command': command, 'config': settings}) + '\n').encode('utf-8'))
+        stream.flush()
+        line = stream.readline()
+
+    if not line:
+        raise RuntimeError('The daemon closed the connection before responding (%s).' % socket_path)
+    response = json.loads(line.decode('utf-8'))
+
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+
+    logger.debug('Forwarded (%s) command to daemon (%s).' % (command, socket_path))
+    return response['output']
@@ -1,10 +1,12 @@
 import sys
-import time
 import logging
 import boto
 from .compute import create_security_group
 from .networking import connect_vpc
 from .state import config, mode
+from .connections import get_connection, get_region_name, regional
+from .store import record_resource
+from .poller import watch_database
 
 logger = logging.getLogger(__name__)
 
@@ -40,15 +42,11 @@ def connect_rds():
     :return: An :class:`~boto.rds.RDSConnection` object.
     """
 
-    logger.debug('Connecting to the Amazon Relational Database Service (Amazon RDS).')
-    rds = boto.connect_rds2(aws_access_key_id=config['AWS_ACCESS_KEY_ID'],
-                            aws_secret_access_key=config['AWS_SECRET_ACCESS_KEY'])
-    logger.debug('Connected to Amazon RDS.')
-    
-    return rds
+    return get_connection('rds')
 
 
-def create_db_parameter_group(name=None, engine='postgresql'):
+@regional
+def create_db_parameter_group(name=None, engine='postgresql', region=None):
     """
     Create a DB Parameter Group.
 
@@ -62,6 +60,10 @@ def create_db_parameter_group(name=None, engine='postgresql'):
 
         * Supported database engines: ``postgresql``, ``mysql``, and ``oracle``.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: dict
     :return: A dictionary containing the elements of the AWS API ``CreateDBParameterGroupResponse`` response.
     """
@@ -85,9 +87,10 @@ def create_db_parameter_group(name=None, engine='postgresql'):
     db_parameter_group = rds_connection.create_db_parameter_group(name,                                                    # db_parameter_group_name
                                                                   ENGINE[engine],                                          # db_parameter_group_family
                                                                   description=' '.join([config['PROJECT_NAME'], 'Parameter Group'])) # description
+    record_resource('db_parameter_group', name, name=name)
 
     # Construct Database Parameter Group ARN.
-    region = 'us-east-1'
+    region = get_region_name()
     db_parameter_group_arn = 'arn:aws:rds:%s:%s:pg:%s' % (region, config['AWS_ACCOUNT_ID'], name)
 
     # Tag Database Subnet Group.
@@ -101,7 +104,8 @@ def create_db_parameter_group(name=None, engine='postgresql'):
     return db_parameter_group
 
 
-def create_db_subnet_group(subnets, name=None):
+@regional
+def create_db_subnet_group(subnets, name=None, region=None):
     """
     Create a DB Subnet Group.
 
@@ -121,6 +125,10 @@ def create_db_subnet_group(subnets, name=None):
     :param name: An *optional* name for the DB Subnet Group. A name will
         be generated from the current project name, if one is not specified.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: dict
     :return: A dictionary containing the elements of the AWS API ``CreateDBSubnetGroupResponse`` response.
     """
@@ -151,8 +159,10 @@ def create_db_subnet_group(subnets, name=None):
         if error.code == 'DBSubnetGroupAlreadyExists':
             subnet = rds_connection.describe_db_subnet_groups(name)
 
+    record_resource('db_subnet_group', name, name=name, parent=subnets[-1].vpc_id)
+
     # Construct Database Subnet Group ARN.
-    region = 'us-east-1'
+    region = get_region_name()
     db_subnet_group_arn = 'arn:aws:rds:%s:%s:subgrp:%s' % (region, config['AWS_ACCOUNT_ID'], name)
 
     # Tag Database Subnet Group.
@@ -166,7 +176,8 @@ def create_db_subnet_group(subnets, name=None):
     return subnet
 
 
-def create_option_group(name=None, engine='postgresql'):
+@regional
+def create_option_group(name=None, engine='postgresql', region=None):
     """
     Create an Option Group.
 
@@ -184,6 +195,10 @@ def create_option_group(name=None, engine='postgresql'):
 
         * Supported database engines: ``postgresql``, ``mysql``, and ``oracle``.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: dict
     :return: A dictionary containing the elements of the AWS API ``CreateOptionGroupResponse`` response.
     """
@@ -204,7 +219,7 @@ def create_option_group(name=None, engine='postgresql'):
         if error.status == 404 and error.reason == 'Not Found' and error.body['Error']['Code'] == 'OptionGroupNotFoundFault':
             pass
         else:
-            raise boto.exception.JSONResponseError(error.status, error.reason, body=error.body)
+            raise
 
     # Create Option Group.
     option_group = rds_connection.create_option_group(name,                                     # option_group_name
@@ -212,9 +227,10 @@ def create_option_group(name=None, engine='postgresql'):
                                                       MAJOR_ENGINE_VERSION[engine],             # major_engine_version
                                                       ' '.join([config['PROJECT_NAME'], 'Option Group']), # option_group_description
                                                       tags=None)
+    record_resource('option_group', name, name=name)
 
     # Construct Option Group ARN.
-    region = 'us-east-1'
+    region = get_region_name()
     option_group_arn = 'arn:aws:rds:%s:%s:og:%s' % (region, config['AWS_ACCOUNT_ID'], name)
 
     # Tag Option Group.
@@ -228,7 +244,8 @@ def create_option_group(name=None, engine='postgresql'):
     return option_group
 
 
-def create_database(subnets, name=None, engine='postgresql', storage=5, application_instances=None, application_security_groups=None, security_groups=None, publicly_accessible=False, multi_az=False, db_parameter_group=None, option_group=None):
+@regional
+def create_database(subnets, name=None, engine='postgresql', storage=5, application_instances=None, application_security_groups=None, security_groups=None, publicly_accessible=False, multi_az=False, db_parameter_group=None, option_group=None, wait=True, region=None):
     """
     Create Database Instance.
 
@@ -289,6 +306,17 @@ def create_database(subnets, name=None, engine='postgresql', storage=5, applicat
     :param option_group: An *optional* Option Group that specifies
          features and configuration specific to the chosen database engine.
 
+    :type wait: bool
+    :param wait: Specifies whether to wait for the DB Instance's endpoint to
+        become available. If set to ``False``, the returned dictionary will not
+        contain an ``endpoint``.
+
+        * See also: :func:`sky.database.wait_for_database`.
+
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: dict
     :return: A dictionary containing the elements of the AWS API ``CreateDBInstanceResponse`` response.
     """
@@ -318,6 +346,7 @@ def create_database(subnets, name=None, engine='postgresql', storage=5, applicat
                                    ['Endpoint']
                 db_instance['endpoint'] = endpoint
                 logger.info('Found existing Database (%s) at (%s:%s).' % (name, endpoint['Address'], endpoint['Port']))
+                record_resource('db_instance', name, name=name, adopted=True)
                 return db_instance
         except boto.rds2.exceptions.DBInstanceNotFound as error:
             if error.code == 'DBInstanceNotFound': # The requested Database doesn't exist.
@@ -406,9 +435,10 @@ def create_database(subnets, name=None, engine='postgresql', storage=5, applicat
                                                     character_set_name=None,
                                                     publicly_accessible=publicly_accessible,
                                                     tags=None)
+    record_resource('db_instance', name, name=name)
 
     # Construct Database Instance ARN.
-    region = 'us-east-1'
+    region = get_region_name()
     database_arn = 'arn:aws:rds:%s:%s:db:%s' % (region, config['AWS_ACCOUNT_ID'], name)
 
     # Tag Database Instance.
@@ -420,22 +450,58 @@ def create_database(subnets, name=None, engine='postgresql', storage=5, applicat
     logger.debug('Tagged Amazon RDS Resource (%s).' % database_arn)
 
     # Get Database Endpoint.
-    logger.info('Getting endpoint for database (%s).' % name)
-    endpoint = None
-    while not endpoint:
-        response = rds_connection.describe_db_instances(db_instance_identifier=name,
-                                                        filters=None,
-                                                        max_records=None,
-                                                        marker=None)
-        endpoint = response['DescribeDBInstancesResponse']\
-                           ['DescribeDBInstancesResult']\
-                           ['DBInstances'][-1]\
-                           ['Endpoint']
-        if not endpoint:
-            logger.debug('Waiting for database endpoint...')
-            time.sleep(1)
-        else:
-            logger.info('Got database endpoint (%s).' % endpoint)
-    db_instance['endpoint'] = endpoint
+    if wait:
+        db_instance['endpoint'] = wait_for_database(name)
 
     return db_instance
+
+
+def wait_for_database(name, interval=1):
+    """
+    Wait for a Database Instance's endpoint to become available.
+
+    :type name: str
+    :param name: The DB Instance identifier.
+
+    :type interval: int
+    :param interval: Ignored. DB Instances are polled by a shared poller,
+        along with every other pending DB Instance.
+
+        * See also: :func:`sky.poller.watch_database`.
+
+    :rtype: dict
+    :return: The DB Instance's endpoint, containing its ``Address`` and ``Port``.
+    """
+
+    logger.info('Getting endpoint for database (%s).' % name)
+    endpoint = watch_database(name).result()['Endpoint']
+    logger.info('Got database endpoint (%s).' % endpoint)
+
+    return endpoint
+
+
+def get_database_endpoint(name):
+    """
+    Get a Database Instance's endpoint.
+
+    :type name: str
+    :param name: The DB Instance identifier.
+
+    :rtype: dict
+    :return: The DB Instance's endpoint, containing its ``Address`` and
+        ``Port``, or ``None`` if the endpoint is not available yet.
+    """
+
+    # Connect to the Amazon Relational Database Service (Amazon RDS).
+    rds_connection = connect_rds()
+
+    response = rds_connection.describe_db_instances(db_instance_identifier=name,
+                                                    filters=None,
+                                                    max_records=None,
+                                                    marker=None)
+    endpoint = response['DescribeDBInstancesResponse']\
+                       ['DescribeDBInstancesResult']\
+                       ['DBInstances'][-1]\
+                       ['Endpoint']
+
+    return endpoint
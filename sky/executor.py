@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+class ExecutionError(RuntimeError):
+
+    def __init__(self, errors, skipped=None):
+        self.errors = errors
+        self.skipped = skipped or []
+
+        message = 'Failed (%s).' % ', '.join(['%s: %s' % (name, error) for name, error in errors.items()])
+        if self.skipped:
+            message += ' Skipped (%s).' % ', '.join(self.skipped)
+        super(ExecutionError, self).__init__(message)
+
+
+def index_dependencies(names, dependencies):
+    """
+    Index the dependencies and dependents of each node in a dependency graph.
+
+    :rtype: tuple
+    :return: A tuple in the format: (``remaining``, ``dependents``), where
+        ``remaining`` maps each node name to a set of the names of the nodes that
+        it depends on and ``dependents`` maps each node name to a list of the names
+        of the nodes that depend on it.
+    """
+
+    included = set(names)
+    remaining = {name: set(dependencies.get(name) or ()) & included for name in names}
+    dependents = {name: [] for name in names}
+    for name in names:
+        for dependency in remaining[name]:
+            dependents[dependency].append(name)
+
+    return remaining, dependents
+
+
+def execute(names, dependencies, action, jobs=1):
+    """
+    Execute a dependency graph on a bounded pool of worker threads.
+
+    Each node is started as soon as all of the nodes that it depends on have
+    finished. Once a node fails, no further nodes are started; nodes that are
+    already running are allowed to finish.
+
+    :type names: list
+    :param names: The names of the nodes to execute, in a topological order.
+        Nodes that are ready at the same time are started in this order.
+
+    :type dependencies: dict
+    :param dependencies: A mapping of each node name to the names of the nodes
+        that it depends on. Names that are not in ``names`` are ignored.
+
+    :type action: callable
+    :param action: A callable that is invoked with each node name.
+
+    :type jobs: int
+    :param jobs: The maximum number of nodes to execute at once.
+
+    :rtype: list
+    :return: The names of the nodes that were executed, in completion order.
+
+    :raises: :class:`sky.executor.ExecutionError`, if any node failed.
+    """
+
+    remaining, dependents = index_dependencies(names, dependencies)
+
+    queue = [name for name in names if not remaining[name]]
+    running = {}
+    completed = []
+    errors = {}
+
+    jobs = max(1, jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        try:
+            while queue or running:
+                # Start nodes whose dependencies have been satisfied, unless a node has failed.
+                while queue and not errors and len(running) < jobs:
+                    name = queue.pop(0)
+                    logger.debug('Starting (%s).' % name)
+
+                    # Run each node in its own copy of the current context, so that the deployment Context is
+                    # inherited and context-local state (e.g., the creation mode) set by one node does not leak.
+                    context = contextvars.copy_context()
+                    running[pool.submit(context.run, action, name)] = name
+
+                if not running:
+                    break
+
+                # Wait for at least one running node to finish.
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException as error:
+                        logger.error('(%s) failed: %s' % (name, error))
+                        errors[name] = error
+                        continue
+
+                    logger.debug('Finished (%s).' % name)
+                    completed.append(name)
+
+                    # Release the dependents of the finished node.
+                    for dependent in dependents[name]:
+                        remaining[dependent].discard(name)
+                        if not remaining[dependent]:
+                            queue.append(dependent)
+        except BaseException:
+            # Cancel nodes that have not started yet, e.g., on KeyboardInterrupt.
+            for future in running:
+                future.cancel()
+            raise
+
+    if errors:
+        skipped = [name for name in names if name not in completed and name not in errors]
+        raise ExecutionError(errors, skipped)
+
+    return completed
+
+
+async def execute_async(names, dependencies, action, jobs=1):
+    """
+    Execute a dependency graph on an asyncio event loop.
+
+    This is the asyncio counterpart of :func:`sky.executor.execute`. Each node
+    runs as a task, so that nodes waiting on AWS do not occupy a thread.
+
+    :type action: callable
+    :param action: A coroutine function that is invoked with each node name.
+
+    :type jobs: int
+    :param jobs: The maximum number of nodes to execute at once.
+
+    :rtype: list
+    :return: The names of the nodes that were executed, in completion order.
+
+    :raises: :class:`sky.executor.ExecutionError`, if any node failed.
+    """
+
+    remaining, dependents = index_dependencies(names, dependencies)
+
+    queue = [name for name in names if not remaining[name]]
+    running = {}
+    completed = []
+    errors = {}
+
+    jobs = max(1, jobs)
+    try:
+        while queue or running:
+            # Start nodes whose dependencies have been satisfied, unless a node has failed.
+            while queue and not errors and len(running) < jobs:
+                name = queue.pop(0)
+                logger.debug('Starting (%s).' % name)
+                running[asyncio.ensure_future(action(name))] = name
+
+            if not running:
+                break
+
+            # Wait for at least one running node to finish.
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+                if error:
+                    logger.error('(%s) failed: %s' % (name, error))
+                    errors[name] = error
+                    continue
+
+                logger.debug('Finished (%s).' % name)
+                completed.append(name)
+
+                # Release the dependents of the finished node.
+                for dependent in dependents[name]:
+                    remaining[dependent].discard(name)
+                    if not remaining[dependent]:
+                        queue.append(dependent)
+    except BaseException:
+        # Cancel running nodes, e.g., when the event loop is interrupted.
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        raise
+
+    if errors:
+        skipped = [name for name in names if name not in completed and name not in errors]
+        raise ExecutionError(errors, skipped)
+
+    return completed
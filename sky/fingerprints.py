@@ -0,0 +1,65 @@
+"""fingerprints.py: Fingerprint Infrastructure objects, so that unchanged objects can be reused between deployments."""
+
+import json
+import hashlib
+import logging
+from .state import mode
+
+logger = logging.getLogger(__name__)
+
+# Configuration values that change what an Infrastructure object creates. Credentials and the account are excluded, so
+# that an offline plan, which needs no credentials, computes the same fingerprints as a deployment.
+FINGERPRINT_CONFIG = ['PROJECT_NAME', 'ENVIRONMENT']
+
+def get_fingerprint(node, config, dependency_fingerprints):
+    """
+    Fingerprint an Infrastructure object.
+
+    :type node: :class:`sky.infrastructure.Infrastructure`
+    :param node: The Infrastructure object.
+
+    :type config: dict
+    :param config: The deployment configuration.
+
+    :type dependency_fingerprints: dict
+    :param dependency_fingerprints: The fingerprints of the nodes that the
+        Infrastructure object requires, by name.
+
+    :rtype: str
+    :return: A SHA-1 hex digest of the function's source code, its
+        decorator arguments, the relevant configuration values and the
+        fingerprints of the nodes that it requires.
+    """
+
+    fingerprint = {
+        'source': node.source,
+        'category': mode(node.category).name if node.category else None,
+        'environment': node.environment,
+        'exports': sorted(node.exports),
+        'config': {key: config.get(key) for key in FINGERPRINT_CONFIG},
+        'requires': {name: dependency_fingerprints[name] for name in sorted(node.dependencies or ())},
+    }
+
+    return hashlib.sha1(json.dumps(fingerprint, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+
+def get_fingerprints(nodes, names, config):
+    """
+    Fingerprint the nodes of a dependency graph.
+
+    :type nodes: dict
+    :param nodes: A mapping of node names to Infrastructure objects.
+
+    :type names: list
+    :param names: The names of the nodes, in a topological order.
+
+    :rtype: dict
+    :return: A mapping of node names to fingerprints.
+    """
+
+    fingerprints = {}
+    for name in names:
+        fingerprints[name] = get_fingerprint(nodes[name], config, fingerprints)
+
+    return fingerprints
+
@@ -0,0 +1,163 @@
+"""graph.py: Forward and reverse indexes of a dependency graph, for selecting targets."""
+
+import logging
+from fnmatch import fnmatchcase
+
+logger = logging.getLogger(__name__)
+
+class Graph(object):
+    """
+    A dependency graph, indexed by node name in both directions.
+
+    :type dependencies: dict
+    :param dependencies: A mapping of each node name to the names of the nodes
+        that it requires.
+
+        * See also: :func:`sky.main.get_dependencies`.
+    """
+
+    def __init__(self, dependencies):
+        self.dependencies = {name: set(required or ()) for name, required in dependencies.items()}
+        self.dependents = {name: set() for name in self.dependencies}
+        for name, required in self.dependencies.items():
+            for dependency in required:
+                self.dependents[dependency].add(name)
+
+    def ancestors(self, names):
+        """
+        Get nodes along with every node that they require, directly or indirectly.
+
+        :rtype: set
+        """
+
+        return self._closure(names, self.dependencies)
+
+    def descendants(self, names):
+        """
+        Get nodes along with every node that requires them, directly or indirectly.
+
+        :rtype: set
+        """
+
+        return self._closure(names, self.dependents)
+
+    def match(self, pattern):
+        """
+        Get the names of the nodes that match a name or a glob, e.g., ``app-*``.
+
+        :rtype: set
+
+        :raises: :class:`RuntimeError`, if no node matches.
+        """
+
+        if pattern in self.dependencies:
+            return {pattern}
+
+        matched = {name for name in self.dependencies if fnmatchcase(name, pattern)}
+        if not matched:
+            raise RuntimeError('Unknown target(s) (%s).' % pattern)
+        return matched
+
+    def select(self, targets):
+        """
+        Select the nodes needed to build one or more targets.
+
+        Each target is a node name or a glob, optionally in the format:
+
+        * ``name+``: the node and every node downstream of it.
+        * ``!name``: exclude the node and every node downstream of it, since
+          they can not be built without it.
+
+        ``all`` selects every node, as does a list of targets that only
+        contains exclusions. The selected nodes are returned along with every
+        node that they require.
+
+        :rtype: set
+        :return: The names of the selected nodes.
+
+        :raises: :class:`RuntimeError`, if a target does not match any node, or
+            if a node that was named as a target requires an excluded node.
+        """
+
+        included = set()
+        named = set()
+        excluded = set()
+        for target in targets:
+            if target.startswith('!'):
+                excluded |= self.match(target[1:])
+            elif target == 'all':
+                included |= set(self.dependencies)
+            elif target.endswith('+'):
+                matched = self.match(target[:-1])
+                named |= matched
+                included |= self.descendants(matched)
+            else:
+                matched = self.match(target)
+                named |= matched
+                included |= matched
+
+        if not included and excluded:
+            included = set(self.dependencies)
+
+        # Select the targets along with their direct and indirect dependencies, then drop any exclusions.
+        selected = self.ancestors(included)
+        if excluded:
+            dropped = self.descendants(excluded) & selected
+            conflicts = (dropped & named) - excluded
+            if conflicts:
+                raise RuntimeError('Can not build target(s) (%s) without excluded node(s) (%s).' % \
+                                   (', '.join(sorted(conflicts)), ', '.join(sorted(excluded))))
+            logger.debug('Excluded (%s).' % ', '.join(sorted(dropped)))
+            selected -= dropped
+
+        return selected
+
+    def select_teardown(self, targets):
+        """
+        Select the nodes to destroy in order to tear down one or more targets.
+
+        This is the reverse of :meth:`select`. Each target is a node name or a
+        glob, optionally in the format ``!name``, which keeps the node and
+        every node that it requires. The selected nodes are returned along with
+        every node that requires them, since a node can not be destroyed while
+        other nodes are built on it. ``name+`` is accepted, and is the same as
+        ``name``.
+
+        :rtype: set
+        :return: The names of the selected nodes.
+
+        :raises: :class:`RuntimeError`, if a target does not match any node.
+        """
+
+        included = set()
+        kept = set()
+        for target in targets:
+            if target.startswith('!'):
+                kept |= self.match(target[1:])
+            elif target == 'all':
+                included |= set(self.dependencies)
+            else:
+                included |= self.match(target[:-1] if target.endswith('+') else target)
+
+        if not included and kept:
+            included = set(self.dependencies)
+
+        # Select the targets along with every node built on them, then drop the nodes that kept nodes require.
+        selected = self.descendants(included)
+        if kept:
+            dropped = self.ancestors(kept) & selected
+            logger.debug('Kept (%s).' % ', '.join(sorted(dropped)))
+            selected -= dropped
+
+        return selected
+
+    def _closure(self, names, index):
+        closure = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in closure:
+                closure.add(name)
+                pending.extend(index[name])
+
+        return closure
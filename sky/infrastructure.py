@@ -1,24 +1,43 @@
 import sys
+import asyncio
+import inspect
 import logging
-from .state import config, mode
+import functools
+import contextvars
+from .planner import Placeholder
+from .state import config, mode, get_context, set_creation_mode, reset_creation_mode, set_current_node, reset_current_node
 
 logger = logging.getLogger(__name__)
 
+def is_resource(value):
+    """
+    Determine whether a value is an AWS resource, or a collection of AWS resources.
+
+    :rtype: bool
+    :return: ``True`` for boto objects, for dictionaries (services such as RDS
+        return JSON responses), for planned resources, and for non-empty lists,
+        tuples and sets of them.
+    """
+
+    if isinstance(value, (dict, Placeholder)):
+        return True
+    if isinstance(value, (list, tuple, set)):
+        return bool(value) and all(is_resource(item) for item in value)
+    return type(value).__module__.split('.')[0] == 'boto'
+
+
 class Infrastructure(object):
 
-    _wrapped = None
-    _dependencies = None
-    _category = None
-    _original_creation_mode = None
-    _locals = None
-    _result = None
+    __slots__ = ('__name__', '_wrapped', '_code', '_dependencies', '_category', '_exports', 'environment')
 
     def __init__(self, callable_, *args, **kwargs):
         self.__name__ = callable_.__name__ if hasattr(callable_, '__name__') else 'undefined'
-        self.__doc__ = callable_.__doc__ if hasattr(callable_, '__doc__') else None
-        self.__module__ = callable_.__module__ if hasattr(callable_, '__module__') else None
 
         self._wrapped = callable_
+        self._code = getattr(inspect.unwrap(callable_), '__code__', None)
+        self._dependencies = None
+        self._category = None
+        self._exports = frozenset(kwargs.get('exports', None) or ())
         self.environment = kwargs.get('environment', None)
         self.dependencies = kwargs.get('requires', None)
 
@@ -27,45 +46,125 @@ class Infrastructure(object):
 
     def __call__(self, *args, **kwargs):
 
-        # Set the creation mode, if the object specifies one.
-        self._set_creation_mode()
+        # Run coroutine functions to completion on a new event loop.
+        if self.is_coroutine:
+            return asyncio.run(self.call_async(*args, **kwargs))
+
+        # Set the current node, and the creation mode, if the object specifies one.
+        token = self._set_creation_mode()
+        node_token = set_current_node(self.__name__)
+
+        # Define a tracer that captures the wrapped function's frame on entry, then removes itself, so that the function
+        # body, and everything that it calls, runs untraced.
+        frames = []
+        previous_tracer = sys.gettrace()
+        def tracer(frame, event, arg):
+            if event == 'call' and frame.f_code is self._code:
+                frames.append(frame)
+                sys.settrace(previous_tracer)
+            return previous_tracer(frame, event, arg) if previous_tracer else None
+
+        # Activate the tracer on the next call.
+        sys.settrace(tracer)
+        try:
+            # Call the wrapped function.
+            result = self._wrapped(*args, **kwargs)
+        finally:
+            # Deactivate the tracer, if the wrapped function was never entered.
+            if not frames:
+                sys.settrace(previous_tracer)
+
+            # Reset the current node, and the creation mode, if the object specifies one.
+            reset_current_node(node_token)
+            self._reset_creation_mode(token)
 
-        # Define a source code profiler.
-        def profiler(frame, event, arg):
-            if event == 'return':
-                self._locals = frame.f_locals.copy()
+        # Store the captured resources in the current deployment, rather than on the shared Infrastructure object.
+        self._store(frames[0].f_locals if frames else {}, result)
+
+        return result
+
+    async def call_async(self, *args, **kwargs):
+
+        # Call synchronous functions on the event loop's default executor, in a copy of the current context.
+        if not self.is_coroutine:
+            loop = asyncio.get_event_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(None, functools.partial(context.run, self, *args, **kwargs))
+
+        # Set the current node, and the creation mode, if the object specifies one.
+        token = self._set_creation_mode()
+        node_token = set_current_node(self.__name__)
 
-        # Activate the profiler on the next call, return or exception.
-        sys.setprofile(profiler)
         try:
-            # Trace the function call.
-            self._result = self._wrapped(*args, **kwargs)
+            # Keep a reference to the coroutine's frame, so that its locals remain available once it has returned.
+            coroutine = self._wrapped(*args, **kwargs)
+            frame = coroutine.cr_frame
+            result = await coroutine
         finally:
-            # Disable the source code profiler.
-            sys.setprofile(None)
+            # Reset the current node, and the creation mode, if the object specifies one.
+            reset_current_node(node_token)
+            self._reset_creation_mode(token)
 
-        # Reset the creation mode, if the object specifies one.
-        self._reset_creation_mode()
+        self._store(frame.f_locals, result)
 
-        return self._result
+        return result
 
     def __getattr__(self, attr):
-        return self._locals[attr] if self._locals else super(Infrastructure, self).__getattr__()
+        resources = self.resources
+        if resources and attr in resources:
+            return resources[attr]
+        raise AttributeError('%r has no attribute %r' % (self, attr))
+
+    def restore(self, resources, result=None):
+        """
+        Make previously built resources available in the current deployment, without calling the wrapped function.
+
+        :type resources: dict
+        :param resources: The resources, by local variable name.
+
+        :type result: object
+        :param result: The wrapped function's return value.
+        """
+
+        context = get_context()
+        context.resources[self] = resources
+        context.results[self] = result
+
+    def _store(self, local_variables, result):
+        # Keep only AWS resources and explicitly exported variables, so that temporary values are not retained.
+        resources = {name: value for name, value in local_variables.items() \
+                     if name in self._exports or is_resource(value)}
+
+        self.restore(resources, result)
 
     def _set_creation_mode(self):
-        global config
         if self.category:
-            self._original_creation_mode = config['CREATION_MODE']
-            config['CREATION_MODE'] = self.category
             logger.debug('Set CREATION_MODE to \'%s\'.' % mode(self.category).name.title())
+            return set_creation_mode(self.category)
 
-    def _reset_creation_mode(self):
-        global config
-        if self.category:
-            config['CREATION_MODE'] = self._original_creation_mode
-            logger.debug('Set CREATION_MODE to \'%s\'.' % (self._original_creation_mode.title() \
-                                                           if isinstance(self._original_creation_mode, str) \
-                                                           else self._original_creation_mode))
+    def _reset_creation_mode(self, token):
+        if token:
+            reset_creation_mode(token)
+            logger.debug('Set CREATION_MODE to \'%s\'.' % (config['CREATION_MODE'].name.title() \
+                                                           if config['CREATION_MODE'] \
+                                                           else config['CREATION_MODE']))
+
+    @property
+    def __doc__(self):
+        return getattr(self._wrapped, '__doc__', None)
+
+    @property
+    def source(self):
+        function = inspect.unwrap(self._wrapped)
+        try:
+            return inspect.getsource(function)
+        except (OSError, TypeError):
+            # Fall back to the compiled code, e.g., for functions that were defined interactively.
+            return repr((self._code.co_code, self._code.co_consts)) if self._code else repr(function)
+
+    @property
+    def exports(self):
+        return self._exports
 
     @property
     def dependencies(self):
@@ -77,6 +176,10 @@ class Infrastructure(object):
             self._dependencies = set(dependencies)
             logger.debug('Set (%s) dependencies to (%s).' % (self, ', '.join(list(dependencies))))
 
+    @property
+    def is_coroutine(self):
+        return inspect.iscoroutinefunction(inspect.unwrap(self._wrapped))
+
     @property
     def category(self):
         return self._category
@@ -88,8 +191,8 @@ class Infrastructure(object):
 
     @property
     def resources(self):
-        return self._locals
+        return get_context().resources.get(self)
 
     @property
     def result(self):
-        return self._result
+        return get_context().results.get(self)
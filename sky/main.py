@@ -5,12 +5,21 @@
 import os
 import sys
 import types
+import asyncio
 import logging
 import importlib
-from copy import deepcopy
-from .utils import parse_arguments
+from . import aio
+from . import cache
+from .utils import DAEMON_COMMANDS, parse_arguments, get_state_path
 from .infrastructure import Infrastructure
-from .state import ready, config
+from .executor import execute, execute_async
+from .graph import Graph
+from .fingerprints import get_fingerprints
+from .resources import serialize, rehydrate, get_resource_ids, verify_resources
+from .planner import Plan, load_placeholders
+from .store import get_store, get_scope
+from .teardown import destroy_node
+from .state import ready, config, mode, get_context, deployment
 
 __author__ = 'Jared Contrascere'
 __copyright__ = 'Copyright 2015, LibreTees, LLC. All rights reserved.'
@@ -26,10 +35,16 @@ def load_skyfile(path='./skyfile.py', module_name='skyfile'):
 
     return module
 
-def load_infrastructure(module):
+def load_infrastructure(module, visited=None):
 
     infrastructure_objects = []
 
+    # Visit each module once, since modules may import each other (e.g., os and os.path).
+    visited = visited if visited is not None else set()
+    if id(module) in visited:
+        return infrastructure_objects
+    visited.add(id(module))
+
     imported_symbols = vars(module)
 
     if '__all__' in imported_symbols:
@@ -46,133 +61,439 @@ def load_infrastructure(module):
             infrastructure_objects.append(obj)
         elif isinstance(obj, types.ModuleType):
             logger.debug('(%s) module imported from the (%s) module.' % (name, module.__name__))
-            infrastructure_objects += load_infrastructure(obj)
+            infrastructure_objects += load_infrastructure(obj, visited)
 
     return infrastructure_objects
 
-def build_dependency_graph(nodes, level=1):
-    # Create an empty graph.
-    graph = []
-
-    # Create a copy of the nodes list to work with.
-    _nodes = deepcopy(nodes)
-
-    # Store the length of the nodes list, so that circular dependencies can be detected.
-    original_count = len(_nodes)
-
-    # Determine independent nodes.
-    independent_nodes = [node for node in _nodes if not node.dependencies]
-
-    if independent_nodes:
-        # Remove independent nodes from the search space.
-        for independent_node in independent_nodes:
-            _nodes.remove(independent_node)
-            logger.debug('(%s) is ready.' % independent_node.__name__)
-
-        # Prune independent node from all node dependencies.
-        for name, dependencies in [(node.__name__, node.dependencies) for node in _nodes if node.dependencies]:
-            logger.debug('(%s) required: (%s).' % (name, ', '.join(list(dependencies))))
-            resolved_dependencies = {independent_node.__name__ for independent_node in independent_nodes}
-            dependencies.difference_update(resolved_dependencies)
-            logger.debug('(%s) now requires: (%s).' % (name, ', '.join(list(dependencies))))
-
-        # Repeat search for newly-independent nodes, if any are left.
-        if _nodes:
-            graph = build_dependency_graph(_nodes, level=level+1)
+def build_dependency_graph(nodes):
+    # Index nodes by name.
+    nodes_by_name = {}
+    for node in nodes:
+        nodes_by_name[node.__name__] = node
+
+    # Count unresolved dependencies and record the dependents of each node.
+    unresolved = {}
+    dependents = {name: [] for name in nodes_by_name}
+    for name, node in nodes_by_name.items():
+        dependencies = node.dependencies or set()
+        for dependency in dependencies:
+            if dependency not in nodes_by_name:
+                raise RuntimeError('(%s) requires undefined infrastructure (%s).' % (name, dependency))
+            dependents[dependency].append(name)
+        unresolved[name] = len(dependencies)
+        logger.debug('(%s) requires: (%s).' % (name, ', '.join(sorted(dependencies))))
 
-        # Build graph from the independent nodes to the most-dependent nodes.
-        graph.insert(0, independent_nodes)
+    # Build graph from the independent nodes to the most-dependent nodes, one level at a time.
+    graph = []
+    level = [node for node in nodes_by_name.values() if not unresolved[node.__name__]]
+    while level:
+        graph.append(level)
+        next_level = []
+        for node in level:
+            logger.debug('(%s) is ready.' % node.__name__)
+            for dependent in dependents[node.__name__]:
+                unresolved[dependent] -= 1
+                if not unresolved[dependent]:
+                    next_level.append(nodes_by_name[dependent])
+        level = next_level
 
     # Check for circular dependencies.
-    count = 0
-    for depth in graph:
-        for breadth in depth:
-            count += 1
-    if original_count != count:
-        raise RuntimeError('Circular dependencies detected.')
-
-    # Restore node dependencies following graph creation, since the recursive algorithm is destructive.
-    if _nodes and level == 1:
-        for dependencies in graph:
-            for dependency in dependencies:
-                dependency.dependencies = next(node.dependencies for node in nodes if node.__name__ == dependency.__name__)
+    remaining = [name for name in nodes_by_name if unresolved[name]]
+    if remaining:
+        raise RuntimeError('Circular dependencies detected (%s).' % ' -> '.join(find_cycle(nodes_by_name, remaining)))
 
     return graph
 
-def build_target(dependency_graph, target='all'):
-
-    # Rebuild the dependency graph, if a specific target was specified.
-    if target != 'all':
-        target_found = False
-        target_dependencies = set()
-        temporary_graph = []
-
-        # Search the complete dependency graph for the target node.
-        for dependencies in dependency_graph:
-            # Add the current dependency group to the temporary graph.
-            temporary_graph.append(dependencies)
-
-            # Search each dependency in the dependency group.
-            for dependency in dependencies:
-
-                # Locate the target node.
-                if dependency.__name__ == target:
-                    # Truncate the most-recently added dependency group to the target node.
-                    temporary_graph[-1] = [dependency]
-
-                    # Store the target's dependencies so that they are not pruned.
-                    target_dependencies = dependency.dependencies
-                    logger.debug('Target dependencies are (%s).' % target_dependencies)
-
-                    # Stop traversing the dependency graph (inner loop) when the target node has been located.
-                    target_found = True
-                    break
-
-            # Stop traversing the dependency graph (outer loop) when the target node has been located.
-            if target_found:
-
-                # Traverse through the temporary graph backwards, if the target is not an independent node.
-                if target_dependencies:
-
-                    logger.debug('Pruning (%s).' % temporary_graph)
-                    for dependencies in reversed(temporary_graph):
-                        for dependency in reversed(dependencies):
-
-                            # Prune nodes that are not part of the target's dependency chain.
-                            if dependency.__name__ not in target_dependencies and dependency.__name__ != target:
-                                logger.debug('Pruning unneeded node (%s).' % dependency.__name__)
-                                dependencies.remove(dependency)
-                                logger.debug('Pruned unneeded node (%s).' % dependency.__name__)
-    
-                            # Add indirect dependencies to the target's dependency chain.
-                            elif dependency.__name__ in target_dependencies and dependency.dependencies:
-                                logger.debug('Unioning additional dependency(ies) (%s).' % dependency.dependencies)
-                                target_dependencies |= dependency.dependencies
-                                logger.debug('Unioned additional dependency(ies) (%s).' % dependency.dependencies)
-
-                # Reset the dependency graph.
-                dependency_graph = temporary_graph
-                break
+def find_cycle(nodes_by_name, names):
+    # Every unresolved node requires at least one other unresolved node, so following them must revisit a node.
+    names = set(names)
+    path = []
+    position = {}
+    name = min(names)
+    while name not in position:
+        position[name] = len(path)
+        path.append(name)
+        name = min(dependency for dependency in nodes_by_name[name].dependencies if dependency in names)
+
+    return path[position[name]:] + [name]
+
+def get_dependencies(dependency_graph):
+    return {dependency.__name__: dependency.dependencies or set() \
+            for dependencies in dependency_graph for dependency in dependencies}
+
+def select_targets(dependencies, targets):
+    # Select the targets along with their direct and indirect dependencies, with the graph indexed in both directions.
+    return Graph(dependencies).select(targets)
+
+def prune_graph(dependency_graph, targets):
+    # Prune the dependency graph to the nodes that are needed by any of the targets, so that each node is built once.
+    selected = select_targets(get_dependencies(dependency_graph), targets)
+    logger.debug('Selected (%s) for target(s) (%s).' % (', '.join(sorted(selected)), ', '.join(targets)))
+    dependency_graph = [[dependency for dependency in dependencies if dependency.__name__ in selected] \
+                        for dependencies in dependency_graph]
+    return [dependencies for dependencies in dependency_graph if dependencies]
+
+def is_reusable(node, record, fingerprint, reused, force=False):
+    # Ephemeral infrastructure is recreated on every deployment.
+    if force or not node.category or mode(node.category) == mode.EPHEMERAL:
+        return False
+
+    # Reuse a node only if it, and every node that it requires, is unchanged since the last deployment.
+    if not record or record['fingerprint'] != fingerprint:
+        return False
+    return all(dependency in reused for dependency in node.dependencies or ())
+
+def build_target(dependency_graph, targets='all', jobs=1, engine='threads', force=False, resume=False):
+    if isinstance(targets, str):
+        targets = [targets]
+    target = ', '.join(targets)
+
+    dependency_graph = prune_graph(dependency_graph, targets)
+    nodes = {dependency.__name__: dependency for dependencies in dependency_graph for dependency in dependencies}
+    names = [dependency.__name__ for dependencies in dependency_graph for dependency in dependencies]
+
+    # Fingerprint each node, so that nodes that have not changed since the last deployment can be reused.
+    fingerprints = get_fingerprints(nodes, names, config)
+    store = get_store()
+    reused = set()
+
+    # Journal each completed node, so that a failed deployment can be resumed from the point of failure.
+    journal = store.get_journal(environment=get_scope()) if resume else {}
+    if not resume:
+        store.clear_journal(environment=get_scope())
+
+    def restore_node(name, serialized):
+        # Ensure that the node's AWS resources still exist.
+        outputs = rehydrate(serialized)
+        if outputs is None:
+            return False
+
+        # Also ensure that the resources that the node recorded still exist, since its outputs may not identify them (e.g., RDS responses).
+        if not verify_resources(store.get_resources(environment=get_scope(), node=name), verified=get_resource_ids(serialized)):
+            return False
+
+        nodes[name].restore(outputs['resources'], outputs['result'])
+        return True
+
+    def resume_node(name):
+        entry = journal.get(name)
+        if not entry or entry['fingerprint'] != fingerprints[name]:
+            return False
+
+        # Rebuild a node whose outputs could not be journaled, since the nodes that require it need its outputs.
+        if entry['outputs'] is None:
+            logger.warning('Rebuilding (%s), since its outputs could not be journaled.' % name)
+            return False
+
+        if not restore_node(name, entry['outputs']):
+            return False
+
+        logger.info('Resumed (%s) from the journal.' % name)
+        return True
+
+    def reuse_node(name):
+        if resume_node(name):
+            return True
+
+        node = nodes[name]
+        record = store.get_node(name, environment=get_scope())
+        if not is_reusable(node, record, fingerprints[name], reused, force=force):
+            return False
+
+        if not restore_node(name, record['outputs']):
+            return False
+
+        reused.add(name)
+        logger.info('Reused (%s) from the last deployment.' % name)
+        return True
+
+    def record_node(name):
+        node = nodes[name]
+        try:
+            outputs = serialize({'resources': node.resources, 'result': node.result})
+        except TypeError as error:
+            logger.warning('Could not record the outputs of (%s), so it can not be reused or resumed: %s' % (name, error))
+            store.forget_node(name, environment=get_scope())
+
+            # Journal that the node completed without outputs, so that resuming the deployment rebuilds it knowingly.
+            store.journal_node(name, fingerprints[name], None, environment=get_scope())
+            return
+
+        store.journal_node(name, fingerprints[name], outputs, environment=get_scope())
+        if node.category and mode(node.category) != mode.EPHEMERAL:
+            store.record_node(name, fingerprints[name], outputs, environment=get_scope())
 
     # Build the target node.
     logger.info('Buliding target (%s) from dependency graph (%s).', target, dependency_graph)
-    for dependencies in dependency_graph:
-        for dependency in dependencies:
-            dependency()
-            ready[dependency.__name__] = dependency
-
+    if engine == 'asyncio':
+        # Run each node as a task, so that async def nodes share a single thread.
+        async def build_node_async(name):
+            if not await aio.run(reuse_node, name):
+                await nodes[name].call_async()
+                record_node(name)
+            ready[name] = nodes[name]
+
+        asyncio.run(execute_async(names, get_dependencies(dependency_graph), build_node_async, jobs=jobs))
+    else:
+        def build_node(name):
+            if not reuse_node(name):
+                nodes[name]()
+                record_node(name)
+            ready[name] = nodes[name]
+
+        if jobs > 1:
+            # Start each node as soon as its dependencies have been built.
+            execute(names, get_dependencies(dependency_graph), build_node, jobs=jobs)
+        else:
+            for name in names:
+                build_node(name)
+
+    # The deployment is complete, so there is nothing left to resume.
+    store.clear_journal(environment=get_scope())
     logger.info('Built target (%s).' % target)
 
+def deploy_regions(function, regions, *args, **kwargs):
+    """
+    Run a deployment function, e.g., :func:`sky.main.build_target`, in several
+    AWS regions concurrently.
+
+    Each region is deployed in its own deployment Context, with its own
+    ``REGION`` setting, so that the regions share no resources or state.
+
+    :type regions: list
+    :param regions: Region names, e.g., ``['us-east-1', 'eu-west-1']``.
+
+    :rtype: dict
+    :return: The function's return value in each region.
+
+    :raises: :class:`sky.executor.ExecutionError`, if any region failed.
+    """
+
+    settings = dict(get_context().config)
+    results = {}
+
+    def deploy_region(region):
+        with deployment(**dict(settings, REGION=region, REGIONS=[])):
+            logger.info('Deploying to region (%s).' % region)
+            results[region] = function(*args, **kwargs)
+            logger.info('Deployed to region (%s).' % region)
+
+    execute(regions, {}, deploy_region, jobs=len(regions))
+
+    return results
+
+def plan_target(dependency_graph, targets='all', force=False):
+    """
+    Plan the deployment of one or more targets, without calling AWS.
+
+    Each node is walked in order against a snapshot of the resource store.
+    Nodes that would be reused are restored with placeholders for their
+    recorded resources. Other nodes are called, with the ``sky.api`` and
+    ``sky.aio`` functions answering from the snapshot.
+
+    :rtype: :class:`sky.planner.Plan`
+    :return: The planned actions.
+    """
+
+    if isinstance(targets, str):
+        targets = [targets]
+
+    dependency_graph = prune_graph(dependency_graph, targets)
+    nodes = {dependency.__name__: dependency for dependencies in dependency_graph for dependency in dependencies}
+    names = [dependency.__name__ for dependencies in dependency_graph for dependency in dependencies]
+
+    fingerprints = get_fingerprints(nodes, names, config)
+    store = get_store()
+    plan = Plan(store.get_resources(environment=get_scope()))
+    reused = set()
+
+    # Plan in a separate deployment Context, so that placeholders never reach a real deployment.
+    with deployment(**get_context().config) as context:
+        context.plan = plan
+        for name in names:
+            node = nodes[name]
+            record = store.get_node(name, environment=get_scope())
+            if is_reusable(node, record, fingerprints[name], reused, force=force):
+                outputs = load_placeholders(record['outputs'])
+                node.restore(outputs['resources'], outputs['result'])
+                reused.add(name)
+                plan.add(name, 'reuse', 'unchanged since the last deployment')
+            else:
+                node()
+            ready[name] = node
+
+    plan.nodes = names
+    return plan
+
+def destroy_target(dependency_graph, targets='all', jobs=1, force=False):
+    """
+    Destroy one or more targets, by deleting the AWS resources that each
+    Infrastructure object recorded in the resource store.
+
+    The dependency graph is walked in reverse, so that each node is destroyed
+    only after every node that requires it, and independent nodes are
+    destroyed in parallel. PERMANENT nodes, and the nodes that they require,
+    are kept unless ``force`` is set, as are adopted resources.
+
+    :rtype: list
+    :return: The names of the destroyed nodes.
+    """
+
+    if isinstance(targets, str):
+        targets = [targets]
+    target = ', '.join(targets)
+
+    graph = Graph(get_dependencies(dependency_graph))
+    selected = graph.select_teardown(targets)
+
+    # Keep permanent infrastructure, along with the infrastructure that it is built on.
+    nodes = {dependency.__name__: dependency for dependencies in dependency_graph for dependency in dependencies}
+    permanent = {name for name in selected if nodes[name].category and mode(nodes[name].category) == mode.PERMANENT}
+    if permanent and not force:
+        kept = graph.ancestors(permanent) & selected
+        logger.warning('Keeping permanent infrastructure (%s). Use --force to destroy it.' % ', '.join(sorted(kept)))
+        selected -= kept
+
+    # Destroy the most-dependent nodes first.
+    names = [name for level in reversed(dependency_graph) for name in sorted(node.__name__ for node in level) if name in selected]
+    logger.info('Destroying target (%s): (%s).' % (target, ', '.join(names)))
+
+    destroyed = execute(names, graph.dependents, lambda name: destroy_node(name, environment=get_scope(), force=force), jobs=jobs)
+    logger.info('Destroyed target (%s).' % target)
+
+    return destroyed
+
+def format_plan(plan):
+    actions = {}
+    for node, action, description in plan.actions:
+        actions.setdefault(node, []).append((action, description))
+
+    lines = []
+    for name in plan.nodes:
+        lines.append(name)
+        for action, description in actions.get(name, [('run', 'no AWS resources')]):
+            lines.append('  %-9s %s' % (action, description))
+
+    counts = [sum(1 for _, action, _ in plan.actions if action == planned) for planned in ['create', 'reuse']]
+    lines.append('Plan: %d to create, %d to reuse.' % tuple(counts))
+
+    return '\n'.join(lines)
+
+def print_plan(plan):
+    print(format_plan(plan))
+
+def format_status(levels, environment=None):
+    # Count the recorded resources of each node.
+    counts = {}
+    for resource in get_store().get_resources(environment=environment):
+        counts[resource['node']] = counts.get(resource['node'], 0) + 1
+
+    lines = []
+    for level in levels:
+        for name in level:
+            lines.append('%s: %d resource(s)' % (name, counts.get(name, 0)))
+
+    return '\n'.join(lines)
+
+def load_dependency_graph(path='./skyfile.py', compiled=True):
+    """
+    Load the skyfile's dependency graph.
+
+    When ``compiled`` is True and the skyfile and its local modules have not
+    changed since the graph was last compiled, the compiled graph is read from
+    the cache and the skyfile is not imported. In that case, the returned
+    dependency graph is ``None``.
+
+    :rtype: tuple
+    :return: A tuple in the format: (``dependencies``, ``levels``,
+        ``dependency_graph``), where ``dependencies`` maps node names to the
+        names of the nodes that they require, ``levels`` is a list of lists of
+        node names, and ``dependency_graph`` is a list of lists of
+        Infrastructure objects.
+    """
+
+    cache_path = get_state_path('graph.json')
+    if compiled:
+        compiled_graph = cache.load_graph(cache_path, path)
+        if compiled_graph:
+            return compiled_graph['nodes'], compiled_graph['levels'], None
+
+    # Note the modules that the skyfile imports, including those that it only imports names from.
+    loaded_modules = set(sys.modules)
+    module = load_skyfile(path)
+    imported_modules = [sys.modules[name] for name in set(sys.modules) - loaded_modules]
+    dependency_graph = build_dependency_graph(load_infrastructure(module))
+
+    try:
+        local_modules = cache.get_local_modules(module, os.path.dirname(os.path.abspath(path)), modules=imported_modules,
+                                                nodes=[node for level in dependency_graph for node in level])
+        cache.save_graph(cache_path, local_modules, dependency_graph)
+    except OSError as error:
+        logger.warning('Could not save compiled dependency graph (%s): %s' % (cache_path, error))
+
+    levels = [[node.__name__ for node in level] for level in dependency_graph]
+    return get_dependencies(dependency_graph), levels, dependency_graph
+
+def print_graph(dependencies, levels, targets):
+    selected = select_targets(dependencies, targets)
+    for depth, level in enumerate([name for name in level if name in selected] for level in levels):
+        if level:
+            print('%d: %s' % (depth+1, ', '.join(level)))
+
 def main():
     parse_arguments()
-    module = load_skyfile()
-    infrastructure = load_infrastructure(module)
-    dependency_graph = build_dependency_graph(infrastructure)
-
-    targets = config['TARGETS']
 
-    for target in targets:
-        build_target(dependency_graph, target=target)
+    if config['COMMAND'] == 'serve':
+        from .daemon import serve
+        serve(watch=config['WATCH'])
+        return
+
+    # Forward the command to a running daemon, if there is one, which avoids importing the skyfile and AWS services.
+    if config['COMMAND'].upper() in DAEMON_COMMANDS:
+        from .daemon import forward
+        output = forward(config['COMMAND'], dict(config))
+        if output is not None:
+            print(output)
+            return
+
+    # Validate targets against the compiled dependency graph, which avoids importing the skyfile when possible.
+    dependencies, levels, dependency_graph = load_dependency_graph()
+    select_targets(dependencies, config['TARGETS'])
+
+    if config['COMMAND'] == 'graph':
+        print_graph(dependencies, levels, config['TARGETS'])
+        return
+
+    if config['COMMAND'] == 'status':
+        print(format_status(levels, environment=get_scope()))
+        return
+
+    # Import the skyfile, since Infrastructure objects are needed to build the targets.
+    if dependency_graph is None:
+        dependencies, levels, dependency_graph = load_dependency_graph(compiled=False)
+
+    if config['COMMAND'] == 'destroy':
+        if config['REGIONS']:
+            destroyed = deploy_regions(destroy_target, config['REGIONS'], dependency_graph, targets=config['TARGETS'],
+                                       jobs=config['JOBS'], force=config['FORCE'])
+            for region in config['REGIONS']:
+                print('Destroyed (%s) in (%s).' % (', '.join(destroyed[region]), region))
+        else:
+            destroyed = destroy_target(dependency_graph, targets=config['TARGETS'], jobs=config['JOBS'], force=config['FORCE'])
+            print('Destroyed (%s).' % ', '.join(destroyed))
+        return
+
+    if config['COMMAND'] == 'plan' or config['DRY_RUN']:
+        print_plan(plan_target(dependency_graph, targets=config['TARGETS'], force=config['FORCE']))
+        return
+
+    if config['REGIONS']:
+        deploy_regions(build_target, config['REGIONS'], dependency_graph, targets=config['TARGETS'], jobs=config['JOBS'],
+                       engine=config['ENGINE'], force=config['FORCE'], resume=config['RESUME'])
+        return
+
+    build_target(dependency_graph, targets=config['TARGETS'], jobs=config['JOBS'], engine=config['ENGINE'],
+                 force=config['FORCE'], resume=config['RESUME'])
 
 if __name__ == '__main__':
     main()
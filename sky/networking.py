@@ -1,14 +1,22 @@
-import sys
 import time
 import re
 import ipaddress
 import logging
+import contextvars
 from operator import itemgetter
+from concurrent.futures import Future, ThreadPoolExecutor
 import boto
 from .state import config, mode
+from .connections import get_connection, regional
+from .store import record_resource, find_resources
+from .waiter import Waiter
+from .tagging import tag, batched_tags, create_tags
 
 logger = logging.getLogger(__name__)
 
+# The maximum number of Subnets that are created concurrently.
+MAX_WORKERS = 16
+
 def connect_vpc():
     """
     Connect to the Amazon Virtual Private Cloud (Amazon VPC) service.
@@ -17,12 +25,7 @@ def connect_vpc():
     :return: A :class:`~boto.vpc.VPCConnection` object.
     """
 
-    logger.debug('Connecting to the Amazon Virtual Private Cloud (Amazon VPC) service.')
-    vpc = boto.connect_vpc(aws_access_key_id=config['AWS_ACCESS_KEY_ID'],
-                           aws_secret_access_key=config['AWS_SECRET_ACCESS_KEY'])
-    logger.debug('Connected to Amazon VPC.')
-
-    return vpc
+    return get_connection('vpc')
 
 
 def validate_cidr_block(cidr_block):
@@ -72,7 +75,8 @@ def validate_cidr_block(cidr_block):
         return False
 
 
-def create_network(name=None, cidr_block=None, network_class=None, internet_connected=False):
+@regional
+def create_network(name=None, cidr_block=None, network_class=None, internet_connected=False, region=None):
     """
     Create a Private Network (VPC).
 
@@ -103,6 +107,10 @@ def create_network(name=None, cidr_block=None, network_class=None, internet_conn
 
         * See also: :func:`sky.networking.attach_internet_gateway`.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.vpc.vpc.VPC`
     :return: The created :class:`~boto.vpc.vpc.VPC` network.
     """
@@ -121,9 +129,10 @@ def create_network(name=None, cidr_block=None, network_class=None, internet_conn
 
     # Check for existing network.
     if config['CREATION_MODE'] == mode.PERMANENT:
-        existing_vpc = vpc_connection.get_all_vpcs(filters={'tag:Name': name})
+        existing_vpc = find_resources('vpc', name=name) or vpc_connection.get_all_vpcs(filters={'tag:Name': name})
         if len(existing_vpc):
             logger.info('Found existing Network (%s).' % name)
+            record_resource('vpc', existing_vpc[-1].id, name=name, adopted=True)
             return existing_vpc[-1]
 
     # Provide a default CIDR block, if a network class was specified.
@@ -136,7 +145,7 @@ def create_network(name=None, cidr_block=None, network_class=None, internet_conn
         raise TypeError("Value for cidr_block or network_class arguments must be specified.")
         
     if not validate_cidr_block(cidr_block):
-        sys.exit(1)
+        raise RuntimeError('Invalid CIDR block (%s).' % cidr_block)
 
     # Create Virtual Private Cloud (VPC).
     network = None
@@ -146,88 +155,56 @@ def create_network(name=None, cidr_block=None, network_class=None, internet_conn
                                             instance_tenancy='default',
                                             dry_run=False)
         logger.info('Created Virtual Private Cloud (VPC) (%s).' % name)
+        record_resource('vpc', network.id, name=name)
     except boto.exception.EC2ResponseError as error:
         if error.status == 400: # Bad Request
             logger.error('Error %s: %s. Could not create VPC (%s). %s' % (error.status, error.reason, name, error.message))
 
-    # Tag Virtual Private Cloud (VPC).
-    tagged = False
-    while not tagged:
-        try:
-            tagged = ec2_connection.create_tags([network.id], {'Name': name,
-                                                               'Project': config['PROJECT_NAME'],
-                                                               'Environment': config['ENVIRONMENT'],})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidVpcID.NotFound': # VPC hasn't registered with Virtual Private Cloud (VPC) service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
-
-    # Tag default Security Group.
-    security_groups = ec2_connection.get_all_security_groups(filters={'vpc-id': network.id,})
-    for security_group in security_groups:
-        tagged = False
-        security_group_name = '-'.join(['gp', config['PROJECT_NAME'], config['ENVIRONMENT'], 'default'])
-        while not tagged:
-            try:
-                tagged = ec2_connection.create_tags([security_group.id], {'Name': security_group_name,
-                                                                          'Project': config['PROJECT_NAME'],
-                                                                          'Environment': config['ENVIRONMENT'],
-                                                                          'Type': 'default',})
-            except boto.exception.EC2ResponseError as error:
-                if error.code == 'InvalidID': # Security Group hasn't registered with Virtual Private Cloud (VPC) service yet.
-                    pass
-                else:
-                    raise boto.exception.EC2ResponseError
-
-    # Tag Main Route Table.
-    route_tables = vpc_connection.get_all_route_tables(filters={'vpc-id': network.id,})
-    for route_table in route_tables:
-        tagged = False
-        route_table_name = '-'.join(['rtb', config['PROJECT_NAME'], config['ENVIRONMENT'], 'main'])
-        while not tagged:
-            try:
-                tagged = ec2_connection.create_tags([route_table.id], {'Name': route_table_name,
-                                                                       'Project': config['PROJECT_NAME'],
-                                                                       'Environment': config['ENVIRONMENT'],
-                                                                       'Type': 'main',})
-            except boto.exception.EC2ResponseError as error:
-                if error.code == 'InvalidID': # Route Table hasn't registered with Virtual Private Cloud (VPC) service yet.
-                    pass
-                else:
-                    raise boto.exception.EC2ResponseError
-
-    # Tag Access Control Lists (ACLs).
-    acls = vpc_connection.get_all_network_acls(filters={'vpc-id': network.id,})
-    for acl in acls:
-        tagged = False
-        acl_name = '-'.join(['acl', config['PROJECT_NAME'], config['ENVIRONMENT']])
-        while not tagged:
-            try:
-                tagged = ec2_connection.create_tags([acl.id], {'Name': acl_name,
-                                                               'Project': config['PROJECT_NAME'],
-                                                               'Environment': config['ENVIRONMENT'],})
-            except boto.exception.EC2ResponseError as error:
-                if error.code == 'InvalidNetworkAclID.NotFound': # ACL hasn't registered with Virtual Private Cloud (VPC) service yet.
-                    pass
-                else:
-                    raise boto.exception.EC2ResponseError
-
-    # Tag DHCP Options Set.
-    dhcp_options = vpc_connection.get_all_dhcp_options(network.dhcp_options_id)
-    for dhcp_option in dhcp_options:
-        tagged = False
-        dhcp_option_name = '-'.join(['dopt', config['PROJECT_NAME'], config['ENVIRONMENT']])
-        while not tagged:
-            try:
-                tagged = ec2_connection.create_tags([dhcp_option.id], {'Name': dhcp_option_name,
-                                                                       'Project': config['PROJECT_NAME'],
-                                                                       'Environment': config['ENVIRONMENT'],})
-            except boto.exception.EC2ResponseError as error:
-                if error.code == 'InvalidID': # DHCP Options Set hasn't registered with Virtual Private Cloud (VPC) service yet.
-                    pass
-                else:
-                    raise boto.exception.EC2ResponseError
+    # Tag the VPC and its default resources together.
+    with batched_tags():
+        # Tag Virtual Private Cloud (VPC).
+        tags = {'Name': name,
+                'Project': config['PROJECT_NAME'],
+                'Environment': config['ENVIRONMENT'],}
+        tag([network.id], tags)
+
+        # Tag default Security Group.
+        security_groups = ec2_connection.get_all_security_groups(filters={'vpc-id': network.id,})
+        for security_group in security_groups:
+            security_group_name = '-'.join(['gp', config['PROJECT_NAME'], config['ENVIRONMENT'], 'default'])
+            tags = {'Name': security_group_name,
+                    'Project': config['PROJECT_NAME'],
+                    'Environment': config['ENVIRONMENT'],
+                    'Type': 'default',}
+            tag([security_group.id], tags)
+
+        # Tag Main Route Table.
+        route_tables = vpc_connection.get_all_route_tables(filters={'vpc-id': network.id,})
+        for route_table in route_tables:
+            route_table_name = '-'.join(['rtb', config['PROJECT_NAME'], config['ENVIRONMENT'], 'main'])
+            tags = {'Name': route_table_name,
+                    'Project': config['PROJECT_NAME'],
+                    'Environment': config['ENVIRONMENT'],
+                    'Type': 'main',}
+            tag([route_table.id], tags)
+
+        # Tag Access Control Lists (ACLs).
+        acls = vpc_connection.get_all_network_acls(filters={'vpc-id': network.id,})
+        for acl in acls:
+            acl_name = '-'.join(['acl', config['PROJECT_NAME'], config['ENVIRONMENT']])
+            tags = {'Name': acl_name,
+                    'Project': config['PROJECT_NAME'],
+                    'Environment': config['ENVIRONMENT'],}
+            tag([acl.id], tags)
+
+        # Tag DHCP Options Set.
+        dhcp_options = vpc_connection.get_all_dhcp_options(network.dhcp_options_id)
+        for dhcp_option in dhcp_options:
+            dhcp_option_name = '-'.join(['dopt', config['PROJECT_NAME'], config['ENVIRONMENT']])
+            tags = {'Name': dhcp_option_name,
+                    'Project': config['PROJECT_NAME'],
+                    'Environment': config['ENVIRONMENT'],}
+            tag([dhcp_option.id], tags)
 
     if internet_connected:
         attach_internet_gateway(network)
@@ -235,7 +212,8 @@ def create_network(name=None, cidr_block=None, network_class=None, internet_conn
     return network
 
 
-def attach_internet_gateway(vpc):
+@regional
+def attach_internet_gateway(vpc, region=None):
     """
     Attach a Private Network (VPC) to the Internet.
 
@@ -245,6 +223,10 @@ def attach_internet_gateway(vpc):
 
         * See also: :func:`sky.networking.create_network`.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: bool
     :return: ``True`` if the :class:`~boto.vpc.vpc.VPC` was successfully
         connected to the Internet. Otherwise, ``False``.
@@ -260,20 +242,14 @@ def attach_internet_gateway(vpc):
 
     # Create Internet Gateway.
     internet_gateway = vpc_connection.create_internet_gateway(dry_run=False)
+    internet_gateway_name = '-'.join(['igw', config['PROJECT_NAME'], config['ENVIRONMENT']])
+    record_resource('internet_gateway', internet_gateway.id, name=internet_gateway_name, parent=vpc.id)
 
     # Tag Internet Gateway.
-    tagged = False
-    internet_gateway_name = '-'.join(['igw', config['PROJECT_NAME'], config['ENVIRONMENT']])
-    while not tagged:
-        try:
-            tagged = ec2_connection.create_tags([internet_gateway.id], {'Name': internet_gateway_name,
-                                                                        'Project': config['PROJECT_NAME'],
-                                                                        'Environment': config['ENVIRONMENT'],})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidInternetGatewayID.NotFound': # IGW hasn't registered with Virtual Private Cloud (VPC) service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
+    tags = {'Name': internet_gateway_name,
+            'Project': config['PROJECT_NAME'],
+            'Environment': config['ENVIRONMENT'],}
+    tag([internet_gateway.id], tags)
 
     # Get name of VPC.
     vpc_tags = ec2_connection.get_all_tags(filters={'resource-id': vpc.id,
@@ -293,7 +269,8 @@ def attach_internet_gateway(vpc):
     return True if attached else False
 
 
-def create_route_table(vpc, name=None, internet_access=False):
+@regional
+def create_route_table(vpc, name=None, internet_access=False, region=None):
     """
     Create a Route Table.
 
@@ -311,19 +288,17 @@ def create_route_table(vpc, name=None, internet_access=False):
     :param internet_access: Specifies whether the Route Table will contain a
         route to the Internet (0.0.0.0/0, in CIDR notation).
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.vpc.routetable.RouteTable`
     :return: The created :class:`~boto.vpc.routetable.RouteTable` object.
     """
 
-    # Defer import to resolve interdependency between .networking and .compute modules.
-    from .compute import connect_ec2
-    
     # Connect to the Amazon Virtual Private Cloud (Amazon VPC) service.
     vpc_connection = connect_vpc()
 
-    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
-    ec2_connection = connect_ec2()
-
     # Create Route Table.
     route_table = vpc_connection.create_route_table(vpc.id)
 
@@ -345,16 +320,10 @@ def create_route_table(vpc, name=None, internet_access=False):
                                     vpc_peering_connection_id=None,
                                     dry_run=False)
 
-        # Refresh Route Table.
-        refreshed = False
-        while not refreshed:
-            try:
-                route_table = vpc_connection.get_all_route_tables(route_table.id)
-                route_table = route_table[0] if len(route_table) else None
-                refreshed = True
-            except boto.exception.EC2ResponseError as error:
-                if error.code == 'InvalidRouteTableID.NotFound':
-                    pass
+        # Refresh Route Table, once it has registered with the Virtual Private Cloud (VPC) service.
+        route_table = Waiter('route table (%s)' % route_table.id, retry=['InvalidRouteTableID.NotFound']).call(vpc_connection.get_all_route_tables,
+                                                                                                              route_table.id)
+        route_table = route_table[0] if len(route_table) else None
 
     # Generate Route Table name.
     route_tables = vpc_connection.get_all_route_tables(filters={'vpc-id': vpc.id,})
@@ -370,18 +339,13 @@ def create_route_table(vpc, name=None, internet_access=False):
                          suffix])
 
     # Tag Route Table.
-    tagged = False
-    while not tagged:
-        try:
-            tagged = ec2_connection.create_tags([route_table.id], {'Name': name,
-                                                                   'Project': config['PROJECT_NAME'],
-                                                                   'Environment': config['ENVIRONMENT'],
-                                                                   'Type': 'public' if internet_access else 'private',})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidRouteTableID.NotFound': # Route Table hasn't registered with Virtual Private Cloud (VPC) service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError(error.status, error.reason)
+    tags = {'Name': name,
+            'Project': config['PROJECT_NAME'],
+            'Environment': config['ENVIRONMENT'],
+            'Type': 'public' if internet_access else 'private',}
+    create_tags([route_table.id], tags)
+
+    record_resource('route_table', route_table.id, name=name, parent=vpc.id)
 
     # Refresh Route Table object.
     route_table = vpc_connection.get_all_route_tables(route_table_ids=[route_table.id])[-1]
@@ -390,7 +354,8 @@ def create_route_table(vpc, name=None, internet_access=False):
     return route_table
 
 
-def create_subnets(vpc, zones='all', count=1, byte_aligned=True, balanced=False, public=False):
+@regional
+def create_subnets(vpc, zones='all', count=1, byte_aligned=True, balanced=False, public=False, region=None):
     """
     Create Subnets.
 
@@ -423,6 +388,10 @@ def create_subnets(vpc, zones='all', count=1, byte_aligned=True, balanced=False,
         equal. By default, this is set to ``False`` and Subnets will be created
         to maximize their network capacity.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: list
     :return: A list of :class:`~boto.vpc.subnet.Subnet` objects.
     """
@@ -446,30 +415,40 @@ def create_subnets(vpc, zones='all', count=1, byte_aligned=True, balanced=False,
         zones = [zone.strip() for zone in zones.lower().split(',')]
     zones = ec2_connection.get_all_zones(zones)
 
+    # Subnets within the specified VPC are listed with a single request, then grouped by zone and type in memory.
+    zone_names = [zone.name for zone in zones]
+    subnet_type = 'public' if public else 'private'
+    vpc_subnets = None
+
     # Check for existing Subnets.
     if config['CREATION_MODE'] == mode.PERMANENT:
-        existing_subnets = vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,
-                                                                   'availability-zone': [zone.name for zone in zones],
-                                                                   'tag:Type': 'public' if public else 'private',})
-
-        # Convert boto.resultset.ResultSet to a list of Subnet objects.
-        existing_subnets = [subnet for subnet in existing_subnets]
+        # Look up recorded Subnets first, since they are verified with a single request.
+        existing_subnets = [subnet for subnet in find_resources('subnet', parent=vpc.id) \
+                            if subnet.availability_zone in zone_names \
+                            and subnet.tags.get('Type') == subnet_type]
+        if not existing_subnets:
+            vpc_subnets = list(vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,}))
+            existing_subnets = [subnet for subnet in vpc_subnets \
+                                if subnet.availability_zone in zone_names \
+                                and subnet.tags.get('Type') == subnet_type]
 
         # Return list of existing subnets, if they exist.
         if len(existing_subnets) > 0:
             logger.info('Found existing %s Subnets (%s).' % (('Public' if public else 'Private'), \
                                                               ', '.join([subnet.tags['Name'] for subnet in existing_subnets])))
+            for subnet in existing_subnets:
+                record_resource('subnet', subnet.id, name=subnet.tags.get('Name'), parent=vpc.id, adopted=True)
             return existing_subnets
 
+    if vpc_subnets is None:
+        vpc_subnets = list(vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,}))
+
     # Get the number of Subnets in each zone, so that a Subnet name can be computed.
     for zone in zones:
-        offset = len(vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,
-                                                             'availability-zone': zone.name,
-                                                             'tag:Type': 'public' if public else 'private',}))
-        zone.offset = offset
+        zone.offset = len([subnet for subnet in vpc_subnets if subnet.availability_zone == zone.name and subnet.tags.get('Type') == subnet_type])
 
     # Get the number of Subnets within the specified VPC.
-    num_subnets = len(vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,}))
+    num_subnets = len(vpc_subnets)
 
     # Calculate Subnet netmask.
     subnet_netmask = netmask+len(bin(num_subnets+len(zones)*count))-3
@@ -485,8 +464,8 @@ def create_subnets(vpc, zones='all', count=1, byte_aligned=True, balanced=False,
     # Create Route Table for Public/Private Subnets.
     route_table = create_route_table(vpc, internet_access=(True if public else False))
 
-    # Create Subnets.
-    subnets = list()
+    # Plan Subnets.
+    planned_subnets = list()
     for i, zone in enumerate(sorted(zones*count, key=lambda zone: zone.name)):
         # Generate Subnet name.
         suffix = '-' + str(1+zone.offset+(i%count)).zfill(len(str(zone.offset+count)))
@@ -524,17 +503,36 @@ def create_subnets(vpc, zones='all', count=1, byte_aligned=True, balanced=False,
                             str(subnet_network_ip & 255) + '/' + \
                             str(subnet_netmask)
 
-        # Create Subnet.
-        subnet = create_subnet(vpc, zone, subnet_cidr_block, subnet_name, route_table)
+        # Add Subnet to plan.
+        planned_subnets.append((zone, subnet_cidr_block, subnet_name))
 
-        # Add Subnet to list.
-        if subnet:
-            subnets.append(subnet)
+    if not planned_subnets:
+        return []
 
-    return subnets
+    # Create Subnets concurrently, then tag them together.
+    with batched_tags():
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(planned_subnets))) as pool:
+            subnets = list()
+            for zone, subnet_cidr_block, subnet_name in planned_subnets:
+                # Reuse an existing Subnet, which the VPC-wide request has already found.
+                existing_subnet = [subnet for subnet in vpc_subnets if subnet.availability_zone == zone.name and subnet.cidr_block == subnet_cidr_block \
+                                   and subnet.tags.get('Name') == subnet_name] if config['CREATION_MODE'] == mode.PERMANENT else []
+                if existing_subnet:
+                    logger.info('Found existing Subnet (%s).' % subnet_name)
+                    record_resource('subnet', existing_subnet[-1].id, name=subnet_name, parent=vpc.id, adopted=True)
+                    subnets.append(existing_subnet[-1])
+                    continue
 
+                # Run each creation in a copy of the current context, so that it inherits the deployment Context and the tag batch.
+                subnets.append(pool.submit(contextvars.copy_context().run, add_subnet, vpc, zone, subnet_cidr_block, subnet_name, route_table))
 
-def create_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None):
+            subnets = [subnet.result() if isinstance(subnet, Future) else subnet for subnet in subnets]
+
+    return [subnet for subnet in subnets if subnet]
+
+
+@regional
+def create_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None, region=None):
     """
     Create a Subnet.
 
@@ -561,32 +559,53 @@ def create_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None):
     :param route_table: An *optional* :class:`~boto.vpc.routetable.RouteTable`
         that will be associated to the Subnet.
 
+    :type region: str
+    :param region: An *optional* region name, e.g., ``eu-west-1``. The
+        deployment's region is used, if one is not specified.
+
     :rtype: :class:`boto.vpc.subnet.Subnet`
     :return: The created :class:`~boto.vpc.subnet.Subnet`.
     """
 
-    # Defer import to resolve interdependency between .networking and .compute modules.
-    from .compute import connect_ec2
-    
     # Connect to the Amazon Virtual Private Cloud (Amazon VPC) service.
     vpc_connection = connect_vpc()
 
-    # Connect to the Amazon Elastic Compute Cloud (Amazon EC2) service.
-    ec2_connection = connect_ec2()
-
-    # Break CIDR block into IP and Netmask components.
-    network_ip, netmask = get_cidr_block_components(cidr_block)
-
     # Check for existing Subnet.
     if config['CREATION_MODE'] == mode.PERMANENT:
-        existing_subnet = vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,
-                                                                  'availability-zone': zone.name,
-                                                                  'cidrBlock' : cidr_block,
-                                                                  'tag:Name' : subnet_name,})
+        existing_subnet = [subnet for subnet in find_resources('subnet', name=subnet_name, parent=vpc.id) \
+                           if subnet.availability_zone == zone.name and subnet.cidr_block == cidr_block]
+        if not existing_subnet:
+            existing_subnet = vpc_connection.get_all_subnets(filters={'vpc-id': vpc.id,
+                                                                      'availability-zone': zone.name,
+                                                                      'cidrBlock' : cidr_block,
+                                                                      'tag:Name' : subnet_name,})
         if len(existing_subnet):
-            logger.info('Found existing Subnet (%s).' % existing_subnet.tags['Name'])
+            logger.info('Found existing Subnet (%s).' % existing_subnet[-1].tags['Name'])
+            record_resource('subnet', existing_subnet[-1].id, name=subnet_name, parent=vpc.id, adopted=True)
             return existing_subnet[-1]
 
+    return add_subnet(vpc, zone, cidr_block, subnet_name, route_table)
+
+
+def add_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None):
+    """
+    Create a Subnet, without checking for an existing Subnet, associate it to
+    a Route Table, and tag it.
+
+    The tags are created as part of the current tag batch, if there is one.
+    The parameters are the same as those of
+    :func:`sky.networking.create_subnet`.
+
+    :rtype: :class:`boto.vpc.subnet.Subnet`
+    :return: The created :class:`~boto.vpc.subnet.Subnet`.
+    """
+
+    # Connect to the Amazon Virtual Private Cloud (Amazon VPC) service.
+    vpc_connection = connect_vpc()
+
+    # Break CIDR block into IP and Netmask components.
+    network_ip, netmask = get_cidr_block_components(cidr_block)
+
     # Create Subnet.
     try:
         logger.info('Creating Subnet (%s).' % subnet_name)
@@ -595,6 +614,7 @@ def create_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None):
                                               availability_zone=zone.name,
                                               dry_run=False)
         logger.info('Created Subnet (%s) with %s available IP addresses.' % (subnet_name, '{:,}'.format(get_network_capacity(netmask))))
+        record_resource('subnet', subnet.id, name=subnet_name, parent=vpc.id)
     except boto.exception.BotoServerError as error:
         if error.status == 400: # Bad Request
             logger.error('Error %s: %s. Couldn\'t create Subnet (%s).' % (error.status, error.reason, subnet_name))
@@ -602,7 +622,8 @@ def create_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None):
                 num_subnets = len(vpc_connection.get_all_subnets(filters={'vpc-id':vpc.id}))
                 logging.error('%d Subnets exist within the VPC' % num_subnets)
                 logging.error('Refer to the VPC User Guide for Amazon VPC Limits.')
-                sys.exit(1)
+                raise RuntimeError('Subnet limit exceeded (%d) in VPC (%s).' % (num_subnets, vpc.id))
+        raise
 
     # Associate Subnet to Route Table.
     public = False
@@ -619,18 +640,11 @@ def create_subnet(vpc, zone, cidr_block, subnet_name=None, route_table=None):
         public = [route for route in route_table.routes if route.gateway_id and route.destination_cidr_block == '0.0.0.0/0']
 
     # Tag Subnet.
-    tagged = False
-    while not tagged:
-        try:
-            tagged = ec2_connection.create_tags([subnet.id], {'Name': subnet_name,
-                                                              'Project': config['PROJECT_NAME'],
-                                                              'Environment': config['ENVIRONMENT'],
-                                                              'Type': 'public' if public else 'private',})
-        except boto.exception.EC2ResponseError as error:
-            if error.code == 'InvalidSubnetID.NotFound': # Subnet hasn't registered with Virtual Private Cloud (VPC) service yet.
-                pass
-            else:
-                raise boto.exception.EC2ResponseError
+    tags = {'Name': subnet_name,
+            'Project': config['PROJECT_NAME'],
+            'Environment': config['ENVIRONMENT'],
+            'Type': 'public' if public else 'private',}
+    tag([subnet.id], tags)
 
     return subnet
 
@@ -0,0 +1,157 @@
+"""planner.py: Plan a deployment offline, from the resource store, without calling AWS."""
+
+import asyncio
+import logging
+import functools
+import threading
+from .state import config, mode, get_context, get_current_node
+
+logger = logging.getLogger(__name__)
+
+class Placeholder(object):
+    """
+    A stand-in for an AWS resource, returned by planned function calls.
+
+    Attributes of a Placeholder are Placeholders, so that Infrastructure
+    objects can pass resources (and their attributes) to other functions.
+    """
+
+    def __init__(self, resource_type, resource_id=None, name=None):
+        self.resource_type = resource_type
+        self.resource_id = resource_id
+        self.name = name
+
+    def __repr__(self):
+        return 'Placeholder:%s:%s' % (self.resource_type, self.resource_id or self.name or 'new')
+
+    def __getattr__(self, attr):
+        if attr == 'id':
+            return self.resource_id or '(new %s)' % self.resource_type
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return Placeholder('%s.%s' % (self.resource_type, attr))
+
+    def __getitem__(self, key):
+        return Placeholder('%s[%r]' % (self.resource_type, key))
+
+    def __iter__(self):
+        return iter([])
+
+
+def load_placeholders(serialized):
+    """
+    Load a serialized value, with Placeholders in place of its AWS resources.
+
+    * See also: :func:`sky.resources.serialize`.
+    """
+
+    if 'type' in serialized:
+        return Placeholder(serialized['type'], serialized['id'])
+    if 'list' in serialized:
+        return [load_placeholders(item) for item in serialized['list']]
+    if 'dict' in serialized:
+        return {key: load_placeholders(item) for key, item in serialized['dict']}
+    return serialized['value']
+
+
+class Plan(object):
+    """
+    The actions that a deployment would take.
+
+    Planned function calls are matched against a snapshot of the resource
+    store. In PERMANENT creation mode, a call that creates a resource type
+    that its node has already created is planned as ``reuse``. Other calls
+    are planned as ``create``, since a deployment in any other creation mode
+    creates new resources.
+
+    :type resources: list
+    :param resources: A snapshot of the resource store.
+
+        * See also: :meth:`sky.store.ResourceStore.get_resources`.
+    """
+
+    def __init__(self, resources):
+        self.nodes = []
+        self.actions = []
+        self._lock = threading.Lock()
+        self._snapshot = {}
+        for resource in resources:
+            self._snapshot.setdefault((resource['node'], resource['type']), []).append(resource)
+
+    def add(self, node, action, description):
+        with self._lock:
+            self.actions.append((node, action, description))
+
+    def call(self, function_name, resource_type, many, action, kwargs):
+        """
+        Plan a function call.
+
+        :rtype: object
+        :return: A Placeholder, or a list of Placeholders if the function
+            returns many resources.
+        """
+
+        node = get_current_node()
+
+        # Functions that do not create resources are listed with their own action, e.g., ``terminate``.
+        if not resource_type:
+            if action:
+                self.add(node, action, function_name)
+            return [] if many else Placeholder(function_name)
+
+        # Match the call against the resources that its node created during the last deployment, which are only reused in PERMANENT creation mode.
+        name = kwargs.get('name')
+        matched = []
+        if config['CREATION_MODE'] == mode.PERMANENT:
+            with self._lock:
+                recorded = self._snapshot.get((node, resource_type), [])
+                matched = [resource for resource in recorded if not name or resource['name'] == name]
+                matched = matched if many else matched[-1:]
+                for resource in matched:
+                    recorded.remove(resource)
+
+        if not matched:
+            self.add(node, 'create', '%s%s (%s)' % (resource_type, '(s)' if many else '', name or function_name))
+            return [Placeholder(resource_type, name=name)] if many else Placeholder(resource_type, name=name)
+
+        self.add(node, 'reuse', '%s (%s)' % (resource_type, ', '.join(resource['name'] or resource['id'] for resource in matched)))
+        placeholders = [Placeholder(resource_type, resource['id'], resource['name']) for resource in matched]
+        return placeholders if many else placeholders[-1]
+
+
+def plannable(resource_type=None, many=False, action=None):
+    """
+    Decorate a function that calls AWS, so that it answers from the current
+    Plan, instead of calling AWS, while a deployment is being planned.
+
+    :type resource_type: str
+    :param resource_type: The type of the resource that the function creates,
+        if any, e.g., ``vpc``.
+
+    :type many: bool
+    :param many: Specifies whether the function returns a list of resources.
+
+    :type action: str
+    :param action: The action to list for functions that do not create
+        resources, e.g., ``terminate``.
+    """
+
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                plan = get_context().plan
+                if plan is not None:
+                    return plan.call(function.__name__, resource_type, many, action, kwargs)
+                return await function(*args, **kwargs)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                plan = get_context().plan
+                if plan is not None:
+                    return plan.call(function.__name__, resource_type, many, action, kwargs)
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
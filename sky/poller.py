@@ -0,0 +1,263 @@
+"""poller.py: Shared pollers, which wait for many AWS resources with one describe request per tick."""
+
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future
+from .state import config
+from .connections import get_region_name
+from .waiter import WaiterError
+
+logger = logging.getLogger(__name__)
+
+# The poll interval, in seconds, while resources are changing state, and the interval that it backs off to while they are not.
+INTERVAL = 1
+MAX_INTERVAL = 15
+
+class Watch(object):
+
+    def __init__(self, key, ready, timeout=None):
+        self.key = key
+        self.ready = ready
+        self.future = Future()
+        self.polls = 0
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout else None
+
+
+class Poller(object):
+    """
+    Wait for many resources of one kind with a single describe request per
+    tick, made from a background thread.
+
+    Each watch is resolved through a :class:`concurrent.futures.Future`, which
+    may be waited for from a thread, or awaited with
+    :func:`asyncio.wrap_future`. The poll interval starts at ``interval``, is
+    backed off while no watched resource becomes ready, and is reset whenever
+    one does, or a new watch is added.
+
+    :type description: str
+    :param description: What is polled, for logging, e.g., ``EC2 Instances``.
+
+    :type describe: callable
+    :param describe: A callable that takes a list of keys (e.g., EC2 Instance
+        IDs) and returns a ``dict`` of the current status of each, by key.
+        Keys that are missing from the ``dict`` are polled again.
+
+    :type context: :class:`contextvars.Context`
+    :param context: The context that ``describe`` runs in, e.g., for its
+        region and credentials.
+    """
+
+    def __init__(self, description, describe, context, interval=INTERVAL, max_interval=MAX_INTERVAL):
+        self.description = description
+        self.describe = describe
+        self.context = context
+        self.interval = interval
+        self.max_interval = max_interval
+        self.watches = []
+        self.requests = 0
+        self._delay = interval
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def watch(self, key, ready, timeout=None):
+        """
+        Watch a resource until it is ready.
+
+        :type key: str
+        :param key: The resource's key, e.g., its ID.
+
+        :type ready: callable
+        :param ready: A callable that takes the resource's status and returns
+            ``True`` once it is ready. It may raise an exception, e.g., if the
+            resource has failed, which is set on the returned future.
+
+        :type timeout: int
+        :param timeout: An *optional* number of seconds after which the
+            returned future fails with :class:`sky.waiter.WaiterError`.
+
+        :rtype: :class:`concurrent.futures.Future`
+        :return: A future of the resource's status, once it is ready.
+        """
+
+        watch = Watch(key, ready, timeout=timeout)
+        with self._lock:
+            self.watches.append(watch)
+            self._delay = self.interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='poller-%s' % self.description, daemon=True)
+                self._thread.start()
+
+        return watch.future
+
+    def run(self):
+        import boto
+
+        while True:
+            with self._lock:
+                delay = self._delay
+            time.sleep(delay)
+
+            with self._lock:
+                if not self.watches:
+                    self._thread = None
+                    return
+                keys = sorted(set(watch.key for watch in self.watches))
+
+            # Describe every watched resource at once.
+            self.requests += 1
+            try:
+                statuses = self.context.run(self.describe, keys)
+            except boto.exception.BotoServerError as error:
+                logger.debug('Could not poll %s (%s). Retrying.' % (self.description, getattr(error, 'error_code', None) or error))
+                statuses = {}
+            except Exception as error:
+                # Fail every watch, rather than leave them waiting on a dead poller.
+                with self._lock:
+                    watches, self.watches, self._thread = self.watches, [], None
+                for watch in watches:
+                    watch.future.set_exception(error)
+                return
+
+            with self._lock:
+                now = time.monotonic()
+                settled = [watch for watch in self.watches if self.settle(watch, statuses.get(watch.key), now)]
+                self.watches = [watch for watch in self.watches if watch not in settled]
+
+                # Poll promptly while resources are changing state, and back off while they are not.
+                self._delay = self.interval if settled else min(self._delay * 1.5, self.max_interval)
+
+                if not self.watches:
+                    self._thread = None
+                    return
+
+    def settle(self, watch, status, now):
+        watch.polls += 1
+        try:
+            if status is not None and watch.ready(status):
+                watch.future.set_result(status)
+                return True
+        except Exception as error:
+            watch.future.set_exception(error)
+            return True
+
+        if watch.deadline and now >= watch.deadline:
+            watch.future.set_exception(WaiterError('%s (%s)' % (self.description, watch.key), watch.polls, now - watch.started))
+            return True
+
+        return False
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+def get_poller(description, describe, *key):
+    """
+    Get the shared poller of a kind of resource, for the current region and
+    credentials.
+
+    :rtype: :class:`sky.poller.Poller`
+    """
+
+    key = (description, get_region_name(), config['AWS_ACCESS_KEY_ID']) + key
+    with _pollers_lock:
+        if key not in _pollers:
+            _pollers[key] = Poller(description, describe, contextvars.copy_context())
+        return _pollers[key]
+
+
+def describe_instances(instance_ids):
+    from .compute import connect_ec2
+
+    ec2_connection = connect_ec2()
+
+    # Filter by ID, since DescribeInstances fails for every ID if any of them has not registered with the EC2 service yet.
+    return {instance.id: instance for instance in ec2_connection.get_only_instances(filters={'instance-id': instance_ids})}
+
+
+def describe_db_instances(names):
+    from .database import connect_rds
+
+    rds_connection = connect_rds()
+
+    # Describe a single DB Instance by name, or every DB Instance a page at a time.
+    db_instances = []
+    marker = None
+    while True:
+        response = rds_connection.describe_db_instances(db_instance_identifier=names[0] if len(names) == 1 else None, marker=marker)
+        result = response['DescribeDBInstancesResponse']['DescribeDBInstancesResult']
+        db_instances.extend(result['DBInstances'])
+        marker = result.get('Marker')
+        if not marker:
+            break
+
+    return {db_instance['DBInstanceIdentifier']: db_instance for db_instance in db_instances \
+            if db_instance['DBInstanceIdentifier'] in names}
+
+
+def watch_instances(instances, timeout=None):
+    """
+    Watch EC2 Instances until they leave a transitional state, e.g., ``pending``.
+
+    :type instances: list
+    :param instances: A list of EC2 :class:`~boto.ec2.instance.Instance`
+        objects.
+
+    :rtype: list
+    :return: A future of each EC2 Instance's refreshed
+        :class:`~boto.ec2.instance.Instance` object.
+    """
+
+    from .compute import TRANSITIONAL_INSTANCE_STATES
+
+    poller = get_poller('EC2 Instances', describe_instances)
+    return [poller.watch(instance.id, lambda status: status.state not in TRANSITIONAL_INSTANCE_STATES, timeout=timeout) \
+            for instance in instances]
+
+
+def watch_database(name, timeout=None):
+    """
+    Watch a DB Instance until its endpoint is available.
+
+    :type name: str
+    :param name: The DB Instance identifier.
+
+    :rtype: :class:`concurrent.futures.Future`
+    :return: A future of the DB Instance, as returned by the AWS API
+        ``DescribeDBInstances`` action, containing its ``Endpoint``.
+    """
+
+    poller = get_poller('DB Instances', describe_db_instances)
+    return poller.watch(name, lambda status: bool(status.get('Endpoint')), timeout=timeout)
+
+
+def watch_instance_health(load_balancer, instances, timeout=None):
+    """
+    Watch EC2 Instances that are registered with an Elastic Load Balancer
+    (ELB) until their health is known, i.e., they are no longer
+    ``OutOfService``.
+
+    :type load_balancer: :class:`boto.ec2.elb.loadbalancer.LoadBalancer`
+    :param load_balancer: The :class:`~boto.ec2.elb.loadbalancer.LoadBalancer`
+        that the EC2 Instances are registered to.
+
+    :type instances: list
+    :param instances: A list of EC2 :class:`~boto.ec2.instance.Instance`
+        objects.
+
+    :rtype: list
+    :return: A future of each EC2 Instance's
+        :class:`~boto.ec2.elb.instancestate.InstanceState`.
+    """
+
+    def describe_instance_health(instance_ids):
+        from .compute import connect_elb
+
+        elb_connection = connect_elb()
+        return {instance_state.instance_id: instance_state \
+                for instance_state in elb_connection.describe_instance_health(load_balancer.name, instances=instance_ids)}
+
+    poller = get_poller('health of EC2 Instances under (%s)' % load_balancer.name, describe_instance_health, load_balancer.name)
+    return [poller.watch(instance.id, lambda status: status.state != 'OutOfService', timeout=timeout) for instance in instances]
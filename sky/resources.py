@@ -0,0 +1,283 @@
+"""resources.py: Serialize AWS resources by type and ID, and rehydrate them from AWS in batches."""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resource types, by boto class name, in the format: (resource type, ID attribute).
+RESOURCE_TYPES = {
+    'VPC':             ('vpc',              'id'),
+    'Subnet':          ('subnet',           'id'),
+    'RouteTable':      ('route_table',      'id'),
+    'InternetGateway': ('internet_gateway', 'id'),
+    'Instance':        ('instance',         'id'),
+    'SecurityGroup':   ('security_group',   'id'),
+    'LoadBalancer':    ('load_balancer',    'name'),
+}
+
+def get_resource_type(resource):
+    """
+    Get the resource type of a boto object.
+
+    :rtype: tuple
+    :return: A tuple in the format: (``resource_type``, ``resource_id``), or
+        ``None`` if the object is not a supported AWS resource.
+    """
+
+    if type(resource).__module__.split('.')[0] != 'boto':
+        return None
+    if type(resource).__name__ not in RESOURCE_TYPES:
+        return None
+
+    resource_type, id_attribute = RESOURCE_TYPES[type(resource).__name__]
+    return resource_type, getattr(resource, id_attribute)
+
+
+def serialize(value):
+    """
+    Serialize AWS resources, and the collections and JSON values that contain them.
+
+    AWS resources are recorded by type and ID only, so that they can be
+    verified against, and reloaded from, AWS.
+
+    :rtype: dict
+    :return: A JSON-serializable dictionary.
+
+    :raises: :class:`TypeError`, if the value can not be serialized.
+    """
+
+    resource = get_resource_type(value)
+    if resource:
+        return {'type': resource[0], 'id': resource[1]}
+    if isinstance(value, (list, tuple, set)):
+        return {'list': [serialize(item) for item in value]}
+    if isinstance(value, dict):
+        return {'dict': [[key, serialize(item)] for key, item in value.items()]}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return {'value': value}
+
+    raise TypeError('Can not serialize (%r).' % value)
+
+
+def get_resource_ids(serialized, resource_ids=None):
+    """
+    Collect the IDs of the AWS resources in a serialized value, by type.
+
+    :rtype: dict
+    :return: A dictionary mapping each resource type to a set of IDs.
+    """
+
+    resource_ids = resource_ids if resource_ids is not None else {}
+    if 'type' in serialized:
+        resource_ids.setdefault(serialized['type'], set()).add(serialized['id'])
+    elif 'list' in serialized:
+        for item in serialized['list']:
+            get_resource_ids(item, resource_ids)
+    elif 'dict' in serialized:
+        for _, item in serialized['dict']:
+            get_resource_ids(item, resource_ids)
+
+    return resource_ids
+
+
+def describe_resources(resource_type, resource_ids):
+    """
+    Describe AWS resources of a single type with one API call.
+
+    Resources are selected with ID filters, rather than IDs, so that AWS
+    omits resources that no longer exist instead of rejecting the request.
+
+    :type resource_type: str
+    :param resource_type: A resource type, e.g., ``subnet``.
+
+    :type resource_ids: list
+    :param resource_ids: The IDs of the resources to describe.
+
+    :rtype: dict
+    :return: A dictionary mapping each ID to a boto object. Resources that no
+        longer exist (e.g., terminated instances) are omitted.
+    """
+
+    from .networking import connect_vpc
+    from .compute import connect_ec2, connect_elb
+    from .database import connect_rds
+    from .security import connect_iam
+
+    resource_ids = sorted(resource_ids)
+
+    # Resources that are not boto objects (e.g., DB Instances, which are RDS responses) are listed, and selected by name.
+    if resource_type == 'db_instance':
+        resources = list_rds_resources(connect_rds().describe_db_instances, 'DescribeDBInstances', 'DBInstances', 'DBInstanceIdentifier')
+        return {name: resource for name, resource in resources.items() \
+                if name in resource_ids and resource['DBInstanceStatus'] not in ['deleting', 'failed']}
+    if resource_type == 'db_subnet_group':
+        resources = list_rds_resources(connect_rds().describe_db_subnet_groups, 'DescribeDBSubnetGroups', 'DBSubnetGroups', 'DBSubnetGroupName')
+        return {name: resource for name, resource in resources.items() if name in resource_ids}
+    if resource_type == 'db_parameter_group':
+        resources = list_rds_resources(connect_rds().describe_db_parameter_groups, 'DescribeDBParameterGroups', 'DBParameterGroups', 'DBParameterGroupName')
+        return {name: resource for name, resource in resources.items() if name in resource_ids}
+    if resource_type == 'option_group':
+        resources = list_rds_resources(connect_rds().describe_option_groups, 'DescribeOptionGroups', 'OptionGroupsList', 'OptionGroupName')
+        return {name: resource for name, resource in resources.items() if name in resource_ids}
+    if resource_type == 'role':
+        resources = list_iam_resources(connect_iam().list_roles, 'list_roles', 'roles', 'role_name')
+        return {name: resource for name, resource in resources.items() if name in resource_ids}
+    if resource_type == 'server_certificate':
+        resources = list_iam_resources(connect_iam().list_server_certs, 'list_server_certificates', 'server_certificate_metadata_list', 'server_certificate_name')
+        return {name: resource for name, resource in resources.items() if name in resource_ids}
+
+    if resource_type == 'vpc':
+        resources = connect_vpc().get_all_vpcs(filters={'vpc-id': resource_ids})
+    elif resource_type == 'subnet':
+        resources = connect_vpc().get_all_subnets(filters={'subnet-id': resource_ids})
+    elif resource_type == 'route_table':
+        resources = connect_vpc().get_all_route_tables(filters={'route-table-id': resource_ids})
+    elif resource_type == 'internet_gateway':
+        resources = connect_vpc().get_all_internet_gateways(filters={'internet-gateway-id': resource_ids})
+    elif resource_type == 'instance':
+        resources = [instance for instance in connect_ec2().get_only_instances(filters={'instance-id': resource_ids}) \
+                     if instance.state not in ['shutting-down', 'terminated']]
+    elif resource_type == 'security_group':
+        resources = connect_ec2().get_all_security_groups(filters={'group-id': resource_ids})
+    elif resource_type == 'load_balancer':
+        # Load Balancers can not be filtered, and AWS rejects requests for names that do not exist.
+        resources = [load_balancer for load_balancer in connect_elb().get_all_load_balancers() \
+                     if load_balancer.name in resource_ids]
+    else:
+        raise RuntimeError('Unsupported resource type (%s).' % resource_type)
+
+    return {get_resource_type(resource)[1]: resource for resource in resources}
+
+
+def list_rds_resources(describe, action, list_name, id_name):
+    """
+    List every RDS resource of a type, a page at a time.
+
+    :rtype: dict
+    :return: A dictionary mapping each resource name to the resource, as
+        returned by the AWS API, e.g., ``DescribeDBInstances``.
+    """
+
+    resources = {}
+    marker = None
+    while True:
+        result = describe(marker=marker)['%sResponse' % action]['%sResult' % action]
+        resources.update((resource[id_name], resource) for resource in result[list_name] or [])
+        marker = result.get('Marker')
+        if not marker:
+            return resources
+
+
+def list_iam_resources(describe, action, list_name, id_name):
+    """
+    List every IAM resource of a type, a page at a time.
+
+    :rtype: dict
+    :return: A dictionary mapping each resource name to the resource, as
+        returned by the AWS API, e.g., ``ListRoles``.
+    """
+
+    resources = {}
+    marker = None
+    while True:
+        result = describe(marker=marker)['%s_response' % action]['%s_result' % action]
+        resources.update((resource[id_name], resource) for resource in result[list_name] or [])
+        if result.get('is_truncated') != 'true':
+            return resources
+        marker = result['marker']
+
+
+def verify_resources(resources, verified=None):
+    """
+    Verify that recorded resources still exist, including resources that a
+    serialized value does not identify, e.g., a DB Instance whose RDS
+    response was serialized as a plain value.
+
+    Resources are described with one API call per resource type and region.
+
+    :type resources: list
+    :param resources: Recorded resources.
+
+        * See also: :meth:`sky.store.ResourceStore.get_resources`.
+
+    :type verified: dict
+    :param verified: An *optional* dictionary mapping resource types to sets
+        of IDs that have already been verified, and are skipped.
+
+        * See also: :func:`sky.resources.get_resource_ids`.
+
+    :rtype: bool
+    :return: ``True`` if every resource still exists.
+    """
+
+    import boto
+    from .state import set_region, reset_region
+
+    verified = verified or {}
+
+    # Group the resources that have not been verified yet by region and type.
+    batches = {}
+    for resource in resources:
+        if resource['id'] not in verified.get(resource['type'], ()):
+            batches.setdefault((resource.get('region'), resource['type']), set()).add(resource['id'])
+
+    for (region, resource_type), ids in batches.items():
+        token = set_region(region)
+        try:
+            described = describe_resources(resource_type, ids)
+        except boto.exception.BotoServerError as error:
+            logger.warning('Could not describe %s resource(s) (%s): %s' % (resource_type, ', '.join(sorted(ids)), error))
+            return False
+        finally:
+            reset_region(token)
+
+        missing = ids - set(described)
+        if missing:
+            logger.info('AWS resource(s) no longer exist (%s).' % ', '.join(sorted(missing)))
+            return False
+
+    return True
+
+
+def rehydrate(serialized):
+    """
+    Reload a serialized value, and the AWS resources that it contains, from AWS.
+
+    Resources are described with one API call per resource type, rather than
+    one per resource.
+
+    :type serialized: dict
+    :param serialized: A serialized value.
+
+        * See also: :func:`sky.resources.serialize`.
+
+    :rtype: object
+    :return: The live value, or ``None`` if any AWS resource no longer exists.
+    """
+
+    import boto
+
+    # Describe each resource type in a single batch.
+    described = {}
+    for resource_type, ids in get_resource_ids(serialized).items():
+        try:
+            resources = describe_resources(resource_type, ids)
+        except boto.exception.BotoServerError as error:
+            logger.warning('Could not describe %s resource(s) (%s): %s' % (resource_type, ', '.join(sorted(ids)), error))
+            return None
+        missing = ids - set(resources)
+        if missing:
+            logger.info('AWS resource(s) no longer exist (%s).' % ', '.join(sorted(missing)))
+            return None
+        described[resource_type] = resources
+
+    def load(serialized):
+        if 'type' in serialized:
+            return described[serialized['type']][serialized['id']]
+        if 'list' in serialized:
+            return [load(item) for item in serialized['list']]
+        if 'dict' in serialized:
+            return {key: load(item) for key, item in serialized['dict']}
+        return serialized['value']
+
+    return load(serialized)
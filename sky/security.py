@@ -3,6 +3,8 @@ import random
 import logging
 import boto
 from .state import config, mode
+from .connections import get_connection
+from .store import record_resource
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +16,7 @@ def connect_iam():
     :return: An :class:`~boto.s3.connection.S3Connection` object.
     """
 
-    logger.debug('Connecting to the Amazon Identity and Access Management (Amazon IAM) service.')
-    iam = boto.connect_iam(aws_access_key_id=config['AWS_ACCESS_KEY_ID'],
-                           aws_secret_access_key=config['AWS_SECRET_ACCESS_KEY'])
-    logger.debug('Connected to Amazon IAM.')
-
-    return iam
+    return get_connection('iam')
 
 
 def delete_role(role_name):
@@ -132,6 +129,7 @@ def create_role(inline_policies):
                    ['create_role_result']\
                    ['role']
     logger.info('Created Role (%s).' % role_name)
+    record_resource('role', role_name, name=role_name)
 
     # Set up Instance Profile.
     instance_profile_name = '-'.join(['role', config['PROJECT_NAME'], config['ENVIRONMENT']])
@@ -239,6 +237,7 @@ def upload_ssl_certificate(public_key, private_key, certificate_chain=None, name
         logger.info('Uploading server certificate (%s).' % name)
         response = iam_connection.upload_server_cert(name, public_key, private_key, certificate_chain)
         logger.info('Uploaded server certificate (%s).' % name)
+        record_resource('server_certificate', name, name=name)
         server_certificate_id = response['upload_server_certificate_response']\
                                         ['upload_server_certificate_result']\
                                         ['server_certificate_metadata']\
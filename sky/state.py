@@ -1,7 +1,10 @@
 import os
 import sys
-from enum import Enum
 import logging
+import contextvars
+from enum import Enum
+from contextlib import contextmanager
+from collections.abc import MutableMapping
 
 logger = logging.getLogger(__name__)
 
@@ -14,17 +17,18 @@ class ReadyObject(dict):
         try:
             value = self[attr]
         except KeyError as error:
-            logger.error('%s is not available.')
+            logger.error('%s is not available.' % attr)
+            raise AttributeError(attr)
         return value
 
     def __setattr__(self, key, value):
         self[key] = value
 
-ready = ReadyObject()
-
 mode = Enum('Mode', 'NONE EPHEMERAL PERMANENT CUSTOM')
 
-config = {
+DEFAULT_CONFIG = {
+    'COMMAND':               None,
+    'TARGETS':               ['all'],
     'PROJECT_NAME':          None,
     'PROJECT_DIRECTORY':     None,
     'ENVIRONMENT':           None,
@@ -32,4 +36,209 @@ config = {
     'AWS_ACCESS_KEY_ID':     None,
     'AWS_SECRET_ACCESS_KEY': None,
     'CREATION_MODE':         None,
+    'JOBS':                  1,
+    'ENGINE':                'threads',
+    'FORCE':                 False,
+    'DRY_RUN':               False,
+    'WATCH':                 False,
+    'RESUME':                False,
+    'CONNECTION_TIMEOUT':    60,
+    'REGION':                None,
+    'REGIONS':               [],
 }
+
+class Context(object):
+    """
+    The state of a single deployment.
+
+    A Context carries a deployment's configuration (credentials, environment,
+    etc.), its ``ready`` registry, the resources captured from each
+    Infrastructure object that it has built and, while the deployment is being
+    planned, its :class:`sky.planner.Plan`. The current Context is propagated
+    through :mod:`contextvars`, so that separate deployments, e.g., in separate
+    threads, do not share state.
+
+    * See also: :func:`sky.state.deployment`.
+    """
+
+    def __init__(self, **settings):
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(settings)
+        self.ready = ReadyObject()
+        self.resources = {}
+        self.results = {}
+        self.plan = None
+
+_default_context = Context()
+_context = contextvars.ContextVar('context', default=None)
+
+# The creation mode is set by each Infrastructure object while it is being built, so it is tracked separately from
+# the rest of the configuration, which is shared by every Infrastructure object in a deployment.
+_creation_mode = contextvars.ContextVar('creation_mode', default=None)
+
+# The name of the Infrastructure object that is being built, so that the resources that it creates can be attributed to it.
+_current_node = contextvars.ContextVar('current_node', default=None)
+
+# A region passed to a single function call (e.g., ``create_network(region='eu-west-1')``), which overrides the
+# deployment's region for the AWS calls made during that call.
+_region = contextvars.ContextVar('region', default=None)
+
+def get_context():
+    """
+    Get the current deployment Context.
+
+    :rtype: :class:`sky.state.Context`
+    :return: The current Context, or the process-wide default Context if no
+        deployment is active.
+    """
+
+    return _context.get() or _default_context
+
+
+@contextmanager
+def deployment(context=None, **settings):
+    """
+    Activate a deployment Context for the duration of a ``with`` block.
+
+    :type context: :class:`sky.state.Context`
+    :param context: An *optional* Context to activate. A new Context will be
+        created from ``settings``, if one is not specified.
+
+    :type settings: dict
+    :param settings: Configuration values for a new Context, e.g.,
+        ``ENVIRONMENT='staging'``.
+
+    :rtype: :class:`sky.state.Context`
+    :return: The active Context.
+    """
+
+    context = context or Context(**settings)
+    token = _context.set(context)
+    try:
+        yield context
+    finally:
+        _context.reset(token)
+
+
+def set_creation_mode(creation_mode):
+    """
+    Set the creation mode in the current execution context.
+
+    :rtype: :class:`contextvars.Token`
+    :return: A token that restores the previous creation mode when passed to
+        :func:`sky.state.reset_creation_mode`.
+    """
+
+    return _creation_mode.set(creation_mode)
+
+
+def reset_creation_mode(token):
+    _creation_mode.reset(token)
+
+
+def get_current_node():
+    """
+    Get the name of the Infrastructure object that is being built in the current execution context.
+
+    :rtype: str
+    :return: The node name, or ``None`` outside of an Infrastructure object.
+    """
+
+    return _current_node.get()
+
+
+def set_current_node(name):
+    return _current_node.set(name)
+
+
+def reset_current_node(token):
+    _current_node.reset(token)
+
+
+def get_region():
+    """
+    Get the AWS region of the current execution context.
+
+    :rtype: str
+    :return: The region of the current function call, if one was specified,
+        or else the deployment's region. ``None`` means boto's default region.
+    """
+
+    return _region.get() or get_context().config['REGION']
+
+
+def set_region(region):
+    return _region.set(region)
+
+
+def reset_region(token):
+    _region.reset(token)
+
+
+class ConfigObject(MutableMapping):
+    """
+    A view of the current deployment Context's configuration.
+    """
+
+    def __getitem__(self, key):
+        if key == 'CREATION_MODE':
+            return _creation_mode.get()
+        return get_context().config[key]
+
+    def __setitem__(self, key, value):
+        if key == 'CREATION_MODE':
+            _creation_mode.set(value)
+        else:
+            get_context().config[key] = value
+
+    def __delitem__(self, key):
+        del get_context().config[key]
+
+    def __iter__(self):
+        return iter(get_context().config)
+
+    def __len__(self):
+        return len(get_context().config)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ReadyView(MutableMapping):
+    """
+    A view of the current deployment Context's ``ready`` registry.
+    """
+
+    def __getattr__(self, attr):
+        return getattr(get_context().ready, attr)
+
+    def __setattr__(self, attr, value):
+        get_context().ready[attr] = value
+
+    def __delattr__(self, attr):
+        try:
+            del get_context().ready[attr]
+        except KeyError:
+            raise AttributeError(attr)
+
+    def __getitem__(self, key):
+        return get_context().ready[key]
+
+    def __setitem__(self, key, value):
+        get_context().ready[key] = value
+
+    def __delitem__(self, key):
+        del get_context().ready[key]
+
+    def __iter__(self):
+        return iter(get_context().ready)
+
+    def __len__(self):
+        return len(get_context().ready)
+
+    def __repr__(self):
+        return repr(get_context().ready)
+
+ready = ReadyView()
+
+config = ConfigObject()
@@ -3,6 +3,7 @@ import random
 import logging
 import boto
 from .state import config
+from .connections import get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +15,7 @@ def connect_s3():
     :return: An :class:`~boto.iam.connection.IAMConnection` object.
     """
 
-    logger.debug('Connecting to the Amazon Simple Storage Service (Amazon S3).')
-    s3 = boto.connect_s3(aws_access_key_id=config['AWS_ACCESS_KEY_ID'],
-                         aws_secret_access_key=config['AWS_SECRET_ACCESS_KEY'])
-    logger.debug('Connected to Amazon S3.')
-
-    return s3
+    return get_connection('s3')
 
 
 def create_bucket():
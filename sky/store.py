@@ -0,0 +1,342 @@
+"""store.py: A persistent, local record of the AWS resources that Sky has created."""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from .state import config, get_current_node
+from .connections import DEFAULT_REGION, get_region_name
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS resources (
+    environment TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    name        TEXT,
+    parent      TEXT,
+    node        TEXT,
+    region      TEXT,
+    adopted     INTEGER NOT NULL DEFAULT 0,
+    created     REAL NOT NULL,
+    PRIMARY KEY (environment, type, id)
+);
+CREATE INDEX IF NOT EXISTS resources_by_name ON resources (environment, type, name);
+CREATE INDEX IF NOT EXISTS resources_by_parent ON resources (environment, type, parent);
+CREATE INDEX IF NOT EXISTS resources_by_node ON resources (environment, node);
+
+CREATE TABLE IF NOT EXISTS nodes (
+    environment TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    outputs     TEXT NOT NULL,
+    PRIMARY KEY (environment, name)
+);
+
+CREATE TABLE IF NOT EXISTS journal (
+    environment TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    outputs     TEXT NOT NULL,
+    completed   REAL NOT NULL,
+    PRIMARY KEY (environment, name)
+);
+'''
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+class ResourceStore(object):
+    """
+    An SQLite database of the resources created by each Infrastructure object,
+    of the outputs of each Infrastructure object's last successful build, and
+    of the nodes completed by the current (or last unfinished) deployment.
+
+    Resources are indexed by environment, type, name, parent (e.g., the VPC of
+    a Subnet) and node, so that lookups are local reads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+            self.migrate()
+
+    def migrate(self):
+        columns = [row['name'] for row in self._connection.execute('PRAGMA table_info(resources)')]
+        if 'region' not in columns:
+            # Add the region of each resource, which is unknown for the resources recorded before it was.
+            self._connection.execute('ALTER TABLE resources ADD COLUMN region TEXT')
+
+            # Move the records of the default region to the bare environment scope.
+            suffix = '@%s' % DEFAULT_REGION
+            for table in ['resources', 'nodes', 'journal']:
+                self._connection.execute('UPDATE OR REPLACE %s SET environment = substr(environment, 1, length(environment) - ?) '
+                                         'WHERE environment LIKE ?' % table, (len(suffix), '%' + suffix))
+            logger.debug('Added regions to the resource store (%s).' % self.path)
+
+        if 'adopted' not in columns:
+            # The resources recorded before adoption was are treated as created.
+            self._connection.execute('ALTER TABLE resources ADD COLUMN adopted INTEGER NOT NULL DEFAULT 0')
+            logger.debug('Added adoption to the resource store (%s).' % self.path)
+
+    def record(self, resource_type, resource_id, name=None, parent=None, node=None, region=None, adopted=False, environment=None):
+        """
+        Record a resource.
+
+        A resource that was recorded as created stays created if it is
+        recorded again as adopted, e.g., when a later deployment finds it.
+
+        :type resource_type: str
+        :param resource_type: A resource type, e.g., ``subnet``.
+
+            * See also: :data:`sky.resources.RESOURCE_TYPES`.
+
+        :type resource_id: str
+        :param resource_id: The resource's ID.
+
+        :type region: str
+        :param region: The AWS region that the resource was created in.
+
+        :type adopted: bool
+        :param adopted: Specifies whether the resource existed before it was
+            found by Sky, rather than created by Sky.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute('INSERT INTO resources (environment, type, id, name, parent, node, region, adopted, created) '
+                                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                                     'ON CONFLICT (environment, type, id) DO UPDATE SET name = excluded.name, parent = excluded.parent, '
+                                     'node = excluded.node, region = excluded.region, adopted = min(adopted, excluded.adopted), '
+                                     'created = excluded.created',
+                                     (environment or '', resource_type, resource_id, name, parent, node, region, int(adopted), time.time()))
+        logger.debug('Recorded %s (%s).' % (resource_type, resource_id))
+
+    def lookup(self, resource_type, name=None, parent=None, node=None, region=None, environment=None):
+        """
+        Look up recorded resources.
+
+        Resources whose region was not recorded match any region.
+
+        :rtype: list
+        :return: The matching resource IDs, from the oldest to the most recently
+            recorded.
+        """
+
+        query = 'SELECT id FROM resources WHERE environment = ? AND type = ?'
+        parameters = [environment or '', resource_type]
+        for column, value in [('name', name), ('parent', parent), ('node', node)]:
+            if value is not None:
+                query += ' AND %s = ?' % column
+                parameters.append(value)
+        if region is not None:
+            query += ' AND (region = ? OR region IS NULL)'
+            parameters.append(region)
+
+        with self._lock:
+            rows = self._connection.execute(query + ' ORDER BY created', parameters).fetchall()
+        return [row['id'] for row in rows]
+
+    def get_resources(self, environment=None, node=None):
+        """
+        Get recorded resources.
+
+        :rtype: list
+        :return: A list of dictionaries with the ``type``, ``id``, ``name``,
+            ``parent``, ``node``, ``region`` and ``adopted`` flag of each
+            resource, from the oldest to the most recently recorded.
+        """
+
+        query = 'SELECT type, id, name, parent, node, region, adopted FROM resources WHERE environment = ?'
+        parameters = [environment or '']
+        if node is not None:
+            query += ' AND node = ?'
+            parameters.append(node)
+
+        with self._lock:
+            rows = self._connection.execute(query + ' ORDER BY created', parameters).fetchall()
+        return [dict(row, adopted=bool(row['adopted'])) for row in rows]
+
+    def forget(self, resource_type, resource_ids, environment=None):
+        """
+        Remove resources from the store, e.g., once they no longer exist.
+        """
+
+        with self._lock, self._connection:
+            self._connection.executemany('DELETE FROM resources WHERE environment = ? AND type = ? AND id = ?',
+                                         [(environment or '', resource_type, resource_id) for resource_id in resource_ids])
+
+    def get_node(self, name, environment=None):
+        """
+        Get the fingerprint and serialized outputs of a node's last successful build.
+
+        :rtype: dict
+        :return: A dictionary with the ``fingerprint`` and ``outputs`` of the
+            node, or ``None`` if it has not been recorded.
+        """
+
+        with self._lock:
+            row = self._connection.execute('SELECT fingerprint, outputs FROM nodes WHERE environment = ? AND name = ?',
+                                           (environment or '', name)).fetchone()
+        if not row:
+            return None
+        return {'fingerprint': row['fingerprint'], 'outputs': json.loads(row['outputs'])}
+
+    def record_node(self, name, fingerprint, outputs, environment=None):
+        """
+        Record a node's successful build.
+
+        :type outputs: dict
+        :param outputs: The node's serialized resources and result.
+
+            * See also: :func:`sky.resources.serialize`.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO nodes (environment, name, fingerprint, outputs) VALUES (?, ?, ?, ?)',
+                                     (environment or '', name, fingerprint, json.dumps(outputs)))
+        logger.debug('Recorded (%s) fingerprint (%s).' % (name, fingerprint))
+
+    def forget_node(self, name, environment=None):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM nodes WHERE environment = ? AND name = ?', (environment or '', name))
+
+    def journal_node(self, name, fingerprint, outputs, environment=None):
+        """
+        Record that a node was completed by the current deployment.
+
+        Unlike :meth:`record_node`, every node is journaled, including
+        EPHEMERAL nodes, so that a failed deployment can be resumed.
+
+        :type outputs: dict
+        :param outputs: The node's serialized resources and result, or
+            ``None`` if they could not be serialized.
+
+            * See also: :func:`sky.resources.serialize`.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO journal (environment, name, fingerprint, outputs, completed) '
+                                     'VALUES (?, ?, ?, ?, ?)',
+                                     (environment or '', name, fingerprint, json.dumps(outputs), time.time()))
+        logger.debug('Journaled (%s).' % name)
+
+    def get_journal(self, environment=None):
+        """
+        Get the nodes that were completed by the last unfinished deployment.
+
+        :rtype: dict
+        :return: A dictionary mapping each node name to a dictionary with the
+            ``fingerprint`` and ``outputs`` of the node.
+        """
+
+        with self._lock:
+            rows = self._connection.execute('SELECT name, fingerprint, outputs FROM journal WHERE environment = ? '
+                                            'ORDER BY completed', (environment or '',)).fetchall()
+        return {row['name']: {'fingerprint': row['fingerprint'], 'outputs': json.loads(row['outputs'])} for row in rows}
+
+    def clear_journal(self, environment=None):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM journal WHERE environment = ?', (environment or '',))
+
+
+def get_store(path=None):
+    """
+    Get the resource store of the current project.
+
+    :type path: str
+    :param path: An *optional* database path. The project's state directory is
+        used, if one is not specified.
+
+    :rtype: :class:`sky.store.ResourceStore`
+    :return: A ResourceStore, which is shared by every thread.
+    """
+
+    if not path:
+        from .utils import get_state_path
+        path = get_state_path('state.db')
+    path = os.path.abspath(path)
+
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ResourceStore(path)
+        return _stores[path]
+
+
+def get_scope():
+    """
+    Get the scope of the current deployment's records in the resource store.
+
+    Records are kept separately for each environment and, when the deployment
+    is not in the default region, each deployment region. Functions that are
+    called with their own ``region`` record into the deployment's scope, with
+    the region of each resource, so that the deployment can destroy them.
+
+    :rtype: str
+    :return: The environment, e.g., ``staging``, or the environment and region,
+        e.g., ``staging@eu-west-1``.
+    """
+
+    region = config['REGION']
+    return '%s@%s' % (config['ENVIRONMENT'], region) if region and region != DEFAULT_REGION else config['ENVIRONMENT']
+
+
+def record_resource(resource_type, resource_id, name=None, parent=None, adopted=False):
+    """
+    Record a resource that was created, or adopted, by the current
+    Infrastructure object, in the current environment.
+
+    Adopted resources, i.e., existing resources that were found rather than
+    created, are only deleted by a forced teardown.
+
+    A resource that can not be recorded is logged, rather than raised, since
+    the store only speeds up later lookups.
+    """
+
+    try:
+        get_store().record(resource_type, resource_id, name=name, parent=parent, node=get_current_node(),
+                           region=get_region_name(), adopted=adopted, environment=get_scope())
+    except (OSError, sqlite3.Error) as error:
+        logger.warning('Could not record %s (%s): %s' % (resource_type, resource_id, error))
+
+
+def find_resources(resource_type, name=None, parent=None):
+    """
+    Find recorded resources in the current environment, and verify that they still exist.
+
+    Recorded resources are verified with a single describe call. Resources that
+    no longer exist are removed from the store.
+
+    :type resource_type: str
+    :param resource_type: A resource type, e.g., ``subnet``.
+
+    :rtype: list
+    :return: The live boto objects, from the oldest to the most recently
+        recorded.
+    """
+
+    from .resources import describe_resources
+
+    try:
+        store = get_store()
+        resource_ids = store.lookup(resource_type, name=name, parent=parent, region=get_region_name(), environment=get_scope())
+    except (OSError, sqlite3.Error) as error:
+        logger.warning('Could not read the resource store: %s' % error)
+        return []
+
+    if not resource_ids:
+        return []
+
+    resources = describe_resources(resource_type, resource_ids)
+    missing = [resource_id for resource_id in resource_ids if resource_id not in resources]
+    if missing:
+        logger.debug('Forgetting %s resource(s) that no longer exist (%s).' % (resource_type, ', '.join(missing)))
+        store.forget(resource_type, missing, environment=get_scope())
+
+    return [resources[resource_id] for resource_id in resource_ids if resource_id in resources]
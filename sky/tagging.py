@@ -0,0 +1,163 @@
+"""tagging.py: Defer EC2 tags to the end of a block, then create them together."""
+
+import logging
+import threading
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from .connections import get_connection, get_region_name
+from .waiter import Waiter
+
+logger = logging.getLogger(__name__)
+
+# Error codes returned while a resource has not registered with its service yet, e.g., InvalidVpcID.NotFound.
+NOT_FOUND_CODES = ['InvalidID', '*.NotFound']
+
+# The maximum number of resource IDs in a single CreateTags request.
+MAX_RESOURCES = 1000
+
+# The maximum number of CreateTags requests in flight at once, when a batch is flushed.
+MAX_WORKERS = 8
+
+_batch = contextvars.ContextVar('tag_batch', default=None)
+
+class TagBatch(object):
+    """
+    Tags that are waiting to be created, grouped by region and by tag set.
+
+    CreateTags sets the same tags on every resource in a request, so only
+    resources with identical tag sets share a request. Resources that are
+    named individually (e.g., by their ``Name`` tag) need a request each;
+    those requests are made concurrently when the batch is flushed.
+
+    A batch may be shared by the threads that run in copies of the context
+    that created it.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, resource_ids, tags):
+        """
+        Add tags to one or more resources, when the batch is flushed.
+
+        :type resource_ids: list
+        :param resource_ids: The IDs of the resources to tag.
+
+        :type tags: dict
+        :param tags: The tags, by key.
+        """
+
+        key = (get_region_name(), tuple(sorted(tags.items())))
+        with self._lock:
+            pending = self.pending.setdefault(key, [])
+            pending.extend(resource_id for resource_id in resource_ids if resource_id not in pending)
+
+    def flush(self):
+        """
+        Create every pending tag.
+
+        :rtype: int
+        :return: The number of CreateTags requests that were made.
+        """
+
+        with self._lock:
+            pending, self.pending = self.pending, {}
+
+        requests = [(resource_ids[start:start + MAX_RESOURCES], dict(tags), region) for (region, tags), resource_ids in pending.items() \
+                    for start in range(0, len(resource_ids), MAX_RESOURCES)]
+        if not requests:
+            return 0
+
+        # Make the requests concurrently, since resources with distinct tags (e.g., names) need a request each.
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(requests))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, create_tags, resource_ids, tags, region=region) \
+                       for resource_ids, tags, region in requests]
+            for future in futures:
+                future.result()
+
+        logger.debug('Tagged %d resource(s) with %d request(s).' % (sum(len(resource_ids) for resource_ids in pending.values()), len(requests)))
+        return len(requests)
+
+
+def create_tags(resource_ids, tags, region=None):
+    """
+    Tag one or more EC2 resources now, retrying while any of them has not
+    registered with its service yet.
+
+    :type resource_ids: list
+    :param resource_ids: The IDs of the resources to tag.
+
+    :type tags: dict
+    :param tags: The tags, by key.
+
+    :type region: str
+    :param region: An *optional* region name. The region of the current
+        execution context is used, if one is not specified.
+
+    :rtype: bool
+    :return: ``True``, once the resources have been tagged.
+    """
+
+    ec2_connection = get_connection('ec2', region=region)
+
+    # CreateTags fails as a whole if any resource is not found, and is idempotent, so the whole request is retried.
+    return Waiter('tags of (%s)' % ', '.join(resource_ids), retry=NOT_FOUND_CODES).until(ec2_connection.create_tags, resource_ids, tags)
+
+
+def tag(resource_ids, tags):
+    """
+    Tag one or more EC2 resources, as part of the current batch if there is
+    one, or otherwise now.
+
+    * See also: :func:`sky.tagging.batched_tags`.
+
+    :type resource_ids: list
+    :param resource_ids: The IDs of the resources to tag.
+
+    :type tags: dict
+    :param tags: The tags, by key.
+    """
+
+    batch = _batch.get()
+    if batch is None:
+        create_tags(resource_ids, tags)
+    else:
+        batch.add(resource_ids, tags)
+
+
+@contextlib.contextmanager
+def batched_tags():
+    """
+    Defer the tags created with :func:`sky.tagging.tag` until the end of the
+    block, then create them concurrently. Nested blocks join the outermost
+    batch.
+
+    Tags are also created if the block raises an exception, so that the
+    resources that were created before the failure can be found by their
+    tags, e.g., by the next deployment. Resources should not be looked up by
+    tags that were added in the same block.
+
+    :rtype: :class:`sky.tagging.TagBatch`
+    """
+
+    batch = _batch.get()
+    if batch is not None:
+        yield batch
+        return
+
+    batch = TagBatch()
+    token = _batch.set(batch)
+    try:
+        yield batch
+    except BaseException:
+        _batch.reset(token)
+        try:
+            batch.flush()
+        except Exception as error:
+            logger.error('Could not tag the resources that were created before a failure (%s).' % error)
+        raise
+
+    _batch.reset(token)
+    batch.flush()
@@ -0,0 +1,340 @@
+"""teardown.py: Delete the AWS resources that Sky has recorded, in dependency order."""
+
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from .state import set_region, reset_region
+from .store import get_store
+from .waiter import Waiter
+
+logger = logging.getLogger(__name__)
+
+# The order in which each node's resources are deleted, from the most dependent resource type to the least.
+DELETION_ORDER = [
+    'instance',
+    'load_balancer',
+    'db_instance',
+    'db_subnet_group',
+    'option_group',
+    'db_parameter_group',
+    'security_group',
+    'subnet',
+    'route_table',
+    'internet_gateway',
+    'vpc',
+    'server_certificate',
+    'role',
+]
+
+# Error codes returned while a resource is still in use by a resource that is being deleted.
+RETRY_CODES = [
+    'DependencyViolation',
+    'ResourceInUse',
+    'DeleteConflict',
+    'InvalidDBInstanceState',
+    'InvalidDBSubnetGroupStateFault',
+    'InvalidDBParameterGroupState',
+    'InvalidOptionGroupStateFault',
+]
+
+# Error codes returned for resources that have already been deleted.
+NOT_FOUND_CODES = [
+    'NoSuchEntity',
+    'LoadBalancerNotFound',
+    'DBInstanceNotFound',
+    'DBSubnetGroupNotFoundFault',
+    'DBParameterGroupNotFound',
+    'OptionGroupNotFoundFault',
+]
+
+MAX_WORKERS = 16
+
+def is_not_found(error):
+    code = getattr(error, 'error_code', None) or ''
+    return code in NOT_FOUND_CODES or code.endswith('.NotFound')
+
+
+def retry(function, description, timeout=900, interval=2, max_interval=30):
+    """
+    Call a function that deletes a resource, until the resources that depend on it are gone.
+
+    Calls that fail with a dependency violation are retried with exponential,
+    jittered backoff, since dependent resources (e.g., the network interfaces
+    of a terminated EC2 Instance or of a deleted ELB) are released by AWS some
+    time after they are deleted.
+
+    :type function: callable
+    :param function: A callable that deletes the resource.
+
+    :type description: str
+    :param description: The resource's description, for logging.
+
+    :type timeout: int
+    :param timeout: The maximum number of seconds to retry for.
+
+    :rtype: bool
+    :return: ``True`` if the resource was deleted, or ``False`` if it no longer
+        existed.
+
+    :raises: :class:`sky.waiter.WaiterError`, if the resource is still in use
+        after ``timeout``, or :class:`boto.exception.BotoServerError`, if the
+        resource could not be deleted.
+    """
+
+    waiter = Waiter(description, retry=RETRY_CODES, ignore=NOT_FOUND_CODES + ['*.NotFound'],
+                    timeout=timeout, delay=interval, max_delay=max_interval)
+    waiter.call(function)
+    if waiter.ignored:
+        logger.info('(%s) no longer exists.' % description)
+        return False
+    return True
+
+
+def wait_until(condition, description, timeout=1800, interval=5):
+    """
+    Wait for a condition to become true.
+
+    :raises: :class:`sky.waiter.WaiterError`, if the condition is not met in time.
+    """
+
+    Waiter(description, timeout=timeout, delay=interval, max_delay=interval * 4).until(condition)
+
+
+def delete_instances(resources):
+    from .compute import connect_ec2
+
+    ec2_connection = connect_ec2()
+    instance_ids = [resource['id'] for resource in resources]
+
+    # Terminate every EC2 Instance with a single call, then wait for all of them, so that their network interfaces are released.
+    live_ids = [instance.id for instance in ec2_connection.get_only_instances(filters={'instance-id': instance_ids}) \
+                if instance.state != 'terminated']
+    if live_ids:
+        logger.info('Terminating (%s).' % ', '.join(live_ids))
+        ec2_connection.terminate_instances(instance_ids=live_ids)
+
+        def terminated():
+            instances = ec2_connection.get_only_instances(filters={'instance-id': live_ids})
+            return all(instance.state == 'terminated' for instance in instances)
+
+        wait_until(terminated, 'termination of %s' % ', '.join(live_ids))
+        logger.info('Terminated (%s).' % ', '.join(live_ids))
+
+    return instance_ids
+
+
+def delete_load_balancer(resource):
+    from .compute import connect_elb
+
+    elb_connection = connect_elb()
+    retry(lambda: elb_connection.delete_load_balancer(resource['id']), resource['id'])
+
+
+def delete_db_instance(resource):
+    import boto
+    from .database import connect_rds
+
+    rds_connection = connect_rds()
+    name = resource['id']
+    if not retry(lambda: rds_connection.delete_db_instance(name, skip_final_snapshot=True), name):
+        return
+
+    # Wait for the Database to be deleted, since its DB Subnet Group can not be deleted until then.
+    def deleted():
+        try:
+            rds_connection.describe_db_instances(db_instance_identifier=name)
+        except boto.exception.BotoServerError as error:
+            if is_not_found(error):
+                return True
+            raise
+        return False
+
+    wait_until(deleted, 'deletion of %s' % name, interval=15)
+
+
+def delete_db_subnet_group(resource):
+    from .database import connect_rds
+
+    rds_connection = connect_rds()
+    retry(lambda: rds_connection.delete_db_subnet_group(resource['id']), resource['id'])
+
+
+def delete_option_group(resource):
+    from .database import connect_rds
+
+    rds_connection = connect_rds()
+    retry(lambda: rds_connection.delete_option_group(resource['id']), resource['id'])
+
+
+def delete_db_parameter_group(resource):
+    from .database import connect_rds
+
+    rds_connection = connect_rds()
+    retry(lambda: rds_connection.delete_db_parameter_group(resource['id']), resource['id'])
+
+
+def delete_security_group(resource):
+    from .compute import connect_ec2
+
+    ec2_connection = connect_ec2()
+    retry(lambda: ec2_connection.delete_security_group(group_id=resource['id']), resource['id'])
+
+
+def delete_subnet(resource):
+    from .networking import connect_vpc
+
+    vpc_connection = connect_vpc()
+    retry(lambda: vpc_connection.delete_subnet(resource['id']), resource['id'])
+
+
+def delete_route_table(resource):
+    from .networking import connect_vpc
+
+    vpc_connection = connect_vpc()
+
+    # Disassociate the Route Table from its Subnets, which may belong to an Infrastructure object that is kept.
+    for route_table in vpc_connection.get_all_route_tables(filters={'route-table-id': [resource['id']]}):
+        for association in route_table.associations:
+            if not association.main:
+                retry(lambda: vpc_connection.disassociate_route_table(association.id), association.id)
+
+    retry(lambda: vpc_connection.delete_route_table(resource['id']), resource['id'])
+
+
+def delete_internet_gateway(resource):
+    from .networking import connect_vpc
+
+    vpc_connection = connect_vpc()
+
+    # Detach the Internet Gateway, which fails while public addresses are still mapped in its VPC.
+    for internet_gateway in vpc_connection.get_all_internet_gateways(filters={'internet-gateway-id': [resource['id']]}):
+        for attachment in internet_gateway.attachments:
+            retry(lambda: vpc_connection.detach_internet_gateway(resource['id'], attachment.vpc_id), resource['id'])
+
+    retry(lambda: vpc_connection.delete_internet_gateway(resource['id']), resource['id'])
+
+
+def delete_vpc(resource):
+    from .networking import connect_vpc
+
+    vpc_connection = connect_vpc()
+    retry(lambda: vpc_connection.delete_vpc(resource['id']), resource['id'])
+
+
+def delete_server_certificate(resource):
+    from .security import connect_iam
+
+    iam_connection = connect_iam()
+    retry(lambda: iam_connection.delete_server_cert(resource['id']), resource['id'])
+
+
+def delete_role(resource):
+    from .security import delete_role
+
+    delete_role(resource['id'])
+
+
+# Functions that delete a single resource of each type. EC2 Instances are deleted in batches.
+DELETE_FUNCTIONS = {
+    'load_balancer':      delete_load_balancer,
+    'db_instance':        delete_db_instance,
+    'db_subnet_group':    delete_db_subnet_group,
+    'option_group':       delete_option_group,
+    'db_parameter_group': delete_db_parameter_group,
+    'security_group':     delete_security_group,
+    'subnet':             delete_subnet,
+    'route_table':        delete_route_table,
+    'internet_gateway':   delete_internet_gateway,
+    'vpc':                delete_vpc,
+    'server_certificate': delete_server_certificate,
+    'role':               delete_role,
+}
+
+def delete_resources(resource_type, resources):
+    """
+    Delete recorded resources of a single type, in parallel.
+
+    :type resource_type: str
+    :param resource_type: A resource type, e.g., ``subnet``.
+
+    :type resources: list
+    :param resources: Recorded resources.
+
+        * See also: :meth:`sky.store.ResourceStore.get_resources`.
+
+    :rtype: list
+    :return: The IDs of the deleted resources.
+    """
+
+    if resource_type == 'instance':
+        return delete_instances(resources)
+
+    delete = DELETE_FUNCTIONS[resource_type]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(resources))) as pool:
+        # Run each deletion in a copy of the current context, so that it inherits the deployment Context.
+        futures = [pool.submit(contextvars.copy_context().run, delete, resource) for resource in resources]
+        for future in futures:
+            future.result()
+
+    return [resource['id'] for resource in resources]
+
+
+def destroy_node(name, environment=None, force=False):
+    """
+    Delete the resources that an Infrastructure object created, then forget
+    the Infrastructure object's last build.
+
+    Resources are deleted one type at a time, in :data:`DELETION_ORDER`, and
+    resources of the same type are deleted in parallel, in the region that
+    each was recorded in. Adopted resources, i.e., existing resources that
+    the Infrastructure object found rather than created, are kept unless
+    ``force`` is set.
+
+    :type name: str
+    :param name: The name of the Infrastructure object.
+
+    :type force: bool
+    :param force: Specifies whether to delete adopted resources too.
+
+    :rtype: int
+    :return: The number of resources that were deleted.
+    """
+
+    store = get_store()
+    resources = {}
+    adopted = {}
+    for resource in store.get_resources(environment=environment, node=name):
+        (adopted if resource['adopted'] and not force else resources).setdefault(resource['type'], []).append(resource)
+
+    # Keep the resources that existed before the Infrastructure object found them, but stop tracking them.
+    if adopted:
+        logger.warning('Keeping %d adopted resource(s) of (%s). Use --force to delete them.' % (sum(len(kept) for kept in adopted.values()), name))
+        for resource_type, kept in adopted.items():
+            store.forget(resource_type, [resource['id'] for resource in kept], environment=environment)
+
+    unsupported = set(resources) - set(DELETION_ORDER)
+    if unsupported:
+        raise RuntimeError('Can not delete unsupported resource type(s) (%s) of (%s).' % (', '.join(sorted(unsupported)), name))
+
+    deleted = 0
+    for resource_type in [resource_type for resource_type in DELETION_ORDER if resource_type in resources]:
+        logger.info('Deleting %d %s resource(s) of (%s).' % (len(resources[resource_type]), resource_type, name))
+
+        # Group the resources by region. Resources whose region was not recorded are deleted in the deployment's region.
+        regions = {}
+        for resource in resources[resource_type]:
+            regions.setdefault(resource.get('region'), []).append(resource)
+
+        for region, regional_resources in regions.items():
+            token = set_region(region)
+            try:
+                resource_ids = delete_resources(resource_type, regional_resources)
+            finally:
+                reset_region(token)
+            store.forget(resource_type, resource_ids, environment=environment)
+            deleted += len(resource_ids)
+
+    store.forget_node(name, environment=environment)
+    logger.info('Destroyed (%s).' % name)
+
+    return deleted
@@ -0,0 +1,212 @@
+"""throttle.py: Client-side rate limiting of AWS API requests, with retries of throttled requests."""
+
+import time
+import random
+import logging
+import functools
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Error codes that AWS returns when a client exceeds its request rate.
+THROTTLING_CODES = [
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'SlowDown',
+]
+
+# Initial request rates (requests per second), by service. Rates adapt to throttling, within a factor of each.
+REQUEST_RATES = {
+    'ec2': 20.0,
+    'vpc': 20.0,
+    'elb': 10.0,
+    'rds': 10.0,
+    'iam': 5.0,
+    's3':  50.0,
+}
+
+# The maximum number of requests in flight to a service, by API family.
+FAMILY_CONCURRENCY = {
+    'describe': 16,
+    'mutate':   8,
+    'run':      4,
+}
+
+MAX_ATTEMPTS = 8
+BASE_DELAY = 0.5
+MAX_DELAY = 20
+
+class TokenBucket(object):
+    """
+    A token bucket whose rate adapts to throttling, in the manner of TCP
+    congestion control: the rate grows additively while requests succeed, and
+    is halved whenever a request is throttled (AIMD).
+
+    :type rate: float
+    :param rate: The initial number of requests per second.
+
+    :type burst: float
+    :param burst: The number of requests that may be made at once, after the
+        bucket has been idle.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=None, max_rate=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.min_rate = min_rate or rate / 16
+        self.max_rate = max_rate or rate * 4
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, waiting for one to become available if necessary.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            # Reserve a token, so that concurrent callers wait in turn rather than all at once.
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+    def succeeded(self):
+        with self._lock:
+            # Add about one request per second, per second of successful requests.
+            self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+            logger.debug('Throttled. Reduced request rate to %.2f/s.' % self.rate)
+
+
+class Limiter(object):
+    """
+    The rate limit of a single AWS service in a single region, shared by every
+    thread and connection.
+    """
+
+    def __init__(self, service, region):
+        self.service = service
+        self.region = region
+        self.bucket = TokenBucket(REQUEST_RATES.get(service, 10.0))
+        self.families = {family: threading.BoundedSemaphore(concurrency) for family, concurrency in FAMILY_CONCURRENCY.items()}
+
+    def request(self, family, make_request, *args, **kwargs):
+        """
+        Make a rate-limited request, retrying it with jittered, exponential
+        backoff for as long as it is throttled.
+
+        :rtype: :class:`boto.connection.HTTPResponse`
+        :return: The response to the last attempt.
+        """
+
+        import boto
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            with self.families[family]:
+                self.bucket.acquire()
+                try:
+                    response = make_request(*args, **kwargs)
+                except boto.exception.BotoServerError as error:
+                    # boto raises 5xx responses, e.g., RequestLimitExceeded, once its own retries are exhausted.
+                    if attempt == MAX_ATTEMPTS or not is_throttling_error(error):
+                        raise
+                    response = None
+
+            if response is not None and not is_throttled(response):
+                self.bucket.succeeded()
+                return response
+            if response is not None and attempt == MAX_ATTEMPTS:
+                return response
+
+            self.bucket.throttled()
+            delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+            logger.info('Request to (%s) in (%s) was throttled. Retrying in %.1fs (%d/%d).' % (self.service, self.region,
+                                                                                            delay, attempt, MAX_ATTEMPTS))
+            time.sleep(delay)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(service, region):
+    """
+    Get the shared rate limit of an AWS service in a region.
+
+    :rtype: :class:`sky.throttle.Limiter`
+    """
+
+    with _limiters_lock:
+        if (service, region) not in _limiters:
+            _limiters[(service, region)] = Limiter(service, region)
+        return _limiters[(service, region)]
+
+
+def get_family(action):
+    """
+    Get the API family of a request, by its action (e.g., ``DescribeSubnets``)
+    or, for Amazon S3, its HTTP method.
+
+    :rtype: str
+    :return: ``describe``, ``mutate`` or ``run``.
+    """
+
+    action = action or ''
+    if action in ['GET', 'HEAD'] or action.startswith(('Describe', 'Get', 'List')):
+        return 'describe'
+    if action == 'RunInstances':
+        return 'run'
+    return 'mutate'
+
+
+def is_throttling_error(error):
+    return getattr(error, 'error_code', None) in THROTTLING_CODES or \
+           any(code in str(getattr(error, 'body', '') or '') for code in THROTTLING_CODES)
+
+
+def is_throttled(response):
+    if response.status not in [400, 429, 503]:
+        return False
+
+    # boto caches the body of a response once it is read, so that it can still be parsed by the caller.
+    body = response.read()
+    body = body.decode('utf-8', 'replace') if isinstance(body, bytes) else body or ''
+    return any(code in body for code in THROTTLING_CODES)
+
+
+def throttle(connection, service, region):
+    """
+    Route every request made with a boto connection through the shared rate
+    limit of its service and region.
+
+    :type connection: :class:`boto.connection.AWSAuthConnection`
+    :param connection: A boto connection.
+
+    :rtype: :class:`boto.connection.AWSAuthConnection`
+    :return: The same connection.
+    """
+
+    limiter = get_limiter(service, region)
+    make_request = connection.make_request
+
+    @functools.wraps(make_request)
+    def throttled_request(*args, **kwargs):
+        action = kwargs.get('action', kwargs.get('method', args[0] if args else None))
+        return limiter.request(get_family(action), make_request, *args, **kwargs)
+
+    connection.make_request = throttled_request
+    return connection
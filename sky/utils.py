@@ -1,17 +1,26 @@
 import os
 import sys
+import time
 import tarfile
 import logging
 from string import Template
 from re import search, IGNORECASE
 from argparse import ArgumentParser
 from configparser import ConfigParser
-from timeit import Timer
-from boto import regioninfo
 from .state import config
 
 logger = logging.getLogger(__name__)
 
+COMMANDS = ['DEPLOY', 'DESTROY', 'PLAN', 'STATUS', 'GRAPH', 'SERVE']
+
+# Commands that never call AWS. The daemon (serve) calls AWS with the credentials of each forwarded command.
+OFFLINE_COMMANDS = ['PLAN', 'STATUS', 'GRAPH', 'SERVE']
+
+# Commands that are forwarded to a running daemon.
+DAEMON_COMMANDS = ['DEPLOY', 'PLAN', 'STATUS']
+
+STATE_DIRECTORY = '.sky'
+
 def get_script(region, s3bucket, s3object, filename='user-data.sh'):
     template = open(filename).read()
     return Template(template).substitute(
@@ -20,20 +29,164 @@ def get_script(region, s3bucket, s3object, filename='user-data.sh'):
         s3object=s3object
     )
 
-def get_closest_region(service='ec2', repetitions=1):
-    regions = [region.name for region in regioninfo.get_regions(service) if 'gov' not in region.name and 'cn' not in region.name]
+def get_percentile(samples, percentile):
+    # Nearest-rank percentile, e.g., 90 for the 90th percentile.
+    samples = sorted(samples)
+    rank = max(1, int(-(-percentile * len(samples) // 100)))
+    return samples[rank - 1]
+
+def probe_endpoint(host, port=443, repetitions=3, timeout=5, ssl_context=None):
+    """
+    Measure the latency of an HTTPS endpoint.
+
+    The TCP and TLS connection setup is timed separately from the request
+    round trips, which reuse a single kept-alive connection.
+
+    :rtype: dict
+    :return: A dictionary with the ``connect`` time and the round-trip time
+        ``samples`` in seconds, or ``None`` if the endpoint could not be
+        reached.
+    """
+
+    import ssl
+    from http.client import HTTPSConnection, HTTPException
+
+    connection = HTTPSConnection(host, port, timeout=timeout, context=ssl_context)
+    try:
+        started = time.perf_counter()
+        connection.connect()
+        connect_time = time.perf_counter() - started
+
+        samples = []
+        for _ in range(repetitions):
+            started = time.perf_counter()
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            samples.append(time.perf_counter() - started)
+    except (OSError, ssl.SSLError, HTTPException) as error:
+        logger.warning('Could not probe (%s:%d): %s' % (host, port, error))
+        return None
+    finally:
+        connection.close()
+
+    return {'connect': connect_time, 'samples': samples}
+
+def get_region_latencies(service='ec2', repetitions=3, endpoints=None, timeout=5, ssl_context=None):
+    """
+    Probe the regional endpoints of an AWS service concurrently.
+
+    :type endpoints: dict
+    :param endpoints: An *optional* mapping of region names to endpoints, in
+        the format: (``host``, ``port``). By default, the service's public
+        endpoint in each commercial region is probed.
+
+    :type ssl_context: :class:`ssl.SSLContext`
+    :param ssl_context: An *optional* SSL context, e.g., one that trusts the
+        certificate of a local stand-in endpoint.
 
-    latency = {}
-    for region in regions:
-        connection = Timer("h.request('GET', '/')",
-                           "from http.client import HTTPSConnection; h=HTTPSConnection('ec2.%s.amazonaws.com')" % region)
-        times = connection.repeat(repetitions, 1)
-        avg_latency = sum(times)/float(len(times))
-        latency[region] = avg_latency
-        logger.info('Average latency to Amazon %s %s is %s' % (service.upper(), region, latency[region]))
+    :rtype: dict
+    :return: A dictionary mapping each reachable region to its ``connect``,
+        ``median`` and ``p90`` latencies, in seconds.
 
-    region = min(latency, key=latency.get)
-    return region
+    :raises: :class:`RuntimeError`, if ``repetitions`` is less than 1.
+    """
+
+    from statistics import median
+    from concurrent.futures import ThreadPoolExecutor
+
+    # At least one request round trip is needed for the median and p90 latencies.
+    if repetitions < 1:
+        raise RuntimeError('At least one repetition is required to probe regions (%d).' % repetitions)
+
+    # Defer imports, so that command-line startup does not pay for them.
+    if endpoints is None:
+        from boto import regioninfo
+        endpoints = {region.name: ('%s.%s.amazonaws.com' % (service, region.name), 443) \
+                     for region in regioninfo.get_regions(service) if 'gov' not in region.name and 'cn' not in region.name}
+
+    # Probe every region at once, so that probing takes as long as the slowest region rather than the sum of all regions.
+    with ThreadPoolExecutor(max_workers=max(1, len(endpoints))) as pool:
+        probes = {region: pool.submit(probe_endpoint, host, port, repetitions, timeout, ssl_context) \
+                  for region, (host, port) in endpoints.items()}
+        probes = {region: probe.result() for region, probe in probes.items()}
+
+    latencies = {}
+    for region, probe in probes.items():
+        if not probe:
+            continue
+        latencies[region] = {'connect': probe['connect'],
+                             'median':  median(probe['samples']),
+                             'p90':     get_percentile(probe['samples'], 90)}
+        logger.info('Latency to Amazon %s %s: connect %.3fs, median %.3fs, p90 %.3fs' % (service.upper(), region,
+                    latencies[region]['connect'], latencies[region]['median'], latencies[region]['p90']))
+
+    return latencies
+
+def get_closest_region(service='ec2', repetitions=3, endpoints=None, ttl=3600, cache_path=None, timeout=5, ssl_context=None):
+    """
+    Get the AWS region with the lowest median request latency.
+
+    Probe results are cached on disk, in the state directory, for ``ttl``
+    seconds. The other parameters are those of
+    :func:`sky.utils.get_region_latencies`.
+
+    :type ttl: int
+    :param ttl: The number of seconds that cached results remain valid. Set
+        to ``0`` to always probe.
+
+    :type cache_path: str
+    :param cache_path: An *optional* cache file path.
+
+    :rtype: str
+    :return: A region name, e.g., ``us-east-1``.
+
+    :raises: :class:`RuntimeError`, if no region could be reached.
+    """
+
+    import json
+
+    # Cache results by service and endpoints, so that stand-in endpoints never answer for AWS.
+    cache_path = cache_path or get_state_path('regions.json')
+    cache_key = '%s:%s' % (service, json.dumps(sorted(endpoints.items()) if endpoints else None))
+    try:
+        with open(cache_path) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        cache = {}
+
+    cached = cache.get(cache_key)
+    if ttl and cached and time.time() - cached['probed'] < ttl:
+        logger.debug('Using cached region latencies (%s).' % cache_path)
+        latencies = cached['latencies']
+    else:
+        latencies = get_region_latencies(service, repetitions, endpoints, timeout, ssl_context)
+        if not latencies:
+            raise RuntimeError('No region could be reached (%s).' % service)
+
+        cache[cache_key] = {'probed': time.time(), 'latencies': latencies}
+        try:
+            with open(cache_path, 'w') as cache_file:
+                json.dump(cache, cache_file, indent=2, sort_keys=True)
+        except OSError as error:
+            logger.warning('Could not cache region latencies (%s): %s' % (cache_path, error))
+
+    return min(latencies, key=lambda region: latencies[region]['median'])
+
+def get_state_path(*paths):
+    """
+    Get a path within the state directory, which holds caches and state that persist between runs.
+
+    The state directory (``.sky``) is created in the current working directory,
+    alongside the skyfile, if it does not exist.
+
+    :rtype: str
+    :return: The path within the state directory.
+    """
+
+    if not os.path.isdir(STATE_DIRECTORY):
+        os.makedirs(STATE_DIRECTORY, exist_ok=True)
+
+    return os.path.join(STATE_DIRECTORY, *paths)
 
 def make_tarfile(output_filename, source_dir):
     logger.info('Archiving directory (%s).' % source_dir)
@@ -52,12 +205,11 @@ def configure_logger(args):
     logging.basicConfig(level=numeric_level)
 
 def parse_arguments():
-    global config
-    
     valid_arguments = True
     parser = ArgumentParser(description='Provision Django application environments.')
-    parser.add_argument('command', metavar='<command>', action='store', help='Valid commands are [deploy]')
-    parser.add_argument('targets', metavar='<targets>', action='store', nargs='*', default=['all'], help='Skyfile Targets')
+    parser.add_argument('command', metavar='<command>', action='store', help='Valid commands are [%s]' % ', '.join(command.lower() for command in COMMANDS))
+    parser.add_argument('targets', metavar='<targets>', action='store', nargs='*', default=['all'],
+                        help='Skyfile Targets: names or globs, name+ to include downstream targets, !name to exclude a target (default: all)')
     parser.add_argument('-p', '--project', dest='directory', action='store', default=os.getcwd(),
                         help='set Django project directory')
     parser.add_argument('-env', '--environment', dest='environment', action='store', default='STAGING',
@@ -70,8 +222,24 @@ def parse_arguments():
                         help='set AWS Account Secret Access Key')
     parser.add_argument('-d', '--log', dest='loglevel', action='store', default='ERROR',
                         help='set log level [DEBUG, INFO, WARNING, ERROR, CRITICAL] (default: ERROR)')
+    parser.add_argument('-j', '--jobs', dest='jobs', action='store', type=int, default=1,
+                        help='set the maximum number of infrastructure objects to build at once (default: 1)')
+    parser.add_argument('-e', '--engine', dest='engine', action='store', default='threads',
+                        help='set the execution engine [threads, asyncio] (default: threads)')
+    parser.add_argument('-f', '--force', dest='force', action='store_true', default=False,
+                        help='rebuild all infrastructure, even if it has not changed since the last deployment (destroy: include permanent infrastructure and adopted resources)')
+    parser.add_argument('-w', '--watch', dest='watch', action='store_true', default=False,
+                        help='re-plan when the skyfile changes (serve only)')
+    parser.add_argument('--region', dest='region', action='store', default=os.environ.get('AWS_DEFAULT_REGION'),
+                        help='set the AWS region to deploy to (default: us-east-1)')
+    parser.add_argument('--regions', dest='regions', action='store', default='',
+                        help='deploy to several comma-separated AWS regions concurrently, e.g., us-east-1,eu-west-1')
+    parser.add_argument('-t', '--timeout', dest='timeout', action='store', type=int, default=60,
+                        help='set the socket timeout of AWS connections, in seconds (default: 60)')
+    parser.add_argument('-r', '--resume', dest='resume', action='store_true', default=False,
+                        help='resume a failed deployment, reusing the infrastructure that it completed')
     parser.add_argument('--dry', dest='dry_run', action='store_true', default=False,
-                        help='perform a dry run')
+                        help='plan the deployment offline, without calling AWS (same as the plan command)')
 
     # Display help, if no command was supplied.
     if len(sys.argv) == 1:
@@ -91,7 +259,7 @@ def parse_arguments():
     configure_logger(args)
 
     try:
-        assert args.command.upper() in ['DEPLOY']
+        assert args.command.upper() in COMMANDS
         logger.debug('Command argument validated (%s).' % args.command)
     except AssertionError:
         logger.error('Invalid command (%s).' % args.command)
@@ -106,72 +274,115 @@ def parse_arguments():
         valid_arguments = False
 
     try:
-        assert os.path.isdir(os.path.expanduser(args.directory))
-        logger.debug('Django project directory argument validated (%s).' % args.directory)
+        assert args.jobs >= 1
+        logger.debug('Jobs argument validated (%s).' % args.jobs)
     except AssertionError:
-        logger.error('Invalid Django project directory (%s).' % args.directory)
+        logger.error('Invalid number of jobs (%s).' % args.jobs)
         valid_arguments = False
 
+    args.regions = [region.strip() for region in args.regions.split(',') if region.strip()]
     try:
-        assert search(r'^\d{12}$', args.account_id)
-        logger.debug('AWS Account ID argument validated (%s).' % args.account_id)
+        for region in ([args.region] if args.region else []) + args.regions:
+            assert search(r'^[a-z]{2}(-gov)?-[a-z]+-\d$', region)
+        logger.debug('Region arguments validated (%s).' % ', '.join(([args.region] if args.region else []) + args.regions))
     except AssertionError:
-        if len(args.account_id):
-            logger.error('AWS Account ID must be exactly 12 digits (%s).' % args.account_id)
-        else:
-            logger.error('AWS Account ID not specified.')
+        logger.error('Invalid region (%s).' % region)
         valid_arguments = False
 
-    config_path = None
-    if os.environ.get('BOTO_CONFIG'):
-        config_path = os.path.expanduser(os.environ.get('BOTO_CONFIG'))
-    elif os.path.exists(os.path.expanduser('~/.boto')):
-        config_path = os.path.expanduser('~/.boto')
-    elif os.path.exists(os.path.expanduser('~/.aws/credentials')):
-        config_path = os.path.expanduser('~/.aws/credentials')
-    elif os.path.exists('/etc/boto.cfg'):
-        config_path = '/etc/boto.cfg'
-
-    if config_path:
-        config = ConfigParser()
-        config.sections()
-        try:
-            logger.info('Reading configuration file (%s).' % config_path)
-            config.read(config_path)
-            key_id = config['Credentials']['aws_access_key_id']
-            key = config['Credentials']['aws_secret_access_key']
-        except:
-            logger.error('Could not read configuration file (%s).' % config_path)
+    try:
+        assert args.timeout >= 1
+        logger.debug('Timeout argument validated (%s).' % args.timeout)
+    except AssertionError:
+        logger.error('Invalid timeout (%s).' % args.timeout)
+        valid_arguments = False
 
     try:
-        args.key_id = args.key_id or key_id
-        assert search(r'^[A-Z0-9]{20}$', args.key_id, IGNORECASE)
-        logger.debug('AWS Access Key ID argument validated (%s).' % args.key_id)
+        assert args.engine.lower() in ['threads', 'asyncio']
+        logger.debug('Engine argument validated (%s).' % args.engine)
     except AssertionError:
-        if len(args.key_id):
-            logger.error('AWS Access Key ID must contain 20 alphanumeric characters (%s).' % args.key_id)
-        else:
-            logger.error('AWS Access Key ID not specified.')
+        logger.error('Invalid execution engine (%s).' % args.engine)
         valid_arguments = False
 
     try:
-        args.key = args.key or key
-        assert search(r'^[A-Z0-9/\+]{40}$', args.key, IGNORECASE)
-        logger.debug('AWS Account Secret Access Key argument validated.')
+        assert os.path.isdir(os.path.expanduser(args.directory))
+        logger.debug('Django project directory argument validated (%s).' % args.directory)
     except AssertionError:
-        if len(args.key):
-            logger.error('AWS Account Secret Access Key must contain 40 alphanumeric characters and/or the following: /+ (%s).' \
-                         % args.key)
-        else:
-            logger.error('AWS Account Secret Access Key not specified.')
+        logger.error('Invalid Django project directory (%s).' % args.directory)
         valid_arguments = False
 
+    # Validate AWS credentials for commands that call AWS.
+    if args.command.upper() not in OFFLINE_COMMANDS and not args.dry_run:
+        try:
+            assert search(r'^\d{12}$', args.account_id)
+            logger.debug('AWS Account ID argument validated (%s).' % args.account_id)
+        except AssertionError:
+            if len(args.account_id):
+                logger.error('AWS Account ID must be exactly 12 digits (%s).' % args.account_id)
+            else:
+                logger.error('AWS Account ID not specified.')
+            valid_arguments = False
+
+        config_path = None
+        if os.environ.get('BOTO_CONFIG'):
+            config_path = os.path.expanduser(os.environ.get('BOTO_CONFIG'))
+        elif os.path.exists(os.path.expanduser('~/.boto')):
+            config_path = os.path.expanduser('~/.boto')
+        elif os.path.exists(os.path.expanduser('~/.aws/credentials')):
+            config_path = os.path.expanduser('~/.aws/credentials')
+        elif os.path.exists('/etc/boto.cfg'):
+            config_path = '/etc/boto.cfg'
+
+        key_id, key = '', ''
+        if config_path:
+            credentials = ConfigParser()
+            credentials.sections()
+            try:
+                logger.info('Reading configuration file (%s).' % config_path)
+                credentials.read(config_path)
+                key_id = credentials['Credentials']['aws_access_key_id']
+                key = credentials['Credentials']['aws_secret_access_key']
+            except:
+                logger.error('Could not read configuration file (%s).' % config_path)
+
+        try:
+            args.key_id = args.key_id or key_id
+            assert search(r'^[A-Z0-9]{20}$', args.key_id, IGNORECASE)
+            logger.debug('AWS Access Key ID argument validated (%s).' % args.key_id)
+        except AssertionError:
+            if len(args.key_id):
+                logger.error('AWS Access Key ID must contain 20 alphanumeric characters (%s).' % args.key_id)
+            else:
+                logger.error('AWS Access Key ID not specified.')
+            valid_arguments = False
+
+        try:
+            args.key = args.key or key
+            assert search(r'^[A-Z0-9/\+]{40}$', args.key, IGNORECASE)
+            logger.debug('AWS Account Secret Access Key argument validated.')
+        except AssertionError:
+            if len(args.key):
+                logger.error('AWS Account Secret Access Key must contain 40 alphanumeric characters and/or the following: /+ (%s).' \
+                             % args.key)
+            else:
+                logger.error('AWS Account Secret Access Key not specified.')
+            valid_arguments = False
+
     if not valid_arguments:
         logger.error('Invalid arguments given.')
         logger.error('Exiting...')
         sys.exit(1)
 
+    config['COMMAND'] = args.command.lower()
     config['TARGETS'] = args.targets
+    config['JOBS'] = args.jobs
+    config['ENGINE'] = args.engine.lower()
+    config['FORCE'] = args.force
+    config['DRY_RUN'] = args.dry_run
+    config['WATCH'] = args.watch
+    config['RESUME'] = args.resume
+    config['CONNECTION_TIMEOUT'] = args.timeout
+    config['REGION'] = args.region
+    config['REGIONS'] = args.regions
     config['PROJECT_NAME'] = os.path.abspath(os.path.expanduser(args.directory)).split(os.sep)[-1].lower()
     config['PROJECT_DIRECTORY'] = os.path.abspath(os.path.expanduser(args.directory)).lower()
     config['ENVIRONMENT'] = args.environment.lower()
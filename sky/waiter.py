@@ -0,0 +1,129 @@
+"""waiter.py: Wait for eventually consistent AWS resources, with backoff, jitter and a deadline."""
+
+import time
+import random
+import logging
+from fnmatch import fnmatchcase
+
+logger = logging.getLogger(__name__)
+
+class WaiterError(RuntimeError):
+
+    def __init__(self, description, attempts, elapsed, error=None):
+        self.description = description
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.error = error
+
+        message = 'Timed out waiting for (%s) after %d attempt(s) in %.1fs.' % (description, attempts, elapsed)
+        if error:
+            message += ' Last error: %s' % error
+        super(WaiterError, self).__init__(message)
+
+
+class Waiter(object):
+    """
+    Call a function until it succeeds, sleeping with exponential, jittered
+    backoff between attempts.
+
+    Errors are handled by their AWS error code, according to rules that may
+    use globs, e.g., ``*.NotFound``. Errors that match none of the rules are
+    raised immediately.
+
+    :type description: str
+    :param description: What is being waited for, for logging, e.g.,
+        ``tagging of VPC (vpc-example-staging)``.
+
+    :type retry: list
+    :param retry: The error codes that mean the call should be retried, e.g.,
+        because a new resource has not propagated yet.
+
+    :type ignore: list
+    :param ignore: The error codes that mean there is nothing left to do,
+        e.g., because a resource has already been deleted. The call returns
+        ``None``, and :attr:`ignored` is set.
+
+    :type timeout: int
+    :param timeout: The deadline, in seconds, after which
+        :class:`sky.waiter.WaiterError` is raised.
+
+    :type delay: float
+    :param delay: The delay before the second attempt, in seconds. The delay
+        is doubled after each attempt, up to ``max_delay``.
+    """
+
+    def __init__(self, description, retry=None, ignore=None, timeout=300, delay=0.25, max_delay=10):
+        self.description = description
+        self.retry = retry or []
+        self.ignore = ignore or []
+        self.timeout = timeout
+        self.delay = delay
+        self.max_delay = max_delay
+        self.attempts = 0
+        self.elapsed = 0.0
+        self.ignored = False
+
+    def call(self, function, *args, **kwargs):
+        """
+        Call a function until it does not raise a retryable error.
+
+        :rtype: object
+        :return: The function's return value.
+        """
+
+        return self.wait(function, args, kwargs, until=False)
+
+    def until(self, function, *args, **kwargs):
+        """
+        Call a function until it returns a true value, e.g., ``True`` from
+        ``create_tags`` or a non-empty list from a describe call.
+
+        :rtype: object
+        :return: The function's first true return value.
+        """
+
+        return self.wait(function, args, kwargs, until=True)
+
+    def wait(self, function, args, kwargs, until=False):
+        import boto
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        delay = self.delay
+        error = None
+        while True:
+            self.attempts += 1
+            try:
+                result = function(*args, **kwargs)
+                if result or not until:
+                    self.report(started)
+                    return result
+                error = None
+            except boto.exception.BotoServerError as exception:
+                code = getattr(exception, 'error_code', None) or ''
+                if self.matches(code, self.ignore):
+                    self.ignored = True
+                    self.report(started)
+                    logger.debug('Ignored (%s) while waiting for (%s).' % (code, self.description))
+                    return None
+                if not self.matches(code, self.retry):
+                    raise
+                error = exception
+
+            # Sleep with jitter, so that concurrent waiters do not poll AWS in lockstep.
+            now = time.monotonic()
+            if now >= deadline:
+                self.elapsed = now - started
+                raise WaiterError(self.description, self.attempts, self.elapsed, error)
+            time.sleep(min(random.uniform(delay / 2, delay), deadline - now))
+            delay = min(delay * 2, self.max_delay)
+
+    def matches(self, code, patterns):
+        return any(fnmatchcase(code, pattern) for pattern in patterns)
+
+    def report(self, started):
+        self.elapsed = time.monotonic() - started
+        if self.attempts > 1:
+            logger.info('Waited %.2fs (%d attempts) for (%s).' % (self.elapsed, self.attempts, self.description))
+        else:
+            logger.debug('Waited %.2fs (1 attempt) for (%s).' % (self.elapsed, self.description))
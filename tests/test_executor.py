@@ -0,0 +1,90 @@
+"""test_executor.py: Dependency-ordered execution on threads and on asyncio."""
+
+import asyncio
+import threading
+import contextvars
+import pytest
+from sky.executor import ExecutionError, execute, execute_async
+
+NAMES = ['network', 'database', 'cache', 'web']
+DEPENDENCIES = {'database': ['network'], 'cache': ['network'], 'web': ['database', 'cache']}
+
+def test_execute_in_dependency_order():
+    order = []
+    completed = execute(NAMES, DEPENDENCIES, order.append, jobs=4)
+    assert sorted(completed) == sorted(NAMES)
+    assert order[0] == 'network' and order[-1] == 'web'
+
+
+def test_execute_runs_independent_nodes_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def action(name):
+        if name in ('database', 'cache'):
+            barrier.wait()
+
+    execute(NAMES, DEPENDENCIES, action, jobs=2)
+
+
+def test_execute_ignores_unselected_dependencies():
+    assert execute(['web'], DEPENDENCIES, lambda name: None) == ['web']
+
+
+def test_execute_skips_dependents_of_failed_nodes():
+    def action(name):
+        if name == 'database':
+            raise RuntimeError('failed')
+
+    with pytest.raises(ExecutionError) as error:
+        execute(NAMES, DEPENDENCIES, action, jobs=1)
+    assert list(error.value.errors) == ['database']
+    assert 'web' in error.value.skipped
+
+
+def test_execute_copies_context_per_node():
+    variable = contextvars.ContextVar('variable', default=None)
+    seen = {}
+
+    def action(name):
+        seen[name] = variable.get()
+        variable.set(name)
+
+    execute(NAMES, DEPENDENCIES, action, jobs=1)
+    assert set(seen.values()) == {None}
+
+
+def test_execute_async_in_dependency_order():
+    order = []
+
+    async def action(name):
+        await asyncio.sleep(0)
+        order.append(name)
+
+    completed = asyncio.run(execute_async(NAMES, DEPENDENCIES, action, jobs=4))
+    assert sorted(completed) == sorted(NAMES)
+    assert order[0] == 'network' and order[-1] == 'web'
+
+
+def test_execute_async_bounds_concurrency():
+    running = []
+    peak = []
+
+    async def action(name):
+        running.append(name)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(name)
+
+    asyncio.run(execute_async(['a', 'b', 'c', 'd'], {}, action, jobs=2))
+    assert max(peak) == 2
+
+
+def test_execute_async_reports_failures():
+    async def action(name):
+        if name == 'network':
+            raise RuntimeError('failed')
+
+    with pytest.raises(ExecutionError) as error:
+        asyncio.run(execute_async(NAMES, DEPENDENCIES, action))
+    assert list(error.value.errors) == ['network']
+    assert error.value.skipped == ['database', 'cache', 'web']
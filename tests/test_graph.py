@@ -0,0 +1,65 @@
+"""test_graph.py: Target selection over a dependency graph."""
+
+import pytest
+from sky.graph import Graph
+
+def get_graph():
+    # network <- database <- web, network <- cache, with web also requiring cache.
+    return Graph({
+        'network': [],
+        'database': ['network'],
+        'cache': ['network'],
+        'web': ['database', 'cache'],
+    })
+
+
+def test_ancestors_and_descendants():
+    graph = get_graph()
+    assert graph.ancestors(['web']) == {'web', 'database', 'cache', 'network'}
+    assert graph.descendants(['database']) == {'database', 'web'}
+
+
+def test_match_glob():
+    assert get_graph().match('*a*e') == {'database', 'cache'}
+
+
+def test_match_unknown_target():
+    with pytest.raises(RuntimeError):
+        get_graph().match('queue')
+
+
+def test_select_includes_dependencies():
+    assert get_graph().select(['database']) == {'database', 'network'}
+
+
+def test_select_all():
+    assert get_graph().select(['all']) == {'network', 'database', 'cache', 'web'}
+
+
+def test_select_downstream():
+    assert get_graph().select(['cache+']) == {'cache', 'web', 'database', 'network'}
+
+
+def test_select_only_exclusions():
+    assert get_graph().select(['!database']) == {'network', 'cache'}
+
+
+def test_select_excludes_downstream_nodes():
+    assert get_graph().select(['cache+', '!database']) == {'cache', 'network'}
+
+
+def test_select_excluded_named_target():
+    assert get_graph().select(['*a*e', '!database']) == {'cache', 'network'}
+
+
+def test_select_named_target_that_requires_exclusion():
+    with pytest.raises(RuntimeError):
+        get_graph().select(['web', '!database'])
+
+
+def test_select_teardown_includes_dependents():
+    assert get_graph().select_teardown(['database']) == {'database', 'web'}
+
+
+def test_select_teardown_keeps_dependencies():
+    assert get_graph().select_teardown(['all', '!cache']) == {'database', 'web'}
@@ -0,0 +1,43 @@
+"""test_imports.py: Sky's entry points load without boto, within an import-time budget."""
+
+import os
+import re
+import sys
+import subprocess
+
+# The project root, which is put on the path of each subprocess.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The cumulative import time of each entry point, in microseconds, that is allowed on a CI runner.
+BUDGET = 250000
+
+def run_python(*arguments):
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable] + list(arguments), cwd=ROOT, env=environment,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+
+def get_import_time(module):
+    # Each line of -X importtime output is: import time: self [us] | cumulative | imported package
+    output = run_python('-X', 'importtime', '-c', 'import %s' % module).stderr
+    for line in output.splitlines():
+        match = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)$', line)
+        if match and match.group(2) == module:
+            return int(match.group(1))
+    raise AssertionError('No import time was reported for (%s).' % module)
+
+
+def test_api_does_not_import_boto():
+    run_python('-c', "import sky.api, sys; assert not any(m.startswith('boto') for m in sys.modules)")
+
+
+def test_main_does_not_import_boto():
+    run_python('-c', "import sky.main, sys; assert not any(m.startswith('boto') for m in sys.modules)")
+
+
+def test_api_import_time():
+    assert get_import_time('sky.api') < BUDGET
+
+
+def test_main_import_time():
+    assert get_import_time('sky.main') < BUDGET
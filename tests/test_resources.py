@@ -0,0 +1,74 @@
+"""test_resources.py: Serializing AWS resources, and verifying that recorded resources still exist."""
+
+import pytest
+import sky.database
+import sky.security
+from sky.resources import serialize, get_resource_ids, describe_resources, verify_resources
+from sky.state import deployment, get_region
+
+class RDSConnection(object):
+    """
+    An RDS connection that lists DB Instances a page at a time.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.regions = []
+
+    def describe_db_instances(self, marker=None):
+        self.regions.append(get_region())
+        page = int(marker or 0)
+        result = {'DBInstances': self.pages[page], 'Marker': str(page + 1) if page + 1 < len(self.pages) else None}
+        return {'DescribeDBInstancesResponse': {'DescribeDBInstancesResult': result}}
+
+
+class IAMConnection(object):
+
+    def __init__(self, roles):
+        self.roles = roles
+
+    def list_roles(self, marker=None):
+        result = {'roles': [{'role_name': name} for name in self.roles], 'is_truncated': 'false'}
+        return {'list_roles_response': {'list_roles_result': result}}
+
+
+@pytest.fixture
+def rds(monkeypatch):
+    connection = RDSConnection([[{'DBInstanceIdentifier': 'db-1', 'DBInstanceStatus': 'available'}],
+                                [{'DBInstanceIdentifier': 'db-2', 'DBInstanceStatus': 'deleting'}]])
+    monkeypatch.setattr(sky.database, 'connect_rds', lambda: connection)
+    return connection
+
+
+def test_serialize_values():
+    assert serialize({'port': 5432, 'names': ['db-1']}) == {'dict': [['port', {'value': 5432}], ['names', {'list': [{'value': 'db-1'}]}]]}
+    with pytest.raises(TypeError):
+        serialize(object())
+
+
+def test_get_resource_ids():
+    serialized = {'list': [{'type': 'vpc', 'id': 'vpc-1'}, {'dict': [['subnet', {'type': 'subnet', 'id': 'subnet-1'}]]}]}
+    assert get_resource_ids(serialized) == {'vpc': {'vpc-1'}, 'subnet': {'subnet-1'}}
+
+
+def test_describe_db_instances(rds):
+    assert list(describe_resources('db_instance', ['db-1', 'db-2', 'db-3'])) == ['db-1']
+
+
+def test_describe_roles(monkeypatch):
+    monkeypatch.setattr(sky.security, 'connect_iam', lambda: IAMConnection(['role-1', 'role-2']))
+    assert list(describe_resources('role', ['role-2', 'role-3'])) == ['role-2']
+
+
+def test_verify_resources(rds):
+    with deployment(REGION='eu-west-1'):
+        assert verify_resources([{'type': 'db_instance', 'id': 'db-1', 'region': 'us-west-2'}])
+        assert not verify_resources([{'type': 'db_instance', 'id': 'db-2', 'region': None}])
+
+    # Resources are described in the region that they were recorded in.
+    assert rds.regions == ['us-west-2', 'us-west-2', 'eu-west-1', 'eu-west-1']
+
+
+def test_verify_resources_skips_verified_resources(rds):
+    assert verify_resources([{'type': 'db_instance', 'id': 'db-2', 'region': None}], verified={'db_instance': {'db-2'}})
+    assert rds.regions == []
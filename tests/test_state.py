@@ -0,0 +1,34 @@
+"""test_state.py: Deployment state, kept separately by each deployment Context."""
+
+import pytest
+from sky.state import deployment, config, ready
+
+def test_ready_attributes_are_set_on_the_context():
+    with deployment() as context:
+        ready.network = 'vpc-1'
+        assert 'network' in ready
+        assert ready['network'] == 'vpc-1'
+        assert context.ready == {'network': 'vpc-1'}
+
+    # The attribute does not leak into later deployments.
+    with deployment():
+        assert 'network' not in ready
+        with pytest.raises(AttributeError):
+            ready.network
+    assert ready.__dict__ == {}
+
+
+def test_ready_attributes_are_deleted_from_the_context():
+    with deployment() as context:
+        ready.network = 'vpc-1'
+        del ready.network
+        assert context.ready == {}
+        with pytest.raises(AttributeError):
+            del ready.network
+
+
+def test_deployments_have_their_own_config():
+    with deployment(ENVIRONMENT='staging'):
+        with deployment(ENVIRONMENT='prod'):
+            assert config['ENVIRONMENT'] == 'prod'
+        assert config['ENVIRONMENT'] == 'staging'
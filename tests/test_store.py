@@ -0,0 +1,146 @@
+"""test_store.py: The local record of the AWS resources that Sky has created."""
+
+import sqlite3
+import pytest
+from sky import store
+from sky.state import deployment, set_current_node, reset_current_node, set_region, reset_region
+from sky.store import ResourceStore, get_store, get_scope, record_resource, find_resources
+
+@pytest.fixture
+def resource_store(tmp_path):
+    return ResourceStore(str(tmp_path / 'state.db'))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    # Share a single store between every call, as get_store does for a project's state directory.
+    resource_store = get_store(str(tmp_path / 'state.db'))
+    monkeypatch.setattr(store, 'get_store', lambda: resource_store)
+    with deployment(ENVIRONMENT='staging', REGION=None):
+        token = set_current_node('network')
+        yield resource_store
+        reset_current_node(token)
+
+
+def test_lookup(resource_store):
+    resource_store.record('subnet', 'subnet-1', name='public', parent='vpc-1', environment='staging')
+    resource_store.record('subnet', 'subnet-2', name='private', parent='vpc-1', environment='staging')
+    resource_store.record('subnet', 'subnet-3', name='public', parent='vpc-2', environment='staging')
+
+    assert resource_store.lookup('subnet', environment='staging') == ['subnet-1', 'subnet-2', 'subnet-3']
+    assert resource_store.lookup('subnet', name='public', environment='staging') == ['subnet-1', 'subnet-3']
+    assert resource_store.lookup('subnet', name='public', parent='vpc-2', environment='staging') == ['subnet-3']
+    assert resource_store.lookup('subnet', environment='prod') == []
+
+
+def test_lookup_by_region(resource_store):
+    resource_store.record('vpc', 'vpc-1', region='eu-west-1')
+    resource_store.record('vpc', 'vpc-2', region='us-west-2')
+    resource_store.record('vpc', 'vpc-3')
+
+    assert resource_store.lookup('vpc', region='eu-west-1') == ['vpc-1', 'vpc-3']
+
+
+def test_forget(resource_store):
+    resource_store.record('vpc', 'vpc-1')
+    resource_store.record('vpc', 'vpc-2')
+    resource_store.forget('vpc', ['vpc-1'])
+    assert resource_store.lookup('vpc') == ['vpc-2']
+
+
+def test_get_resources(resource_store):
+    resource_store.record('vpc', 'vpc-1', name='network', node='network', region='eu-west-1')
+    resource_store.record('subnet', 'subnet-1', parent='vpc-1', node='subnets')
+
+    assert resource_store.get_resources(node='network') == [
+        {'type': 'vpc', 'id': 'vpc-1', 'name': 'network', 'parent': None, 'node': 'network', 'region': 'eu-west-1', 'adopted': False},
+    ]
+    assert [resource['id'] for resource in resource_store.get_resources()] == ['vpc-1', 'subnet-1']
+
+
+def test_adopted_resources_stay_created(resource_store):
+    resource_store.record('vpc', 'vpc-1')
+    resource_store.record('vpc', 'vpc-1', adopted=True)
+    resource_store.record('vpc', 'vpc-2', adopted=True)
+
+    assert [resource['adopted'] for resource in resource_store.get_resources()] == [False, True]
+
+
+def test_nodes(resource_store):
+    assert resource_store.get_node('network') is None
+
+    resource_store.record_node('network', 'abc', {'value': 1}, environment='staging')
+    assert resource_store.get_node('network', environment='staging') == {'fingerprint': 'abc', 'outputs': {'value': 1}}
+    assert resource_store.get_node('network') is None
+
+    resource_store.forget_node('network', environment='staging')
+    assert resource_store.get_node('network', environment='staging') is None
+
+
+def test_journal(resource_store):
+    resource_store.journal_node('network', 'abc', {'value': 1})
+    resource_store.journal_node('subnets', 'def', None)
+
+    assert resource_store.get_journal() == {'network': {'fingerprint': 'abc', 'outputs': {'value': 1}},
+                                            'subnets': {'fingerprint': 'def', 'outputs': None}}
+
+    resource_store.clear_journal()
+    assert resource_store.get_journal() == {}
+
+
+def test_migration(tmp_path):
+    path = str(tmp_path / 'state.db')
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        CREATE TABLE resources (environment TEXT NOT NULL, type TEXT NOT NULL, id TEXT NOT NULL, name TEXT, parent TEXT,
+                                node TEXT, created REAL NOT NULL, PRIMARY KEY (environment, type, id));
+        INSERT INTO resources VALUES ('staging@us-east-1', 'vpc', 'vpc-1', NULL, NULL, 'network', 1);
+        INSERT INTO resources VALUES ('staging@eu-west-1', 'vpc', 'vpc-2', NULL, NULL, 'network', 2);
+    ''')
+    connection.commit()
+    connection.close()
+
+    resource_store = ResourceStore(path)
+    assert resource_store.lookup('vpc', environment='staging') == ['vpc-1']
+    assert resource_store.lookup('vpc', environment='staging@eu-west-1') == ['vpc-2']
+    assert resource_store.get_resources(environment='staging')[0]['adopted'] is False
+
+
+def test_get_store_is_shared(tmp_path):
+    assert get_store(str(tmp_path / 'state.db')) is get_store(str(tmp_path / '.' / 'state.db'))
+
+
+def test_get_scope():
+    with deployment(ENVIRONMENT='staging', REGION=None):
+        assert get_scope() == 'staging'
+    with deployment(ENVIRONMENT='staging', REGION='us-east-1'):
+        assert get_scope() == 'staging'
+    with deployment(ENVIRONMENT='staging', REGION='eu-west-1'):
+        assert get_scope() == 'staging@eu-west-1'
+
+        # Functions that are called in another region record into the deployment's scope.
+        token = set_region('us-west-2')
+        assert get_scope() == 'staging@eu-west-1'
+        reset_region(token)
+
+
+def test_record_resource(project):
+    token = set_region('eu-west-1')
+    record_resource('vpc', 'vpc-1', name='network')
+    reset_region(token)
+
+    assert project.get_resources(environment='staging') == [
+        {'type': 'vpc', 'id': 'vpc-1', 'name': 'network', 'parent': None, 'node': 'network', 'region': 'eu-west-1', 'adopted': False},
+    ]
+
+
+def test_find_resources(project, monkeypatch):
+    import sky.resources
+    monkeypatch.setattr(sky.resources, 'describe_resources', lambda resource_type, resource_ids: {'vpc-2': 'VPC:vpc-2'})
+
+    record_resource('vpc', 'vpc-1', name='network')
+    record_resource('vpc', 'vpc-2', name='network')
+
+    # Resources that no longer exist are forgotten.
+    assert find_resources('vpc', name='network') == ['VPC:vpc-2']
+    assert project.lookup('vpc', environment='staging') == ['vpc-2']
@@ -0,0 +1,99 @@
+"""test_tagging.py: Deferring EC2 tags to the end of a block."""
+
+import threading
+import contextvars
+import pytest
+from sky import tagging
+from sky.state import deployment, set_region, reset_region
+from sky.tagging import TagBatch, tag, batched_tags
+
+@pytest.fixture
+def requests(monkeypatch):
+    requests = []
+    lock = threading.Lock()
+
+    def create_tags(resource_ids, tags, region=None):
+        with lock:
+            requests.append((sorted(resource_ids), tags, region))
+        return True
+
+    monkeypatch.setattr(tagging, 'create_tags', create_tags)
+    return requests
+
+
+def test_tag_without_a_batch(requests):
+    tag(['vpc-1'], {'Name': 'vpc'})
+    assert requests == [(['vpc-1'], {'Name': 'vpc'}, None)]
+
+
+def test_batch_groups_resources_by_tags(requests):
+    with deployment(REGION='eu-west-1'):
+        batch = TagBatch()
+        batch.add(['subnet-1'], {'Project': 'sky'})
+        batch.add(['subnet-2', 'subnet-1'], {'Project': 'sky'})
+        batch.add(['subnet-1'], {'Name': 'subnet-1'})
+        assert batch.flush() == 2
+
+    assert sorted(requests) == [(['subnet-1'], {'Name': 'subnet-1'}, 'eu-west-1'),
+                                (['subnet-1', 'subnet-2'], {'Project': 'sky'}, 'eu-west-1')]
+
+
+def test_batch_groups_resources_by_region(requests):
+    batch = TagBatch()
+    with deployment(REGION='eu-west-1'):
+        batch.add(['vpc-1'], {'Project': 'sky'})
+        token = set_region('us-west-2')
+        batch.add(['vpc-2'], {'Project': 'sky'})
+        reset_region(token)
+        batch.flush()
+
+    assert sorted(request[2] for request in requests) == ['eu-west-1', 'us-west-2']
+
+
+def test_batch_splits_large_requests(requests, monkeypatch):
+    monkeypatch.setattr(tagging, 'MAX_RESOURCES', 2)
+    batch = TagBatch()
+    batch.add(['i-1', 'i-2', 'i-3'], {'Project': 'sky'})
+    assert batch.flush() == 2
+
+
+def test_empty_batch(requests):
+    assert TagBatch().flush() == 0
+    assert requests == []
+
+
+def test_batched_tags_defers_tags(requests):
+    with batched_tags():
+        tag(['vpc-1'], {'Project': 'sky'})
+        assert requests == []
+
+        # Tags from other threads, in copies of the context, join the batch.
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(tag, ['vpc-2'], {'Project': 'sky'}))
+        thread.start()
+        thread.join()
+        assert requests == []
+
+    assert requests == [(['vpc-1', 'vpc-2'], {'Project': 'sky'}, 'us-east-1')]
+
+
+def test_nested_batched_tags_join_the_outermost_batch(requests):
+    with batched_tags() as outer:
+        with batched_tags() as inner:
+            tag(['vpc-1'], {'Project': 'sky'})
+        assert inner is outer
+        assert requests == []
+
+    assert len(requests) == 1
+
+
+def test_batched_tags_flushes_on_failure(requests):
+    with pytest.raises(RuntimeError):
+        with batched_tags():
+            tag(['vpc-1'], {'Project': 'sky'})
+            raise RuntimeError('failed')
+
+    assert len(requests) == 1
+
+    # The batch is no longer active.
+    tag(['vpc-2'], {'Project': 'sky'})
+    assert len(requests) == 2
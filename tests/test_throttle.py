@@ -0,0 +1,87 @@
+"""test_throttle.py: Adaptive rate limiting and retries of throttled AWS requests."""
+
+import pytest
+from sky import throttle
+from sky.throttle import TokenBucket, Limiter, get_family, is_throttled
+
+class Response(object):
+
+    def __init__(self, status, body=b''):
+        self.status = status
+        self.body = body
+
+    def read(self):
+        return self.body
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(throttle.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(throttle.random, 'uniform', lambda low, high: high)
+    return sleeps
+
+
+def test_bucket_allows_a_burst(sleeps):
+    bucket = TokenBucket(10.0)
+    for _ in range(10):
+        bucket.acquire()
+    assert sleeps == []
+
+
+def test_bucket_waits_once_empty(sleeps):
+    bucket = TokenBucket(10.0, burst=1)
+    bucket.acquire()
+    bucket.acquire()
+    assert len(sleeps) == 1 and 0 < sleeps[0] <= 0.1
+
+
+def test_bucket_adapts_rate():
+    bucket = TokenBucket(8.0)
+    bucket.throttled()
+    assert bucket.rate == 4.0
+    bucket.succeeded()
+    assert bucket.rate == 4.25
+
+
+def test_bucket_rate_is_bounded():
+    bucket = TokenBucket(16.0)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket.rate == 1.0
+
+
+def test_get_family():
+    assert get_family('DescribeSubnets') == 'describe'
+    assert get_family('GET') == 'describe'
+    assert get_family('RunInstances') == 'run'
+    assert get_family('CreateTags') == 'mutate'
+    assert get_family(None) == 'mutate'
+
+
+def test_is_throttled():
+    assert is_throttled(Response(503, b'<Code>RequestLimitExceeded</Code>'))
+    assert not is_throttled(Response(400, b'<Code>InvalidParameterValue</Code>'))
+    assert not is_throttled(Response(200, b'Throttling'))
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    # Only the backoff between attempts is slept for, since the bucket is tested separately.
+    monkeypatch.setattr(TokenBucket, 'acquire', lambda bucket: None)
+    return Limiter('ec2', 'us-east-1')
+
+
+def test_limiter_retries_throttled_responses(limiter, sleeps):
+    responses = iter([Response(503, b'Throttling'), Response(503, b'Throttling'), Response(200)])
+    rate = limiter.bucket.rate
+
+    assert limiter.request('describe', lambda: next(responses)).status == 200
+    assert sleeps == [1.0, 2.0]
+    assert limiter.bucket.rate < rate
+
+
+def test_limiter_returns_the_last_throttled_response(limiter, sleeps):
+    response = Response(503, b'Throttling')
+    assert limiter.request('mutate', lambda: response) is response
+    assert len(sleeps) == throttle.MAX_ATTEMPTS - 1
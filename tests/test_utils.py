@@ -0,0 +1,137 @@
+"""test_utils.py: Region latency probes, against local stand-in HTTPS endpoints."""
+
+import os
+import ssl
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from sky import utils
+from sky.utils import get_percentile, probe_endpoint, get_region_latencies, get_closest_region
+
+# A self-signed certificate and key for localhost and 127.0.0.1.
+CERTIFICATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'localhost.pem')
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep connections alive, so that round trips are timed without connection setup.
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(delay=0.0):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.delay = delay
+    server.requests = 0
+    server.daemon_threads = True
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(CERTIFICATE)
+    server.socket = server_context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True).start()
+    return server
+
+
+def get_closed_port():
+    with socket.socket() as closed:
+        closed.bind(('127.0.0.1', 0))
+        return closed.getsockname()[1]
+
+
+@pytest.fixture
+def ssl_context():
+    return ssl.create_default_context(cafile=CERTIFICATE)
+
+
+@pytest.fixture
+def servers():
+    servers = {'near': start_server(), 'far': start_server(delay=0.05)}
+    yield servers
+    for server in servers.values():
+        server.shutdown()
+        server.server_close()
+
+
+def get_endpoints(servers):
+    return {region: ('127.0.0.1', server.server_address[1]) for region, server in servers.items()}
+
+
+def test_get_percentile():
+    samples = [5, 1, 4, 2, 3, 6, 7, 8, 9, 10]
+    assert get_percentile(samples, 50) == 5
+    assert get_percentile(samples, 90) == 9
+    assert get_percentile([1], 90) == 1
+
+
+def test_probe_endpoint(servers, ssl_context):
+    probe = probe_endpoint('127.0.0.1', servers['near'].server_address[1], repetitions=3, ssl_context=ssl_context)
+    assert len(probe['samples']) == 3
+    assert probe['connect'] > 0
+    assert servers['near'].requests == 3
+
+
+def test_probe_unreachable_endpoint(ssl_context):
+    assert probe_endpoint('127.0.0.1', get_closed_port(), ssl_context=ssl_context) is None
+
+
+def test_probe_untrusted_endpoint(servers):
+    assert probe_endpoint('127.0.0.1', servers['near'].server_address[1], ssl_context=ssl.create_default_context()) is None
+
+
+def test_get_region_latencies(servers, ssl_context):
+    endpoints = dict(get_endpoints(servers), closed=('127.0.0.1', get_closed_port()))
+    latencies = get_region_latencies(repetitions=3, endpoints=endpoints, ssl_context=ssl_context)
+
+    assert sorted(latencies) == ['far', 'near']
+    assert latencies['far']['median'] >= 0.05
+    assert latencies['far']['p90'] >= latencies['far']['median']
+    assert latencies['near']['median'] < latencies['far']['median']
+
+
+def test_get_region_latencies_probes_concurrently(ssl_context):
+    servers = {region: start_server(delay=0.2) for region in ['a', 'b', 'c', 'd']}
+    try:
+        started = time.monotonic()
+        latencies = get_region_latencies(repetitions=1, endpoints=get_endpoints(servers), ssl_context=ssl_context)
+        assert sorted(latencies) == ['a', 'b', 'c', 'd']
+        assert time.monotonic() - started < 0.6
+    finally:
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def test_get_region_latencies_requires_repetitions(servers, ssl_context):
+    with pytest.raises(RuntimeError):
+        get_region_latencies(repetitions=0, endpoints=get_endpoints(servers), ssl_context=ssl_context)
+
+
+def test_get_closest_region_caches_latencies(servers, ssl_context, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'regions.json')
+    endpoints = get_endpoints(servers)
+    assert get_closest_region(endpoints=endpoints, cache_path=cache_path, ssl_context=ssl_context) == 'near'
+    requests = servers['near'].requests
+
+    # Cached latencies are used until they expire.
+    assert get_closest_region(endpoints=endpoints, cache_path=cache_path, ssl_context=ssl_context) == 'near'
+    assert servers['near'].requests == requests
+
+    now = time.time()
+    monkeypatch.setattr(utils.time, 'time', lambda: now + 3600)
+    assert get_closest_region(endpoints=endpoints, cache_path=cache_path, ssl_context=ssl_context) == 'near'
+    assert servers['near'].requests > requests
+
+
+def test_get_closest_region_without_reachable_regions(ssl_context, tmp_path):
+    with pytest.raises(RuntimeError):
+        get_closest_region(endpoints={'closed': ('127.0.0.1', get_closed_port())}, cache_path=str(tmp_path / 'regions.json'),
+                           ssl_context=ssl_context)
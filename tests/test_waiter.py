@@ -0,0 +1,90 @@
+"""test_waiter.py: Retries of eventually consistent AWS calls, with backoff and a deadline."""
+
+import pytest
+import boto.exception
+from sky import waiter
+from sky.waiter import Waiter, WaiterError
+
+class Clock(object):
+    """
+    A clock that only advances while the waiter sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(waiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(waiter.time, 'sleep', clock.sleep)
+    monkeypatch.setattr(waiter.random, 'uniform', lambda low, high: high)
+    return clock
+
+
+def get_error(code):
+    error = boto.exception.BotoServerError(400, 'Bad Request')
+    error.error_code = code
+    return error
+
+
+def fail(*codes, result=True):
+    # Raise each error in turn, then return the result.
+    errors = [get_error(code) for code in codes]
+
+    def function():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return function
+
+
+def test_call_retries_matching_errors(clock):
+    subnet_waiter = Waiter('subnet', retry=['*.NotFound'])
+    assert subnet_waiter.call(fail('InvalidSubnetID.NotFound', 'InvalidSubnetID.NotFound')) is True
+    assert subnet_waiter.attempts == 3
+    assert clock.sleeps == [0.25, 0.5]
+
+
+def test_call_raises_other_errors(clock):
+    with pytest.raises(boto.exception.BotoServerError):
+        Waiter('subnet', retry=['*.NotFound']).call(fail('UnauthorizedOperation'))
+    assert clock.sleeps == []
+
+
+def test_call_ignores_matching_errors(clock):
+    subnet_waiter = Waiter('subnet', ignore=['InvalidSubnetID.NotFound'])
+    assert subnet_waiter.call(fail('InvalidSubnetID.NotFound')) is None
+    assert subnet_waiter.ignored
+
+
+def test_call_returns_false_values(clock):
+    assert Waiter('subnet').call(lambda: []) == []
+
+
+def test_until_retries_false_values(clock):
+    results = iter([[], [], ['subnet-1']])
+    subnet_waiter = Waiter('subnet')
+    assert subnet_waiter.until(lambda: next(results)) == ['subnet-1']
+    assert subnet_waiter.attempts == 3
+
+
+def test_until_raises_after_the_deadline(clock):
+    with pytest.raises(WaiterError) as error:
+        Waiter('subnet', retry=['*.NotFound'], timeout=5, max_delay=1).until(lambda: False)
+    assert clock.now == 5
+    assert error.value.attempts == len(clock.sleeps) + 1
+
+
+def test_delay_is_bounded(clock):
+    Waiter('subnet', retry=['Throttling'], max_delay=1).call(fail(*['Throttling'] * 5))
+    assert clock.sleeps == [0.25, 0.5, 1, 1, 1]